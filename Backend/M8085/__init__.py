@@ -6,49 +6,105 @@ Example:
     result = Processor(code).as_dict()
 """
 
+import os
+import sys
+from time import perf_counter
+from typing import Generator, Iterator
+
 from ._parser import Parser
-from ._utils import Message, operate, INSTRUCTION
+from ._utils import Message, INSTRUCTION
 from ._arithmetic import Arithmetic
 from ._data import Data
 from ._logical import Logical
 from ._peripheral import Peripheral
 from ._stack import Stack
 from ._branch import Branch
-from ._timing import TimingDiagram
-from ._memory import Memory, Register, Flag, Assembler
-from .logs import setup_logger, info
+from ._memory import MachineState, Snapshot, Memory, Register, Flag, Assembler, DB_ORIGIN
+from ._decoder import predecode, opcode_table, directive_slots, ImageProgram
+from ._dispatch import Dispatch
+from ._image import Image
+from ._stream import Step, Before, Frame
+from ._history import History, Counters, Undone
+from ._breakpoints import Breakpoints, Breakpoint, Watchpoint, Hit, Break, ArmedImage
+from ._delta import Version, capture, diff
+from ._batch import jobs, run_batch, BATCH_WORKERS
+from ._cache import assembly_cache, digest, result_cache, RESULT_CACHE
+from ._profile import Profiler, PROFILE
+from ._tstates import CLOCK_MHZ, MAX_CYCLES, microseconds
+from .logs import setup_logger, Tracer, TRACE
 
 RUNTIME = 10000
+EXEC_MODE = os.getenv('M8085_EXEC_MODE', 'decoded') # or 'image'
 setup_logger()
+
+def __getattr__(name):
+    # TimingDiagram pulls in matplotlib (~0.5 s), so it is only imported
+    # the first time someone asks for it.
+    if name == "TimingDiagram":
+        from ._timing import TimingDiagram
+        return TimingDiagram
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 class Processor:
     """Main simulator class. Parses, assembles, and executes 8085 code.
     
     Execution flow:
     1. Parse assembly code (syntax validation)
     2. Assemble (label resolution, pass2)
-    3. Execute instructions until HLT
+    3. Execute instructions until HLT, counting T-states and machine cycles
     4. Return final processor state
+
+    All state lives in the MachineState passed in (a fresh one by default),
+    so processors on different states can run concurrently.
     """
 
-    def __init__(self,input:str):
-
-        self.__arithmetic = Arithmetic()
-        self.__data = Data()
-        self.__logical = Logical()
-        self.__peripheral = Peripheral()
-        self.__stack = Stack()
-        self.__branch = Branch()
-        self.__parser = Parser(input)
-        self.__pc = Assembler()
-        self.__register = Register()
-        self.__memory = Memory()
-        self.__flag = Flag()
+    def __init__(self,input:str, state:MachineState | None = None,
+                 runtime:int = RUNTIME, trace:bool = TRACE, cache:bool = RESULT_CACHE,
+                 profile:bool = PROFILE, clock:float = CLOCK_MHZ, max_cycles:int = MAX_CYCLES,
+                 mode:str = EXEC_MODE, breakpoints:Breakpoints | None = None):
+
+        state = state if state is not None else MachineState()
+        state.origin = DB_ORIGIN # each program's DB data starts here unless it ORGs
+        self.__state = state
+        self.__arithmetic = Arithmetic(state)
+        self.__data = Data(state)
+        self.__logical = Logical(state)
+        self.__peripheral = Peripheral(state)
+        self.__stack = Stack(state)
+        self.__branch = Branch(state)
+        self.__parser = Parser(input, state)
+        self.__pc = Assembler(state)
+        self.__register = Register(state)
+        self.__memory = Memory(state)
+        self.__flag = Flag(state)
         self.__input = input
         self.inst = {}
+        self.__branches = set()
         self.__inst_set()
+        self.__dispatch = Dispatch(state, self.inst)
 
+        self.__runtime = runtime
+        self.__clock = clock
+        self.__max_cycles = max_cycles
+        self.__image = mode == 'image'
+        self.tracer = Tracer() if trace else None
+        self.profiler = Profiler() if profile else None
+        self.__breakpoints = breakpoints
+        # a replayed result has no trace or profile, and does not stop
+        self.__cache = cache and not trace and not profile and breakpoints is None
         self.__rt = 0
+        self.__tstates = 0
+        self.__mcycles = 0
+        self.__directives = 0 # of the __rt steps, ORG and DB
+        self.__directive_slots: dict[int, str] = {} # in the loaded image
         self.__cp = None
+        self.__program = None
+        self.__plain = None
+        self.__armed = None
+        self.__hit = None
+        self.__history = None
+        self.__stepper = None
+        self.__finished = None
 
     def __inst_set(self):
         for inst in [
@@ -60,12 +116,70 @@ class Processor:
             self.__stack
         ]:
             self.inst.update(inst.get_inst())
+            self.__branches.update(inst.branches)
+
+    @classmethod
+    def batch(cls, programs:str | list[str], states:list | None = None,
+              workers:int = BATCH_WORKERS, ordered:bool = True, executor=None,
+              base:Snapshot | None = None, **options) -> Iterator[tuple[int, dict]]:
+        """Run many programs, or one program on many initial states, in
+        parallel. Yields (index, response) pairs, in order unless
+        ordered=False. States are MachineStates, Snapshots or newState-style
+        dicts applied over `base`; options (clock, max_cycles, mode, ...)
+        go to every Processor.
+
+            results = [r for _, r in Processor.batch(programs)]
+        """
+        return run_batch(jobs(programs, states), options, executor, workers, ordered, base)
 
     @property
     def input(self):
         return self.__input
+
+    @property
+    def state(self) -> MachineState:
+        return self.__state
+
+    @property
+    def steps(self) -> int:
+        """Instructions and directives executed by the last run()."""
+        return self.__rt
+
+    @property
+    def checkpoint(self) -> str | None:
+        """Where the last execution failed ("parse", "runtime", ...), None
+        if it has not."""
+        return self.__cp
+
+    @property
+    def tstates(self) -> int:
+        """T-states of the last run(), HLT included."""
+        return self.__tstates
+
+    @property
+    def machine_cycles(self) -> int:
+        return self.__mcycles
+
+    def cycles(self) -> dict:
+        """Instruction, machine-cycle and T-state totals of the last run(),
+        and the time they take at the configured clock."""
+        return {
+            "instructions": self.__rt - self.__directives,
+            "machineCycles": self.__mcycles,
+            "tStates": self.__tstates,
+            "clockMHz": self.__clock,
+            "microseconds": microseconds(self.__tstates, self.__clock),
+        }
     
-    def execute(self):
+    def assemble(self) -> Message | int:
+        """Parse and pass2 the input, reusing a cached assembly if possible."""
+        key = None
+        if assembly_cache.cacheable(self.__state):
+            key = digest(self.__input)
+            cached = assembly_cache.get(key)
+            if cached is not None: # with the line map breakpoints and the profiler use
+                cached.install(self.__state, self.__parser.lines)
+                return 0
 
         result = self.__parser.parse()
 
@@ -77,65 +191,410 @@ class Processor:
         if isinstance(result, Message):
             self.__cp = "assemble/pass2"
             return result
-        
-        stack = self.__pc.get_stack()
-        
+
+        if key is not None:
+            assembly_cache.put(key, self.__pc.get_stack(), self.__parser.lines)
+        return 0
+
+    def execute(self):
+        result = self.__prepare()
+        if isinstance(result, Message):
+            return result
+        return self.run()
+
+    def __prepare(self) -> Message | int:
+        """Assemble the input and, in image mode, load it into memory."""
+        if self.__image and not self.__input.strip():
+            return 0 # whatever image is already loaded in memory
+
+        result = self.assemble()
+        if isinstance(result, Message):
+            return result
+
+        if self.__image:
+            image = Image.assemble(self.__pc.get_stack())
+            if isinstance(image, Message):
+                self.__cp = "image"
+                return image
+            image.load(self.__state)
+            self.__directive_slots = image.directives
+        return 0
+
+    def run(self) -> Message | Hit | int:
+        """Execute the assembled program from the current PC until HLT, or
+        until a breakpoint or watchpoint stops it (returns the Hit).
+
+        In image mode instructions are fetched and decoded from memory
+        instead, so code loaded as bytes or written at run time executes.
+        """
+        result = self.__start()
+        if isinstance(result, Message):
+            return result
+        return self.__execute(sys.maxsize)
+
+    def resume(self) -> Message | Hit | int:
+        """Continue a run a breakpoint or watchpoint stopped, past the
+        breakpoint it stopped at, to HLT or the next hit."""
+        if self.__program is None:
+            return self.run()
+        self.__hit = None
+        return self.__execute(sys.maxsize)
+
+    @property
+    def hit(self) -> Hit | None:
+        """The breakpoint or watchpoint that stopped the last run() or
+        step(), None if none did."""
+        return self.__hit
+
+    def set_breakpoints(self, breakpoints:Breakpoints | None) -> Message | None:
+        """Replace the breakpoints and watchpoints, also in the middle of a
+        run: they apply from the next instruction on."""
+        previous, self.__breakpoints = self.__breakpoints, breakpoints
+        self.__cache = self.__cache and breakpoints is None
+        if self.__plain is None: # not started; run() arms them
+            return None
+        result = self.__arm()
+        if isinstance(result, Message): # keep the ones that worked
+            self.__breakpoints = previous
+            self.__arm()
+        if self.__armed is not None: # already at this instruction
+            self.__armed.skip(self.__state.registers['PC'])
+        return result
+
+    def stream(self) -> Generator[Step, None, dict]:
+        """Generator form of execute(). Assembles at once, then the
+        generator yields a Step with what changed after every instruction
+        and returns the as_dict() response without newState. If assembling
+        failed (see checkpoint) it returns right away. Closing it early
+        leaves the state mid-run."""
+        result = self.__prepare()
+        if not isinstance(result, Message):
+            result = self.__start()
+        if isinstance(result, Message):
+            return self.__failed(result)
+        return self.__steps()
+
+    def __failed(self, result:Message) -> Generator[Step, None, dict]:
+        return self.__response(result, state=False)
+        yield
+
+    def __steps(self) -> Generator[Step, None, dict]:
+        state = self.__state
+        registers = state.registers
         while True:
+            pc = registers['PC']
+            decoded = self.__program[pc]
+            before = Before(state, decoded)
+            result = self.__execute(self.__rt + 1)
+            if isinstance(result, Hit):
+                # a watchpoint stops after its instruction, a breakpoint before
+                yield before.step(pc, decoded) if result.kind == 'watchpoint' else None
+                continue
+            if result is None or result == 0: # stepped, or ran HLT
+                yield before.step(pc, decoded)
+            if result is not None:
+                return self.__response(result, state=False)
 
-            if self.__rt > RUNTIME:
-                self.__cp = "runtime"
-                return Message("Runtime exceeded")
-
-            try: # Handle No Return cases
-                pc = self.__register['PC']
-                inst , *code = stack[pc]
-                info(f"{pc} {inst} {code}")
-            
-            except KeyError:
-                self.__cp = "infinite_loop"
-                return Message('Infinite Loop Detected. No return instruction found!')
-            
-            else:
-                inst , *code = stack[pc]
+    @property
+    def position(self) -> int:
+        """Instructions run by step(), less those taken back."""
+        return len(self.__history) if self.__history is not None else 0
 
-                if inst == 'HLT':
-                    break
+    @property
+    def history(self) -> History | None:
+        return self.__history
+
+    @property
+    def finished(self) -> dict | None:
+        """The response, without newState, once step() has run to the end."""
+        return self.__finished
+
+    def step(self, count:int = 1) -> Frame:
+        """Execute up to `count` instructions (assembling on the first call),
+        recording what each overwrote so back() and seek() can undo it.
+        Returns the changes; `finished` is set when the run ends, and the
+        frame's `hit` when a breakpoint or watchpoint stops it early."""
+        if self.__stepper is None:
+            self.__history = History()
+            self.__stepper = self.stream()
+            if self.__cp is not None: # did not assemble
+                self.__advance()
+        frame = Frame()
+        history, state = self.__history, self.__state
+        while frame.steps < count and self.__finished is None:
+            counters = Counters(self.__rt, self.__tstates, self.__mcycles, self.__directives)
+            origin = state.origin
+            if history.due():
+                history.checkpoint(state, counters)
+            self.__hit = None
+            step = self.__advance()
+            if step is not None:
+                history.record(step, counters, origin if state.origin != origin else None)
+                frame.add(step)
+                if step.decoded.inst == 'HLT':
+                    self.__advance() # collects the response
+            elif self.__hit is None:
+                break
+            if self.__hit is not None:
+                frame.hit = self.__hit
+                break
+        return frame
+
+    def back(self, count:int = 1) -> Frame:
+        """Undo up to `count` steps. Returns the values now in whatever the
+        undone steps had overwritten."""
+        touched = Undone(set(), set(), set(), set())
+        history = self.__history
+        undone = 0
+        while history is not None and undone < count and len(history):
+            self.__count(*history.undo(self.__state, touched))
+            undone += 1
+        if undone:
+            self.__resume()
+        frame = Frame()
+        frame.touch(self.__state, touched)
+        return frame
+
+    def seek(self, index:int) -> Frame:
+        """Go to the state after `index` steps: forward by stepping, back by
+        undoing or, when closer, from the nearest checkpoint onwards."""
+        position = self.position
+        if index >= position:
+            return self.step(index - position)
+        checkpoint = self.__history.nearest(index)
+        if checkpoint is None or position - index <= index - checkpoint.position:
+            return self.back(position - index)
+
+        touched = Undone(set(), set(), set(), set())
+        self.__history.touched(checkpoint.position, touched)
+        self.__history.truncate(checkpoint.position)
+        self.__state.restore(checkpoint.snapshot)
+        self.__count(*checkpoint.counters)
+        self.__resume()
+        frame = self.step(index - checkpoint.position)
+        frame.touch(self.__state, touched)
+        return frame
+
+    def __advance(self) -> Step | None:
+        try:
+            return next(self.__stepper)
+        except StopIteration as stop:
+            self.__finished = stop.value
+            return None
+
+    def __resume(self):
+        self.__cp = None
+        self.__finished = None
+        self.__hit = None
+        self.__stepper = self.__steps()
+        if self.__armed is not None: # moved here by hand: run from it
+            self.__armed.skip(self.__state.registers['PC'])
+
+    def __start(self) -> Message | None:
+        self.__armed = None # it wrapped the previous program
+        if self.__image:
+            self.__plain = ImageProgram(self.__state.memory, opcode_table(self.__dispatch, self.__branches),
+                                        directive_slots(self.__directive_slots, self.__dispatch))
+        else:
+            self.__plain = predecode(self.__pc.get_stack(), self.__dispatch, self.__branches)
+        self.__program = self.__plain
+        self.__hit = None
+        self.__count(0, 0, 0, 0)
+        result = self.__arm()
+        if isinstance(result, Message):
+            self.__cp = "breakpoints"
+        return result
+
+    def __arm(self) -> Message | None:
+        """Wrap the program's handlers at breakpoints and watched writes."""
+        if self.__armed is not None and not self.__image:
+            self.__armed.disarm(self.__plain)
+        self.__armed = None
+        self.__program = self.__plain
+        if not self.__breakpoints:
+            return None
+        armed = self.__breakpoints.arm(self.__state, self.__parser.lines,
+                                       None if self.__image else self.__plain)
+        if isinstance(armed, Message):
+            return armed
+        self.__armed = armed
+        self.__program = ArmedImage(self.__plain, armed) if self.__image else armed.program(self.__plain, self.__parser.lines)
+        return None
+
+    def __execute(self, stop:int) -> Message | Hit | int | None:
+        """Run the loaded program until HLT, an error, a breakpoint or
+        watchpoint, or `stop` instructions in total; None when stopped, to
+        be resumed by the next call."""
+        program = self.__program
+        register = self.__state.registers
+        flags = self.__state.flags
+        runtime = self.__runtime
+        trace = self.tracer.record if self.tracer else None
+        profile = self.profiler.record if self.profiler else None
+        max_cycles = self.__max_cycles or sys.maxsize
+        limit = min(runtime + 1, stop)
+        rt, tstates, mcycles, directives = self.__rt, self.__tstates, self.__mcycles, self.__directives
+
+        try:
+            while True:
+
+                if rt >= limit:
+                    self.__count(rt, tstates, mcycles, directives)
+                    if rt <= runtime:
+                        return None
+                    self.__cp = "runtime"
+                    return self.__fail(Message("Runtime exceeded"))
 
-                self.inst[inst]( *code )
+                if tstates > max_cycles:
+                    self.__count(rt, tstates, mcycles, directives)
+                    self.__cp = "cycles"
+                    return self.__fail(Message(f"Cycle limit exceeded ({self.__max_cycles} T-states)"))
 
-                if isinstance(self.inst[inst].__self__, Branch):
-                    self.__rt += 1
-                    info(f"{pc} {inst} {code}")
-                    continue
+                pc = register['PC']
+                decoded = program[pc]
+                if decoded is None: # Handle No Return cases
+                    self.__count(rt, tstates, mcycles, directives)
+                    if self.__image:
+                        self.__cp = "decode"
+                        return self.__fail(Message(f'Undefined opcode {self.__state.memory[pc]:02X}H at {pc:04X}H'))
+                    self.__cp = "infinite_loop"
+                    return self.__fail(Message('Infinite Loop Detected. No return instruction found!'))
 
+                inst, handler, args, length, branch, t, m, taken, operands = decoded
+                if trace is not None:
+                    trace((pc, inst, operands + args))
+
+                tstates += t
+                mcycles += m
+                if handler is None: # HLT
+                    break
+
+                if profile is None:
+                    handler(*args)
                 else:
-                    inr = INSTRUCTION[inst]['byte']
-                    self.__register['PC'] = operate(self.__register['PC'], inr, bit=4)                
-                self.__rt += 1
-            
-            info(f"{pc} {inst} {code}")
-        
-        self.__rt = 0
+                    start = perf_counter()
+                    handler(*args)
+                    profile(pc, length, perf_counter() - start)
+
+                if not branch:
+                    register['PC'] = (pc + length) & 0xFFFF
+                    if not m: # ORG, DB
+                        directives += 1
+                elif taken is not None and flags[taken[2]] == taken[3]:
+                    tstates += taken[0]
+                    mcycles += taken[1]
+                rt += 1
+        except Break as broken:
+            # raised from handler(*args): a breakpoint before running it, a
+            # watchpoint after
+            if broken.hit.kind == 'breakpoint':
+                tstates -= t
+                mcycles -= m
+            else:
+                if not branch:
+                    register['PC'] = (pc + length) & 0xFFFF
+                    if not m:
+                        directives += 1
+                elif taken is not None and flags[taken[2]] == taken[3]:
+                    tstates += taken[0]
+                    mcycles += taken[1]
+                rt += 1
+            self.__count(rt, tstates, mcycles, directives)
+            self.__hit = broken.hit
+            return broken.hit
+
+        self.__count(rt, tstates, mcycles, directives)
         return 0
 
-    def as_dict(self) -> dict:
-        result = self.execute()
+    def __count(self, rt:int, tstates:int, mcycles:int, directives:int):
+        self.__rt = rt
+        self.__tstates = tstates
+        self.__mcycles = mcycles
+        self.__directives = directives
+
+    def __fail(self, message:Message) -> Message:
+        if self.tracer:
+            self.tracer.dump(f"execute/{self.__cp}: {message}")
+        return message
+
+    def as_dict(self, base:Version | None = None) -> dict:
+        """Run the program and return the response, memoized on (source, state).
+
+        Given the base Version a client holds, a successful response carries
+        a "delta" against it instead of the full "newState". Delta responses
+        are served from the result cache but not stored in it.
+        """
+        if not self.__cache:
+            return self.__as_dict(base)
+
+        key = result_cache.key(self.__input, self.__state, self.__runtime,
+                               self.__clock, self.__max_cycles, self.__image)
+        cached = result_cache.get(key, self.__state)
+        if cached is not None:
+            cached, (counters, self.__cp) = cached
+            self.__count(*counters)
+            if base is not None and "newState" in cached:
+                cached = {k: v for k, v in cached.items() if k != "newState"}
+                cached["delta"] = diff(base, self.__state)
+            return cached
+
+        if base is not None:
+            return self.__as_dict(base)
+        result = self.__as_dict()
+        counters = (self.__rt, self.__tstates, self.__mcycles, self.__directives)
+        result_cache.put(key, result, self.__state, (counters, self.__cp))
+        return result
+
+    def new_state(self) -> dict:
+        """Registers, flags and non-zero memory, as in the execute response."""
+        return {
+            "registers": self.__register.get_all(),
+            "flags": self.__flag.get_all(),
+            "memory": self.__memory.get_all()
+        }
+
+    def profile(self) -> dict | None:
+        """Hot-spot report of the last run(), if profiling."""
+        if self.profiler is None:
+            return None
+        return self.profiler.report(self.__pc.get_stack(), self.__parser.lines)
+
+    def __as_dict(self, base:Version | None = None) -> dict:
+        response = self.__response(self.execute(), state=base is None)
+        if base is not None and response["success"]:
+            response["delta"] = diff(base, self.__state)
+        return response
+
+    def __response(self, result:Message | Hit | int, state:bool = True) -> dict:
         if isinstance(result, Message):
-            return {
+            response = {
                 "success": False,
                 "checkpoint": f"execute/{self.__cp}",
                 "error": result.as_dict()
             }
-        return {
-            "success": True,
-            "checkpoint": "execute",
-            "newState": {
-                "registers": self.__register.get_all(),
-                "flags": self.__flag.get_all(),
-                "memory": self.__memory.get_all()
+            if self.__cp not in ("parse", "assemble/pass2", "image", "breakpoints"): # it ran
+                response["cycles"] = self.cycles()
+        elif isinstance(result, Hit):
+            response = {
+                "success": True,
+                "checkpoint": "execute/break",
+                "break": result.as_dict(),
+                "cycles": self.cycles()
             }
-        }
+            if state:
+                response["newState"] = self.new_state()
+        else:
+            response = {
+                "success": True,
+                "checkpoint": "execute",
+                "cycles": self.cycles()
+            }
+            if state:
+                response["newState"] = self.new_state()
+        if self.profiler is not None:
+            response["profile"] = self.profile()
+        return response
 
 __all__ = [
-    "Processor","Memory","Register","Flag","Message", "Assembler","stack"
+    "Processor","MachineState","Snapshot","Breakpoints","Breakpoint","Watchpoint","Hit","Memory","Register","Flag","Message", "Assembler"
 ]
\ No newline at end of file
@@ -1,184 +1,79 @@
-"""Arithmetic instructions: ADD, ADC, ADI, SUB, SBB, SUI, SBI, INR, DCR, INX, DCX, DAD, DAA."""
+"""Arithmetic instructions: ADD, ADC, ADI, ACI, SUB, SBB, SUI, SBI, INR, DCR, INX, DCX, DAD, DAA."""
 
 from ._base import Instruction
-from ._utils import decode, operate
+from ._dispatch import Dispatch
 from ._memory import *
 
 class Arithmetic(Instruction):
     """Implements 8085 arithmetic operations. All operations update flags."""
 
-    def __init__(self):
-        self._memory:Memory = Memory()
-        self._register:Register = Register()
-        self._flag:Flag = Flag()
+    def __init__(self, state:MachineState):
+        self._register:Register = Register(state)
+        self._flag:Flag = Flag(state)
+        self._forms = Dispatch(state, {})
 
     def __add(self,r:str):
-        if r == 'M':
-            op2 = self._memory[decode_rp()]
-        else:
-            op2 = self._register[r]
-
-        result = operate(self._register['A'], op2)
-        self._register['A'] = encode(decode(result) & 0xFF)
-
-        check_carry(result)
-        check_aux_carry(self._register['A'], op2)
-        check_sign(self._register['A'])
-        check_parity(self._register['A']) 
-        check_zero(self._register['A']) 
+        self._form('ADD', r)()
 
     def __adc(self,r:str):
-        if r == 'M':
-            op2 = self._memory[decode_rp()]
-        else:
-            op2 = self._register[r]
-        
-        result = operate(self._register['A'], op2, flag=self._flag['C'])
-        self._register['A'] = encode(decode(result) & 0xFF)
-
-        check_carry(result)
-        check_aux_carry(self._register['A'], op2)
-        check_sign(self._register['A'])
-        check_parity(self._register['A']) 
-        check_zero(self._register['A'])                
-        
-    def __adi(self,data:str):
-        result = operate(self._register['A'], data, flag=self._flag['C'])
-        self._register['A'] = encode(decode(result) & 0xFF)
-
-        check_carry(result)
-        check_aux_carry(self._register['A'], data)
-        check_sign(self._register['A'])
-        check_parity(self._register['A']) 
-        check_zero(self._register['A'])  
-    
-    def __dad(self,rp:str):
-        result = operate(self._memory[decode_rp()], self._memory[decode_rp(rp)])
-        self._memory[decode_rp()] = encode(decode(result) & 0xFFFF, bit=4)
-        check_carry(result, bit=4)
+        self._form('ADC', r)()
 
-    def __sub(self,r:str):
+    def __adi(self,data:int):
+        self._form('ADI')(data)
 
-        if r == 'M':
-            complement = ( (~decode(self._memory[decode_rp()]) + 1) & 0xFF ) # ~B + 1 = 2's complement; & 0xFF to keep it within 8 bits 
+    def __aci(self,data:int):
+        self._form('ACI')(data)
 
-        else:
-            complement = ( (~decode(self._register[r]) + 1) & 0xFF ) # ~B + 1 = 2's complement; & 0xFF to keep it within 8 bits
-
-        result = operate(self._register['A'], encode(complement))
-        self._register['A'] = encode(decode(result) & 0xFF)
+    def __dad(self,rp:str):
+        self._form('DAD', rp)()
 
-        check_carry(result)
-        check_aux_carry(self._register['A'], encode(complement))
-        check_parity(self._register['A'])
-        check_zero(self._register['A'])
-        check_sign(self._register['A'])  
+    def __sub(self,r:str):
+        self._form('SUB', r)()
 
     def __sbb(self,r:str):
+        self._form('SBB', r)()
 
-        if r == 'M':
-            complement = ( (~decode(self._memory[decode_rp()]) + 1) & 0xFF ) # ~B + 1 = 2's complement; & 0xFF to keep it within 8 bits
-        else:
-            complement = ( (~decode(self._register[r]) + 1) & 0xFF ) # ~B + 1 = 2's complement; & 0xFF to keep it within 8 bits
-
-        result = operate(self._register['A'], encode(complement), flag=self._flag['C'])
-        self._register['A'] = encode(decode(result) & 0xFF)
-        check_carry(result)
-        check_aux_carry(self._register['A'], encode(complement))
-        check_parity(self._register['A'])  
-        check_zero(self._register['A'])  
-        check_sign(self._register['A'])  
-
-    def __sui(self,data:str):
-        complement = ( (~decode(data) + 1) & 0xFF ) # ~B + 1 = 2's complement; & 0xFF to keep it within 8 bits
-        result = operate(self._register['A'], encode(complement))
-        self._register['A'] = encode(decode(result) & 0xFF)
-        
-        check_carry(result)
-        check_aux_carry(self._register['A'], encode(complement))
-        check_parity(self._register['A'])  
-        check_zero(self._register['A'])  
-        check_sign(self._register['A'])  
-    
-    def __sbi(self,data:str):
-        operand = (decode(data) + self._flag['C']) & 0xFF
-        complement = ( ~(operand) + 1 ) & 0xFF  # ~B + 1 = 2's complement; & 0xFF to keep it within 8 bits
-        
-        result = operate(self._register['A'], encode(complement))
-        self._register['A'] = encode(decode(result) & 0xFF)
-
-        check_carry(result)
-        check_aux_carry(self._register['A'], encode(complement))
-        check_parity(self._register['A'])
-        check_zero(self._register['A']) 
-        check_sign(self._register['A']) 
+    def __sui(self,data:int):
+        self._form('SUI')(data)
+
+    def __sbi(self,data:int):
+        self._form('SBI')(data)
 
     def __inr(self,r:str):
+        self._form('INR', r)()
 
-        if r == 'M':
-            result = operate(self._memory[decode_rp()], '01H') # Adding 0xFF is equivalent to subtracting 1
-            masked = encode(decode(result) & 0xFF) # 8-bit masking
-            encode_rp(masked)
-            check_aux_carry(self._memory[decode_rp()], '01H')
-        
-        else:
-            result = operate(self._register[r], '01H') # Adding 0xFF is equivalent to subtracting 1
-            masked = encode(decode(result) & 0xFF) # 8-bit masking
-            self._register[r] = masked
-            check_aux_carry(self._register[r], '01H')
-        
-        check_parity(masked)
-        check_zero(masked)
-        check_sign(masked)
-    
     def __inx(self,rp:str):
-        value = operate(decode_rp(rp), 1, bit=4)
-        encode_rp(value, rp=rp)
-             
+        self._form('INX', rp)()
+
     def __dcx(self,rp:str):
-        value = operate(self._memory[decode_rp(rp)], 'FFFFH', bit=4)
-        encode_rp(value,rp=rp)
+        self._form('DCX', rp)()
 
     def __dcr(self,r:str):
+        self._form('DCR', r)()
 
-        if r == 'M':
-            result = operate(self._memory[decode_rp()], 'FFH') # Adding 0xFF is equivalent to subtracting 1
-            masked = encode(decode(result) & 0xFF) # 8-bit masking
-            encode_rp(masked)
-            check_aux_carry(self._memory[decode_rp()], 'FFH')
-        
-        else:
-            result = operate(self._register[r], 'FFH') # Adding 0xFF is equivalent to subtracting 1
-            masked = encode(decode(result) & 0xFF) # 8-bit masking
-            self._register[r] = masked
-            check_aux_carry(self._register[r], 'FFH')
-        
-        check_parity(masked)
-        check_zero(masked) 
-        check_sign(masked)
-        
     def __daa(self):
-        num = decode(self._register['A'])
+        num = self._register['A']
+        carry = self._flag['C']
 
         if (num & 0x0F) > 9 or self._flag['AC'] == 1:
+            self._flag['AC'] = (num & 0x0F) + 0x06 > 0x0F
             num += 0x06
-            self._flag['AC'] = 1
 
         # Upper nibble adjustment
-        if (num >> 4) > 9 or self._flag['CY'] == 1:
+        if (num >> 4) > 9 or carry == 1:
             num += 0x60
-            self._flag['CY'] = 1
-        
-        self._register['A'] = encode(num & 0xFF)
-        check_sign(self._register['A'])
-        check_parity(self._register['A'])
-        check_zero(self._register['A'])
+            carry = 1
+
+        self._register['A'] = num & 0xFF
+        self._flag['C'] = carry
+        self._flag.check_szp(num & 0xFF)
 
     def get_inst(self):
         return {
             'ADD':self.__add,
             'ADI':self.__adi,
             'ADC':self.__adc,
+            'ACI':self.__aci,
             'SUB':self.__sub,
             'SUI':self.__sui,
             'SBB':self.__sbb,
@@ -189,8 +84,4 @@ class Arithmetic(Instruction):
             'DCX':self.__dcx,
             'DAD':self.__dad,
             'DAA':self.__daa,
-            'INR':self.__inr,
-            'INX':self.__inx,
-            'DCR':self.__dcr,
-            'DCX':self.__dcx,
-        }    
+        }
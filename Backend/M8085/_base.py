@@ -2,15 +2,28 @@
 
 from abc import ABC, abstractmethod
 from typing import Dict, Callable
-from .logs import setup_logger, error
-setup_logger()
+from .logs import error
+from ._dispatch import Dispatch
 
 class Instruction(ABC):
     """Abstract base class that all instruction categories must inherit from.
     
     Provides dictionary-style access to instruction methods via __getitem__.
     Subclasses must implement get_inst() to return their instruction mapping.
+    Mnemonics listed in `branches` update PC themselves; the processor only
+    advances PC past the other instructions.
+
+    Mnemonics the dispatcher specializes (_dispatch.SPECIALIZED) are written
+    once, as its closures; their handlers here only call them through
+    `_form`, so both paths run the same code.
     """
+
+    branches: frozenset[str] = frozenset()
+    _forms: Dispatch # set by subclasses: Dispatch(state, {})
+
+    def _form(self, inst:str, *operands:str) -> Callable:
+        """The specialized handler for one form of `inst`, e.g. ('MOV', 'B', 'C')."""
+        return self._forms.handler(inst, operands)
     
     def __getitem__(self, key: str) -> Callable | None:
         try:
@@ -0,0 +1,146 @@
+"""Batch execution: many programs, or one program on many initial states.
+
+A batch is split into chunks and the chunks run on a process pool, so a
+grading run of hundreds of submissions pays for one request and one pool
+instead of one round-trip per program, and uses every core. Each worker
+keeps its own assembly cache, so one program run on many states is parsed
+once per worker.
+
+Initial states use the newState layout of /api/execute responses:
+{"registers": {"A": "05H"}, "flags": {"Z": 1}, "memory": {"C000H": "12H"}},
+where two-digit memory keys ("01H") are I/O ports. Anything left out
+starts at zero, or as in the batch's base Snapshot if there is one, so
+many cases can share preloaded data without re-running its setup code.
+
+Configuration (environment):
+    M8085_BATCH_WORKERS   processes for Processor.batch() (default: CPU count)
+"""
+
+import math
+import multiprocessing
+import os
+import re
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator
+
+from ._utils import Message, decode
+from ._memory import MachineState, Snapshot, REGISTERS, FLAGS
+
+BATCH_WORKERS = int(os.getenv('M8085_BATCH_WORKERS', str(os.cpu_count() or 1)))
+CHUNKS_PER_WORKER = 4 # more chunks stream sooner, fewer cost less IPC
+
+_HEX = re.compile(r'^[0-9A-Fa-f]{1,4}[Hh]$')
+
+Job = tuple[str, 'MachineState | Snapshot | dict | None']
+
+def initial_state(spec:MachineState | Snapshot | dict | None,
+                  base:Snapshot | None = None) -> MachineState | Message:
+    """Build a MachineState from a newState-style dict, over `base`."""
+    if isinstance(spec, MachineState):
+        return spec
+    if isinstance(spec, Snapshot):
+        return spec.state()
+
+    if base is not None:
+        state = base.state()
+        state.stack.clear() # the base's program; each job assembles its own
+    else:
+        state = MachineState()
+    if spec is None:
+        return state
+    for name, value in (spec.get('registers') or {}).items():
+        if name not in REGISTERS or not _HEX.match(str(value)):
+            return Message('Invalid initial register', name, line=f'{name}={value}', tag='r')
+        limit = 0xFFFF if name in ('PC', 'SP') else 0xFF
+        state.registers[name] = decode(value) & limit
+    for name, value in (spec.get('flags') or {}).items():
+        if name not in FLAGS:
+            return Message('Invalid initial flag', name, line=f'{name}={value}')
+        state.flags[name] = 1 if value else 0
+    for address, value in (spec.get('memory') or {}).items():
+        if not (_HEX.match(str(address)) and _HEX.match(str(value))):
+            return Message('Invalid initial memory', line=f'{address}={value}', tag='m:16')
+        if len(address) <= 3: # "01H" is a port, as in Memory.get_all()
+            state.ports[decode(address) & 0xFF] = decode(value) & 0xFF
+        else:
+            state.memory[decode(address)] = decode(value) & 0xFF
+    return state
+
+def jobs(programs:str | Iterable[str], states:Iterable | None = None) -> list[Job]:
+    """Pair programs with initial states.
+
+    One program and many states runs the program on each state; many
+    programs and no states runs each on a fresh state; many of both are
+    zipped and must be the same length.
+    """
+    if isinstance(programs, str):
+        states = list(states) if states is not None else [None]
+        return [(programs, state) for state in states]
+    programs = list(programs)
+    if states is None:
+        return [(code, None) for code in programs]
+    states = list(states)
+    if len(states) != len(programs):
+        raise ValueError(f'{len(programs)} programs but {len(states)} states')
+    return list(zip(programs, states))
+
+def chunks(batch:list[Job], workers:int) -> list[list[tuple[int, Job]]]:
+    """Split an indexed batch into about CHUNKS_PER_WORKER chunks per worker."""
+    size = max(1, math.ceil(len(batch) / (max(1, workers) * CHUNKS_PER_WORKER)))
+    indexed = list(enumerate(batch))
+    return [indexed[i:i + size] for i in range(0, len(indexed), size)]
+
+def run_chunk(chunk:list[tuple[int, Job]], options:dict,
+              base:Snapshot | None = None) -> list[tuple[int, dict]]:
+    """Worker entry point: run each job on its own state."""
+    from . import Processor
+    results = []
+    for index, (code, spec) in chunk:
+        state = initial_state(spec, base)
+        if isinstance(state, Message):
+            results.append((index, {
+                'success': False,
+                'checkpoint': 'execute/state',
+                'error': state.as_dict()
+            }))
+            continue
+        results.append((index, Processor(code, state, **options).as_dict()))
+    return results
+
+def pool(workers:int = BATCH_WORKERS) -> ProcessPoolExecutor:
+    """A process pool for batches, with M8085 imported in every worker."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_warm,
+    )
+
+def _warm():
+    import M8085  # noqa: F401
+
+def run_batch(batch:list[Job], options:dict | None = None, executor:Executor | None = None,
+              workers:int = BATCH_WORKERS, ordered:bool = True,
+              base:Snapshot | None = None) -> Iterator[tuple[int, dict]]:
+    """Run a batch, yielding (index, response) pairs.
+
+    ordered=False yields each chunk as soon as it finishes. Without an
+    executor a pool of `workers` processes is started for this batch (a
+    batch that fits one chunk just runs here).
+    """
+    options = options or {}
+    if executor is None:
+        if workers <= 1 or len(batch) <= 1:
+            yield from run_chunk(list(enumerate(batch)), options, base)
+            return
+        with pool(min(workers, len(batch))) as executor:
+            yield from run_batch(batch, options, executor, workers, ordered, base)
+        return
+
+    futures: list[Future] = [executor.submit(run_chunk, chunk, options, base)
+                             for chunk in chunks(batch, workers)]
+    try:
+        for future in (futures if ordered else as_completed(futures)):
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
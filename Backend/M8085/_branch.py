@@ -1,8 +1,8 @@
 """Branch instructions: JMP, Jcc, CALL, Ccc, RET, Rcc (conditional jumps/calls/returns)."""
 
 from ._base import Instruction
-from ._memory import Register, Flag
-from ._utils import operate
+from ._dispatch import Dispatch
+from ._memory import MachineState, Register, Flag
 
 class Branch(Instruction):
     """Implements jump, call, and return instructions with conditional variants.
@@ -10,121 +10,125 @@ class Branch(Instruction):
     Conditions: C (carry), Z (zero), S (sign/minus), P (parity)
     """
     
-    def __init__(self):
-        self._register = Register()
-        self._flag = Flag()
+    @property
+    def branches(self) -> frozenset[str]:
+        return frozenset(self.get_inst())
 
-    def __jmp(self,address:str):
-        self._register['PC'] = address
+    def __init__(self, state:MachineState):
+        self._register = Register(state)
+        self._flag = Flag(state)
+        self._forms = Dispatch(state, {})
 
-    def __jc(self,address:str):
-        if self._flag['C'] == 1: self._register['PC'] = address
-        else: self._register['PC'] = operate(self._register['PC'], 3, bit=4)
+    def __jmp(self,address:int):
+        self._form('JMP')(address)
 
-    def __jnc(self,address:str):
-        if self._flag['C'] == 0: self._register['PC'] = address
-        else: self._register['PC'] = operate(self._register['PC'], 3, bit=4)
+    def __jc(self,address:int):
+        self._form('JC')(address)
+
+    def __jnc(self,address:int):
+        self._form('JNC')(address)
     
-    def __jz(self,address:str):
-        if self._flag['Z'] == 1: self._register['PC'] = address
-        else: self._register['PC'] = operate(self._register['PC'], 3, bit=4)
+    def __jz(self,address:int):
+        self._form('JZ')(address)
 
-    def __jnz(self,address:str):
-        if self._flag['Z'] == 0: self._register['PC'] = address
-        else: self._register['PC'] = operate(self._register['PC'], 3, bit=4)
-    def __jp(self,address:str):
-        if self._flag['S'] == 0: self._register['PC'] = address
-        else: self._register['PC'] = operate(self._register['PC'], 3, bit=4)
+    def __jnz(self,address:int):
+        self._form('JNZ')(address)
+    def __jp(self,address:int):
+        self._form('JP')(address)
 
-    def __jm(self,address:str):
-        if self._flag['S'] == 1: self._register['PC'] = address
-        else: self._register['PC'] = operate(self._register['PC'], 3, bit=4)
-    
-    def __jpe(self,address:str):
-        if self._flag['P'] == 1: self._register['PC'] = address
-        else: self._register['PC'] = operate(self._register['PC'], 3, bit=4)
-    def __jpo(self,address:str):
-        if self._flag['P'] == 0: self._register['PC'] = address
-        else: self._register['PC'] = operate(self._register['PC'], 3, bit=4)
+    def __jm(self,address:int):
+        self._form('JM')(address)
+    
+    def __jpe(self,address:int):
+        self._form('JPE')(address)
+    def __jpo(self,address:int):
+        self._form('JPO')(address)
 
-    def __call(self,address:str):
-        self._register['SP'] = operate(self._register['PC'], 3, bit=4)
-        self._register['PC'] = address
+    def __call(self,address:int):
+        self._form('CALL')(address)
     
-    def __cc(self,address:str):
+    def __cc(self,address:int):
         if self._flag['C'] == 1:
-            self._register['SP'] = operate(self._register['PC'], 3, bit=4)
-            self._register['PC'] = address
+            self.__call(address)
+        else: self._register['PC'] = (self._register['PC'] + 3) & 0xFFFF
 
-    def __cnc(self,address:str):
+    def __cnc(self,address:int):
         if self._flag['C'] == 0:
-            self._register['SP'] = operate(self._register['PC'], 3, bit=4)
-            self._register['PC'] = address
+            self.__call(address)
+        else: self._register['PC'] = (self._register['PC'] + 3) & 0xFFFF
 
-    def __cz(self,address:str):
+    def __cz(self,address:int):
         if self._flag['Z'] == 1:
-            self._register['SP'] = operate(self._register['PC'], 3, bit=4)
-            self._register['PC'] = address
+            self.__call(address)
+        else: self._register['PC'] = (self._register['PC'] + 3) & 0xFFFF
     
-    def __cnz(self,address:str):
+    def __cnz(self,address:int):
         if self._flag['Z'] == 0:
-            self._register['SP'] = operate(self._register['PC'], 3, bit=4)
-            self._register['PC'] = address
+            self.__call(address)
+        else: self._register['PC'] = (self._register['PC'] + 3) & 0xFFFF
 
-    def __cp(self,address:str):
+    def __cp(self,address:int):
         if self._flag['S'] == 0:
-            self._register['SP'] = operate(self._register['PC'], 3, bit=4)
-            self._register['PC'] = address
+            self.__call(address)
+        else: self._register['PC'] = (self._register['PC'] + 3) & 0xFFFF
 
-    def __cm(self,address:str):
+    def __cm(self,address:int):
         if self._flag['S'] == 1:
-            self._register['SP'] = operate(self._register['PC'], 3, bit=4)
-            self._register['PC'] = address
+            self.__call(address)
+        else: self._register['PC'] = (self._register['PC'] + 3) & 0xFFFF
 
-    def __cpe(self,address:str):
+    def __cpe(self,address:int):
         if self._flag['P'] == 1:
-            self._register['SP'] = operate(self._register['PC'], 3, bit=4)
-            self._register['PC'] = address
+            self.__call(address)
+        else: self._register['PC'] = (self._register['PC'] + 3) & 0xFFFF
     
-    def __cpo(self,address:str):
+    def __cpo(self,address:int):
         if self._flag['P'] == 0:
-            self._register['SP'] = operate(self._register['PC'], 3, bit=4)
-            self._register['PC'] = address
+            self.__call(address)
+        else: self._register['PC'] = (self._register['PC'] + 3) & 0xFFFF
     
     def __ret(self):
-        self._register['PC'] = self._register['SP']
+        self._form('RET')()
     
-    def __rcc(self):
+    def __rc(self):
         if self._flag['C'] == 1:
-            self._register['PC'] = self._register['SP']
+            self.__ret()
+        else: self._register['PC'] = (self._register['PC'] + 1) & 0xFFFF
     
     def __rnc(self):
         if self._flag['C'] == 0:
-            self._register['PC'] = self._register['SP']
+            self.__ret()
+        else: self._register['PC'] = (self._register['PC'] + 1) & 0xFFFF
     
     def __rz(self):
         if self._flag['Z'] == 1:
-            self._register['PC'] = self._register['SP']
+            self.__ret()
+        else: self._register['PC'] = (self._register['PC'] + 1) & 0xFFFF
 
     def __rnz(self):
         if self._flag['Z'] == 0:
-            self._register['PC'] = self._register['SP']
+            self.__ret()
+        else: self._register['PC'] = (self._register['PC'] + 1) & 0xFFFF
     
     def __rp(self):
         if self._flag['S'] == 0:
-            self._register['PC'] = self._register['SP']
+            self.__ret()
+        else: self._register['PC'] = (self._register['PC'] + 1) & 0xFFFF
     
     def __rm(self):
         if self._flag['S'] == 1:
-            self._register['PC'] = self._register['SP']
+            self.__ret()
+        else: self._register['PC'] = (self._register['PC'] + 1) & 0xFFFF
     
     def __rpe(self):
         if self._flag['P'] == 1:
-            self._register['PC'] = self._register['SP']
+            self.__ret()
+        else: self._register['PC'] = (self._register['PC'] + 1) & 0xFFFF
     
     def __rpo(self):
         if self._flag['P'] == 0:
-            self._register['PC'] = self._register['SP']
+            self.__ret()
+        else: self._register['PC'] = (self._register['PC'] + 1) & 0xFFFF
     
     def get_inst(self):
         return {
@@ -147,7 +151,7 @@ class Branch(Instruction):
             'CPE': self.__cpe,
             'CPO': self.__cpo,
             'RET': self.__ret,
-            'RCC': self.__rcc,
+            'RC': self.__rc,
             'RNC': self.__rnc,
             'RZ': self.__rz,
             'RNZ': self.__rnz,
@@ -0,0 +1,300 @@
+"""Breakpoints, watchpoints and run-until.
+
+A breakpoint stops a run before the instruction at an address runs. The
+address is given directly, as a label from the assembler's symbol table,
+or as a source line (the first instruction at or after it, which is how
+the editor runs to its cursor). It may carry a condition on registers and
+flags, e.g. "A == 05H && CY == 1", compiled once into a closure.
+
+A watchpoint stops a run after an instruction changes a byte in an
+address range.
+
+Nothing is checked per step. Armed.program() swaps a wrapped handler
+into the predecoded program, in place, only at breakpoint addresses and,
+while watching, at the program's instructions that can write memory;
+disarm() puts the originals back. Everywhere else the execute loop runs
+the same Decoded records as without breakpoints. A wrapper that hits
+raises Break, which the loop catches outside its body.
+Watched addresses are a 64K bitmap, so the check after a write is an
+index per written byte. In image mode instructions are decoded at every
+fetch, so the wrapping happens per fetch too.
+
+Condition names: A B C D E H L SP PC, the pairs BC DE HL, M (the byte at
+HL), and the flags S Z AC P CY. Values are hex with an H suffix or
+decimal; terms are joined with && (or "and").
+"""
+
+import operator
+import re
+from typing import Callable, Iterable, NamedTuple
+
+from ._utils import Message, encode
+from ._memory import MachineState, MEMORY_SIZE
+from ._stream import writes
+
+_COMPARE = {
+    '==': operator.eq, '!=': operator.ne,
+    '<=': operator.le, '>=': operator.ge,
+    '<': operator.lt, '>': operator.gt,
+}
+_TERM = re.compile(r'^\s*([A-Za-z]+)\s*(==|!=|<=|>=|<|>)\s*([0-9A-Fa-f]+[Hh]|\d+)\s*$')
+_JOIN = re.compile(r'&&|\band\b', re.IGNORECASE)
+_PAIRS = {'BC': ('B', 'C'), 'DE': ('D', 'E'), 'HL': ('H', 'L')}
+_FLAG_NAMES = {'S': 'S', 'Z': 'Z', 'AC': 'AC', 'P': 'P', 'CY': 'C'} # C is the register
+_BYTE_REGISTERS = ('A', 'B', 'C', 'D', 'E', 'H', 'L')
+
+Predicate = Callable[[dict, dict, bytearray], bool]
+
+class Breakpoint(NamedTuple):
+    """Where to stop: one of an address (int or "2005H"), a label or a
+    source line; only when `condition` holds, if given."""
+    address: int | str | None = None
+    label: str | None = None
+    line: int | None = None
+    condition: str | None = None
+
+class Watchpoint(NamedTuple):
+    """Stop when a byte from `start` to `end` (inclusive, default `start`)
+    changes."""
+    start: int | str
+    end: int | str | None = None
+
+class Hit(NamedTuple):
+    """What stopped a run. For a breakpoint, pc is where it stopped, before
+    running that instruction; for a watchpoint, the instruction at pc ran
+    and changed `address` from `old` to `value`."""
+    kind: str # "breakpoint" or "watchpoint"
+    pc: int
+    address: int | None = None
+    old: int | None = None
+    value: int | None = None
+
+    def as_dict(self) -> dict:
+        hit = {"type": self.kind, "pc": encode(self.pc, bit=4)}
+        if self.kind == 'watchpoint':
+            hit.update(address=encode(self.address, bit=4), old=encode(self.old), value=encode(self.value))
+        return hit
+
+class Break(Exception):
+    """Raised by a wrapped handler to stop the execute loop."""
+
+    def __init__(self, hit:Hit):
+        super().__init__(hit)
+        self.hit = hit
+
+def _number(value:int | str) -> int | None:
+    if isinstance(value, int):
+        return value
+    value = value.strip()
+    if value[-1:] in ('H', 'h'):
+        try:
+            return int(value[:-1], 16)
+        except ValueError:
+            return None
+    return int(value) if value.isdigit() else None
+
+def _term(name:str, compare:Callable, value:int) -> Predicate | None:
+    name = name.upper()
+    if name in _BYTE_REGISTERS or name in ('SP', 'PC'):
+        return lambda registers, flags, memory: compare(registers[name], value)
+    if name in _PAIRS:
+        high, low = _PAIRS[name]
+        return lambda registers, flags, memory: compare((registers[high] << 8) | registers[low], value)
+    if name == 'M':
+        return lambda registers, flags, memory: compare(memory[(registers['H'] << 8) | registers['L']], value)
+    if name in _FLAG_NAMES:
+        flag = _FLAG_NAMES[name]
+        return lambda registers, flags, memory: compare(flags[flag], value)
+    return None
+
+def condition(text:str) -> Predicate | Message:
+    """Compile a condition into a predicate of (registers, flags, memory)."""
+    terms = []
+    for part in _JOIN.split(text):
+        match = _TERM.match(part)
+        predicate = match and _term(match[1], _COMPARE[match[2]], _number(match[3]))
+        if not predicate:
+            return Message('Invalid breakpoint condition', line=text,
+                           format='A == 05H && CY == 1')
+        terms.append(predicate)
+    if len(terms) == 1:
+        return terms[0]
+    return lambda registers, flags, memory: all(term(registers, flags, memory) for term in terms)
+
+def _spec(kind:type, value):
+    if isinstance(value, kind):
+        return value
+    return kind(**value) if isinstance(value, dict) else kind(*value)
+
+class Breakpoints:
+    """Breakpoints and watchpoints as given, before the program is known.
+    Each may also be a dict or tuple of the fields."""
+
+    def __init__(self, points:Iterable[Breakpoint | dict] = (), watch:Iterable[Watchpoint | dict] = ()):
+        self.points = [_spec(Breakpoint, point) for point in points]
+        self.watch = [_spec(Watchpoint, span) for span in watch]
+
+    def __bool__(self):
+        return bool(self.points or self.watch)
+
+    def arm(self, state:MachineState, lines:dict[int, tuple[int, str]],
+            program:list | None = None) -> 'Armed | Message':
+        """Resolve labels and lines against the assembled program, and
+        compile conditions. `program`, the predecoded list, if any, is used
+        to reject addresses that hold no instruction."""
+        stops: dict[int, list[Predicate | None]] = {}
+        for point in self.points:
+            address = self.__address(point, state.stack, lines)
+            if isinstance(address, Message):
+                return address
+            if program is not None and program[address] is None:
+                where = next(value for value in point[:3] if value is not None)
+                return Message(f'No instruction at {encode(address, bit=4)}', line=str(where))
+            predicate = None
+            if point.condition:
+                predicate = condition(point.condition)
+                if isinstance(predicate, Message):
+                    return predicate
+            stops.setdefault(address, []).append(predicate)
+
+        watched = bytearray(MEMORY_SIZE)
+        spans = []
+        for span in self.watch:
+            start = _number(span.start)
+            end = _number(span.end) if span.end is not None else start
+            if start is None or end is None or not 0 <= start <= end < MEMORY_SIZE:
+                return Message('Invalid watch range', line=f'{span.start}-{span.end}', tag='m:16')
+            watched[start:end + 1] = b'\x01' * (end + 1 - start)
+            spans.append((start, end))
+        return Armed(state, stops, watched, spans)
+
+    @staticmethod
+    def __address(point:Breakpoint, stack:dict, lines:dict) -> int | Message:
+        if point.label is not None:
+            address = stack.get(point.label.upper()) # the parser upper-cases the source
+            if not isinstance(address, str):
+                return Message(f'Label {point.label} not defined', tag='l')
+            return int(address[:-1], 16)
+        if point.line is not None:
+            after = [(lineno, address) for address, (lineno, _) in lines.items() if lineno >= point.line]
+            if not after:
+                return Message(f'No instruction at or after line {point.line}')
+            return min(after)[1]
+        address = _number(point.address) if point.address is not None else None
+        if address is None or not 0 <= address < MEMORY_SIZE:
+            return Message('Invalid breakpoint address', line=str(point.address), tag='m:16')
+        return address
+
+class Armed:
+    """Breakpoints resolved to addresses, ready to wrap a program."""
+
+    def __init__(self, state:MachineState, stops:dict[int, list[Predicate | None]],
+                 watched:bytearray, spans:list[tuple[int, int]]):
+        self.state = state
+        self.stops = stops
+        self.watched = watched
+        self.spans = spans
+        self.skipping = [None] # address whose breakpoint the next instruction passes
+        self.original: dict[int, tuple] = {} # address -> Decoded that program() replaced
+
+    def skip(self, pc:int):
+        """Let the next instruction run even if a breakpoint is at `pc`, as
+        when continuing from one. Only set when `pc` has a breakpoint, so
+        that very instruction clears it."""
+        self.skipping[0] = pc if pc in self.stops else None
+
+    def program(self, program:list, addresses:Iterable[int]) -> list:
+        """Wrap, in place, the handlers a predecoded program needs
+        wrapped. `addresses` are those of its instructions; only they are
+        looked at, and only while watching."""
+        for pc in (addresses if self.spans else self.stops):
+            decoded = program[pc]
+            if decoded is None:
+                continue
+            wrapped = self.wrap(pc, decoded)
+            if wrapped is not decoded:
+                self.original[pc] = decoded
+                program[pc] = wrapped
+        return program
+
+    def disarm(self, program:list):
+        """Put back what program() replaced."""
+        for pc, decoded in self.original.items():
+            program[pc] = decoded
+        self.original.clear()
+
+    def wrap(self, pc:int, decoded:tuple) -> tuple:
+        handler = decoded.handler
+        if handler is None: # HLT ends the run anyway
+            return decoded
+        if self.spans and _may_write(decoded):
+            handler = self.__watch(pc, decoded, handler)
+        if pc in self.stops:
+            handler = self.__stop(pc, self.stops[pc], handler)
+        return decoded if handler is decoded.handler else decoded._replace(handler=handler)
+
+    def __stop(self, pc:int, predicates:list, handler:Callable) -> Callable:
+        state, skipping = self.state, self.skipping
+        registers, flags, memory = state.registers, state.flags, state.memory
+        always = None in predicates
+        def stop(*args):
+            if skipping[0] == pc:
+                skipping[0] = None
+            elif always or any(test(registers, flags, memory) for test in predicates):
+                skipping[0] = pc
+                raise Break(Hit('breakpoint', pc))
+            handler(*args)
+        return stop
+
+    def __watch(self, pc:int, decoded:tuple, handler:Callable) -> Callable:
+        state, watched = self.state, self.watched
+        registers, memory = state.registers, state.memory
+        if decoded.inst in ('STA', 'SHLD'): # the address is the operand
+            addresses = [address for address in writes(decoded, registers) if watched[address]]
+            if not addresses:
+                return handler
+            def write(*args):
+                old = [memory[address] for address in addresses]
+                handler(*args)
+                for address, value in zip(addresses, old):
+                    if memory[address] != value:
+                        raise Break(Hit('watchpoint', pc, address, value, memory[address]))
+            return write
+
+        if decoded.inst == 'DB': # writes a run at its origin: compare the spans
+            spans = self.spans
+            def write(*args):
+                old = [bytes(memory[start:end + 1]) for start, end in spans]
+                handler(*args)
+                for (start, end), before in zip(spans, old):
+                    if memory[start:end + 1] != before:
+                        address = next(start + i for i, value in enumerate(before) if memory[start + i] != value)
+                        raise Break(Hit('watchpoint', pc, address, before[address - start], memory[address]))
+            return write
+
+        def write(*args):
+            old = [(address, memory[address]) for address in writes(decoded, registers) if watched[address]]
+            handler(*args)
+            for address, value in old:
+                if memory[address] != value:
+                    raise Break(Hit('watchpoint', pc, address, value, memory[address]))
+        return write
+
+class ArmedImage:
+    """ImageProgram view that wraps each instruction as it is fetched."""
+
+    __slots__ = ('program', 'armed')
+
+    def __init__(self, program, armed:Armed):
+        self.program = program
+        self.armed = armed
+
+    def __getitem__(self, pc:int):
+        decoded = self.program[pc]
+        return decoded if decoded is None else self.armed.wrap(pc, decoded)
+
+_ZERO = dict.fromkeys(('A', 'B', 'C', 'D', 'E', 'H', 'L', 'SP', 'PC'), 0)
+
+def _may_write(decoded:tuple) -> bool:
+    """Whether an instruction writes memory, whatever the registers hold."""
+    return writes(decoded, _ZERO) != ()
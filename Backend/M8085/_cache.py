@@ -0,0 +1,258 @@
+"""Caches for assembled programs and execution results.
+
+AssemblyCache: identical programs (the same exercise from many students, or
+the editor re-assembling on every keystroke) skip Parser.parse() and
+Assembler.pass2() and reuse the stored assembler stack, address -> source
+line map and listing instead.
+Entries are keyed by a hash of the normalized source. Only successful
+assemblies from an empty assembler are cached, since a program assembled
+on top of a previous one (the notebook flow) depends on what came before.
+
+ResultCache: programs have no input besides the source and the starting
+MachineState (IN just loads the port number), so Processor.as_dict() is
+memoized on both. An entry holds the response, the final state and the
+Processor's step and cycle counters, which a hit restores so the session
+and Processor.cycles() end up exactly as if the program had run. It is off
+unless M8085_RESULT_CACHE=1.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from ._memory import MachineState, Assembler
+
+ASM_CACHE_SIZE = int(os.getenv('M8085_ASM_CACHE', '1024'))
+RESULT_CACHE = os.getenv('M8085_RESULT_CACHE', '0') == '1'
+RESULT_CACHE_BYTES = int(os.getenv('M8085_RESULT_CACHE_BYTES', str(32 << 20)))
+RESULT_CACHE_TTL = float(os.getenv('M8085_RESULT_CACHE_TTL', '600'))
+
+_BLANKS = re.compile(r'[ \t]+')
+_COMMA = re.compile(r' ?, ?')
+
+def normalize(code:str) -> str:
+    """Canonical form of a program: upper-cased, no comments or blank lines,
+    insignificant whitespace collapsed.
+
+    DB lines are kept verbatim because their values are read from the raw
+    line text, where spacing and comments do matter.
+    """
+    lines = []
+    for line in code.upper().splitlines():
+        line = line.strip()
+        if 'DB' not in line:
+            line = line.partition(';')[0].rstrip()
+            line = _COMMA.sub(',', _BLANKS.sub(' ', line)).replace(': ', ':')
+        if line:
+            lines.append(line)
+    return '\n'.join(lines)
+
+def digest(code:str) -> str:
+    return hashlib.blake2b(normalize(code).encode(), digest_size=16).hexdigest()
+
+def _freeze(stack:dict) -> tuple:
+    # Instructions are stored as tuples so a cached entry cannot be mutated
+    # through a state it was installed into.
+    return tuple(
+        (key, tuple(value) if isinstance(value, list) else value)
+        for key, value in stack.items()
+    )
+
+def _thaw(stack:tuple):
+    return ((key, list(value) if isinstance(value, tuple) else value) for key, value in stack)
+
+def _clone(response:dict) -> dict:
+    # Responses are at most two dicts deep (newState -> registers/flags/memory).
+    return {
+        key: {k: dict(v) if isinstance(v, dict) else v for k, v in value.items()}
+        if isinstance(value, dict) else value
+        for key, value in response.items()
+    }
+
+class Assembled:
+    """An assembled program: the assembler stack after pass2, the parser's
+    address -> (source line, text) map, plus its listing."""
+
+    __slots__ = ('stack', 'lines', 'listing')
+
+    def __init__(self, stack:dict, lines:dict):
+        self.stack = _freeze(stack)
+        self.lines = dict(lines)
+        self.listing: dict | None = None
+
+    def install(self, state:MachineState, lines:dict | None = None):
+        """Load the program into an empty assembler, as parse + pass2 would,
+        and its line map into `lines` (Parser.lines) if given."""
+        state.stack.update(_thaw(self.stack))
+        state.registers['PC'] = 0
+        if lines is not None:
+            lines.update(self.lines)
+
+    def as_dict(self, state:MachineState) -> dict:
+        """Assembler.as_dict() for the installed program, computed once."""
+        if self.listing is None:
+            self.listing = Assembler(state).as_dict()
+        return self.listing
+
+class AssemblyCache:
+    """Thread-safe LRU of Assembled programs with hit/miss counters."""
+
+    def __init__(self, size:int = ASM_CACHE_SIZE):
+        self._size = size
+        self._entries: OrderedDict[str, Assembled] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cacheable(state:MachineState) -> bool:
+        return not state.stack and state.registers['PC'] == 0
+
+    def get(self, key:str) -> Assembled | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key:str, stack:dict, lines:dict) -> Assembled:
+        entry = Assembled(stack, lines)
+        if self._size <= 0:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'size': self._size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+assembly_cache = AssemblyCache()
+
+class _Result:
+    """A memoized Processor.as_dict(), the state it left behind and the
+    Processor's counters and checkpoint after it."""
+
+    __slots__ = ('response', 'memory', 'ports', 'registers', 'flags', 'stack', 'counters', 'size', 'expires')
+
+    def __init__(self, response:dict, state:MachineState, counters:tuple, ttl:float):
+        self.response = _clone(response)
+        self.counters = counters
+        self.memory = zlib.compress(state.memory, 1) # mostly zeros, a few hundred bytes
+        self.ports = bytes(state.ports)
+        self.registers = tuple(state.registers.items())
+        self.flags = tuple(state.flags.items())
+        self.stack = _freeze(state.stack)
+        self.size = (
+            len(self.memory) + len(self.ports) + len(json.dumps(response))
+            + len(repr(self.stack))
+        )
+        self.expires = time.monotonic() + ttl
+
+    def restore(self, state:MachineState):
+        state.memory[:] = zlib.decompress(self.memory)
+        state.ports[:] = self.ports
+        state.registers.update(self.registers)
+        state.flags.update(self.flags)
+        state.stack.clear()
+        state.stack.update(_thaw(self.stack))
+
+class ResultCache:
+    """Thread-safe LRU of execution results, bounded by bytes and age."""
+
+    def __init__(self, budget:int = RESULT_CACHE_BYTES, ttl:float = RESULT_CACHE_TTL):
+        self._budget = budget
+        self._ttl = ttl
+        self._entries: OrderedDict[str, _Result] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def key(code:str, state:MachineState, *config) -> str:
+        """Hash of the exact source, the starting state and the run settings
+        (step limit, clock, cycle limit)."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(code.encode())
+        h.update(state.memory)
+        h.update(state.ports)
+        h.update(repr((
+            tuple(state.registers.values()),
+            tuple(state.flags.values()),
+            tuple(state.stack.items()),
+            config,
+        )).encode())
+        return h.hexdigest()
+
+    def get(self, key:str, state:MachineState) -> tuple[dict, tuple] | None:
+        """Return a copy of the cached response and the counters stored
+        with it, and restore its final state."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires < time.monotonic():
+                self.__drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        entry.restore(state)
+        return _clone(entry.response), entry.counters
+
+    def put(self, key:str, response:dict, state:MachineState, counters:tuple):
+        entry = _Result(response, state, counters, self._ttl)
+        if entry.size > self._budget:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.__drop(key)
+            self._entries[key] = entry
+            self.bytes += entry.size
+            while self.bytes > self._budget:
+                self.__drop(next(iter(self._entries)))
+
+    def __drop(self, key:str):
+        self.bytes -= self._entries.pop(key).size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = self.hits = self.misses = self.expired = 0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'budget': self._budget,
+            'ttl': self._ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+        }
+
+result_cache = ResultCache()
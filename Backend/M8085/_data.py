@@ -1,68 +1,49 @@
 """Data transfer instructions: MOV, MVI, LXI, LDA, STA, LDAX, STAX, LHLD, SHLD, XCHG."""
 
 from ._base import Instruction
-from ._memory import Memory, Register, decode_rp, encode_rp
-from ._utils import encode, decode
-from .logs import setup_logger, error
+from ._dispatch import Dispatch
+from ._memory import MachineState
+from .logs import error
 
-setup_logger()
 class Data(Instruction):
     """Implements data movement between registers, memory, and immediate values."""
 
-    def __init__(self):
-        self._memory:Memory = Memory()
-        self._register:Register = Register()
+    def __init__(self, state:MachineState):
+        self._forms = Dispatch(state, {})
 
     def __mov(self,rd:str,rs:str):
-        if rd == 'M':
-            self._memory[decode_rp()] =  self._register[rs]
-        elif rs == 'M':
-            self._register[rd] = self._memory[decode_rp()]
-        else:
-            self._register[rd] = self._register[rs]
+        self._form('MOV', rd, rs)()
 
-    def __mvi(self,r:str,data:str):
-        if r == 'M':
-            self._memory[decode_rp()] =  data
-        else:
-            self._register[r] = data
+    def __mvi(self,r:str,data:int):
+        self._form('MVI', r)(data)
 
-    def __lxi(self,rp:str,data:str):
-        encode_rp(data, rp)
+    def __lxi(self,rp:str,data:int):
+        self._form('LXI', rp)(data)
 
-    def __lda(self,ma:str):
-        self._register['A'] =  self._memory[ma]
+    def __lda(self,ma:int):
+        self._form('LDA')(ma)
     
-    def __sta(self, ma:str):
-        self._memory[ma] = self._register['A']    
+    def __sta(self, ma:int):
+        self._form('STA')(ma)
 
     def __ldax(self,rp:str):
-        if rp == 'B':
-            self._register['A'] = self._memory[decode_rp('B')]
-        elif rp == 'D':
-            self._register['A'] = self._memory[decode_rp('D')]
-        else:
+        if rp not in ('B', 'D'):
             error(f"Invalid Register Pair: {rp}")
+        self._form('LDAX', rp)()
     
     def __stax(self,rp:str):
-        if rp == 'B':
-            self._memory[decode_rp('B')] = self._register['A']
-        elif rp == 'D':
-            self._memory[decode_rp('D')] = self._register['A']
-        else:
+        if rp not in ('B', 'D'):
             error(f"Invalid Register Pair: {rp}")
+        self._form('STAX', rp)()
 
-    def __lhld(self,ma:str):
-        self._register['L'] = self._memory[ma]
-        self._register['H'] = self._memory[encode(decode(ma) + 1)]
+    def __lhld(self,ma:int):
+        self._form('LHLD')(ma)
 
-    def __shld(self,ma:str):
-        self._memory[ma] = self._register['L']
-        self._memory[encode(decode(ma) + 1)] = self._register['H']
+    def __shld(self,ma:int):
+        self._form('SHLD')(ma)
     
     def __xchg(self):
-        self._register['D'],self._register['H'] = self._register['H'],self._register['D']
-        self._register['E'],self._register['L'] = self._register['L'],self._register['E']
+        self._form('XCHG')()
 
     def get_inst(self):
         return {
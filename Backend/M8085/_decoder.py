@@ -0,0 +1,117 @@
+"""Pre-decoder for assembled 8085 programs.
+
+After Assembler.pass2() the program lives in the assembler stack as
+hex-string addresses mapped to mnemonic lists. predecode() turns that into
+a flat list indexed by integer address, where each slot holds a Decoded
+record with a handler specialized for its register operands (see
+_dispatch) and the int immediate operand, so the execute loop does no dict
+or string work per step.
+
+opcode_table() is the byte-level counterpart: a 256-entry list indexed by
+opcode, used by ImageProgram to decode straight from memory when a program
+runs as a binary image.
+"""
+
+from typing import Callable, NamedTuple
+
+from ._utils import INSTRUCTION, decode
+from ._memory import MEMORY_SIZE
+from ._tstates import CONDITIONS, cost
+from ._dispatch import OPCODES, Dispatch, fixed_operands
+
+IMMEDIATE = ('m:8', 'm:16', 'l')  # param rules whose operand is a number
+
+class Decoded(NamedTuple):
+    """One pre-decoded instruction."""
+    inst: str
+    handler: Callable | None  # None for HLT
+    args: tuple  # immediate operands, the handler's arguments
+    length: int
+    branch: bool  # handler updates PC itself
+    tstates: int
+    mcycles: int
+    taken: tuple[int, int, str, int] | None  # conditional branch: extra (tstates, mcycles) when flag == value
+    operands: tuple  # register operands, already bound into the handler
+
+def decode_operands(inst: str, operands: list) -> tuple:
+    """Convert numeric operands to ints, keep register names as strings."""
+    if inst == 'DB':
+        return tuple(decode(op) for op in operands)
+
+    rule = INSTRUCTION[inst]['param_rule'] or ()
+    return tuple(
+        decode(op) if kind in IMMEDIATE else op
+        for op, kind in zip(operands, rule)
+    )
+
+def _decoded(inst: str, operands: tuple, args: tuple, dispatch: Dispatch, branches: set) -> Decoded:
+    tstates, mcycles, taken_tstates, taken_mcycles = cost(inst, operands)
+    return Decoded(
+        inst,
+        None if inst == 'HLT' else dispatch.handler(inst, operands),
+        args,
+        INSTRUCTION[inst]['byte'] if inst in INSTRUCTION else 1,
+        inst in branches,
+        tstates,
+        mcycles,
+        (taken_tstates, taken_mcycles, *CONDITIONS[inst]) if taken_tstates else None,
+        operands,
+    )
+
+def predecode(stack: dict, dispatch: Dispatch, branches: set) -> list:
+    """Build the address-indexed instruction list for a pass2'd stack."""
+    program = [None] * MEMORY_SIZE
+
+    for pc, code in stack.items():
+        if not isinstance(code, list):
+            continue # label entry
+        inst, *operands = code
+        registers, args = fixed_operands(inst, decode_operands(inst, operands))
+        program[decode(pc)] = _decoded(inst, registers, args, dispatch, branches)
+
+    return program
+
+def opcode_table(dispatch: Dispatch, branches: set) -> list:
+    """Decoded per opcode, without immediates. Opcodes without an
+    implemented form are None."""
+    return [
+        None if form is None else _decoded(*form, (), dispatch, branches)
+        for form in OPCODES
+    ]
+
+def directive_slots(directives: dict[int, str], dispatch: Dispatch) -> dict[int, Decoded]:
+    """Decoded for the one-byte slots ORG and DB occupy in an image. Their
+    data was placed when the image was loaded, so they run as no-ops, and
+    like the directives in a predecoded program they cost nothing."""
+    nop = dispatch.handler('NOP', ())
+    return {
+        address: Decoded(inst, nop, (), 1, False, 0, 0, None, ())
+        for address, inst in directives.items()
+    }
+
+class ImageProgram:
+    """Program view over memory: fetches and decodes at every access, so
+    code written or loaded at run time executes as it stands. `directives`
+    maps the NOP slots of ORG and DB to their directive_slots() record, as
+    long as they still hold a NOP."""
+
+    __slots__ = ('memory', 'table', 'directives')
+
+    def __init__(self, memory: bytearray, table: list, directives: dict[int, Decoded] | None = None):
+        self.memory = memory
+        self.table = table
+        self.directives = directives or {}
+
+    def __getitem__(self, pc: int) -> Decoded | None:
+        memory = self.memory
+        opcode = memory[pc]
+        decoded = self.table[opcode]
+        if decoded is None or decoded.length == 1:
+            if opcode == 0x00 and self.directives: # NOP
+                return self.directives.get(pc, decoded)
+            return decoded
+        inst, handler, args, length, *rest = decoded
+        value = memory[(pc + 1) & 0xFFFF]
+        if length == 3:
+            value |= memory[(pc + 2) & 0xFFFF] << 8
+        return Decoded(inst, handler, (value,), length, *rest)
@@ -0,0 +1,86 @@
+"""State deltas against a numbered base version.
+
+A client that already holds a state can ask for the next execute response
+as a delta against it instead of a full newState dump. The server keeps
+the last few states it sent each session as Versions. diff() compares the
+current state with one of them and returns only the registers and flags
+that differ, and the changed memory as runs of base64 bytes. Changes
+closer together than DELTA_GAP bytes share one run.
+
+Memory is compared a page at a time first, so unchanged pages cost one
+memcmp each and only the pages that differ are scanned byte by byte.
+
+Configuration (environment):
+    M8085_DELTA_VERSIONS   states kept per session for deltas (default 2)
+"""
+
+import base64
+import os
+from typing import NamedTuple
+
+from ._utils import encode
+from ._memory import MachineState, _WIDE
+
+DELTA_VERSIONS = int(os.getenv('M8085_DELTA_VERSIONS', '2'))
+DELTA_GAP = 16 # bytes; a gap this small costs less than a new run
+PAGE = 256
+
+class Version(NamedTuple):
+    """A copy of a MachineState as it was sent to a client."""
+    number: int
+    memory: bytes
+    ports: bytes
+    registers: dict
+    flags: dict
+
+def capture(state:MachineState, number:int) -> Version:
+    return Version(number, bytes(state.memory), bytes(state.ports),
+                   dict(state.registers), dict(state.flags))
+
+def runs(before:bytes, after:bytes | bytearray, gap:int = DELTA_GAP) -> list[tuple[int, int]]:
+    """(start, end) spans of `after` that differ from `before`."""
+    if before == after:
+        return []
+    old, new = memoryview(before), memoryview(after)
+    spans: list[tuple[int, int]] = []
+    for page in range(0, len(new), PAGE):
+        end = min(page + PAGE, len(new))
+        if old[page:end] == new[page:end]:
+            continue
+        for address in range(page, end):
+            if before[address] != after[address]:
+                if spans and address - spans[-1][1] <= gap:
+                    spans[-1] = (spans[-1][0], address + 1)
+                else:
+                    spans.append((address, address + 1))
+    return spans
+
+def _encode_runs(spans:list[tuple[int, int]], data:bytes | bytearray, bit:int) -> list[dict]:
+    return [
+        {"address": encode(start, bit=bit), "data": base64.b64encode(data[start:end]).decode()}
+        for start, end in spans
+    ]
+
+def diff(base:Version, state:MachineState) -> dict:
+    """What changed from `base` to `state`, in the execute response layout."""
+    return {
+        "base": base.number,
+        "registers": {
+            name: encode(value, bit=4 if name in _WIDE else 2)
+            for name, value in state.registers.items() if base.registers.get(name) != value
+        },
+        "flags": {name: value for name, value in state.flags.items() if base.flags.get(name) != value},
+        "memory": _encode_runs(runs(base.memory, state.memory), state.memory, 4),
+        "ports": _encode_runs(runs(base.ports, state.ports), state.ports, 2),
+    }
+
+def apply(delta:dict, state:MachineState):
+    """Bring a state at the delta's base up to date, as a client would."""
+    for name, value in delta["registers"].items():
+        state.registers[name] = int(value[:-1], 16)
+    state.flags.update(delta["flags"])
+    for key, target in (("memory", state.memory), ("ports", state.ports)):
+        for run in delta[key]:
+            data = base64.b64decode(run["data"])
+            start = int(run["address"][:-1], 16)
+            target[start:start + len(data)] = data
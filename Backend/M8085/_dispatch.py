@@ -0,0 +1,405 @@
+"""Opcode-indexed dispatch with specialized instruction handlers.
+
+OPCODES is built once at import from commands_property.yml: a 256-entry
+table mapping each opcode byte to its mnemonic and fixed (register)
+operands, e.g. 0x41 -> ('MOV', ('B', 'C')). Dispatch binds those forms to
+one MachineState as closures with the operands baked in, so MOV B,C runs
+as `registers['B'] = registers['C']` with no operand strings to compare
+and no Register/Flag/Memory wrappers in between. A closure takes only the
+immediate operand, if the instruction has one.
+
+These closures are the only implementation of the mnemonics they cover:
+the generic Instruction handlers for MOV, ADD, JNZ, ... call them too
+(Instruction._form), so the two paths cannot drift apart. Forms without a
+specialization here (DAA, conditional calls and returns, XTHL, ...) fall
+back to the generic Instruction handler with the fixed operands bound.
+"""
+
+from functools import partial
+from typing import Callable
+
+from ._utils import INSTRUCTION
+from ._memory import MachineState, _PARITY
+
+_META = ('byte', 'param_rule', 'state', 'syntax', 'op')
+_RP = ('B', 'D', 'H') # pairs the handlers implement (the parser's rp check)
+# Opcodes with a handler but no source form in commands_property.yml.
+_EXTRA_OPCODES = {0xE9: ('PCHL', ())}
+
+def _opcodes() -> list:
+    forms = dict(_EXTRA_OPCODES)
+    for inst, entry in INSTRUCTION.items():
+        if inst in ('ORG', 'DB'):
+            continue
+        if entry.get('op'):
+            forms[int(entry['op'], 16)] = (inst, ())
+            continue
+        rule = entry['param_rule'] or ()
+        for key, op in entry.items():
+            if key in _META or op is None:
+                continue
+            operands = tuple(key.split(','))
+            if any(kind == 'rp' and operand not in _RP for operand, kind in zip(operands, rule)):
+                continue # SP / PSW forms
+            forms[int(op, 16)] = (inst, operands)
+
+    table = [None] * 256
+    for op, form in forms.items():
+        table[op] = form
+    return table
+
+OPCODES: list[tuple[str, tuple[str, ...]] | None] = _opcodes()
+
+def fixed_operands(inst:str, operands:tuple) -> tuple:
+    """Split decoded operands into (register operands, immediate operands)."""
+    rule = (INSTRUCTION[inst]['param_rule'] or ()) if inst in INSTRUCTION else ()
+    split = sum(1 for kind in rule if kind in ('r', 'rp'))
+    return operands[:split], operands[split:]
+
+# Flag and ALU helpers, shared by the closures below.
+
+def _szp(f, result):
+    f['S'] = (result >> 7) & 1
+    f['Z'] = int(result == 0)
+    f['P'] = _PARITY[result]
+
+def _accumulate(r, f, value, carry=0):
+    a = r['A']
+    result = a + value + carry
+    r['A'] = result & 0xFF
+    f['C'] = int(result > 0xFF)
+    f['AC'] = int((a & 0x0F) + (value & 0x0F) + carry > 0x0F)
+    _szp(f, result & 0xFF)
+
+def _subtract(r, f, value, borrow=0):
+    a = r['A']
+    result = a - value - borrow
+    r['A'] = result & 0xFF
+    f['C'] = int(result < 0)
+    f['AC'] = int((a & 0x0F) - (value & 0x0F) - borrow >= 0)
+    _szp(f, result & 0xFF)
+
+def _add(r, f, value): _accumulate(r, f, value)
+def _adc(r, f, value): _accumulate(r, f, value, f['C'])
+def _sub(r, f, value): _subtract(r, f, value)
+def _sbb(r, f, value): _subtract(r, f, value, f['C'])
+
+def _logic(r, f, result, aux):
+    r['A'] = result
+    f['C'] = 0
+    f['AC'] = aux
+    _szp(f, result)
+
+def _ana(r, f, value): _logic(r, f, r['A'] & value, 1)
+def _xra(r, f, value): _logic(r, f, r['A'] ^ value, 0)
+def _ora(r, f, value): _logic(r, f, r['A'] | value, 0)
+
+def _cmp(r, f, value):
+    a = r['A']
+    f['C'] = int(a < value)
+    f['AC'] = int((a & 0x0F) >= (value & 0x0F))
+    _szp(f, (a - value) & 0xFF)
+
+def _alu(apply):
+    """Factory for an accumulator operation on a register, M or an immediate."""
+    def factory(state, source=None):
+        r, f, m = state.registers, state.flags, state.memory
+        if source is None:
+            def op(data): apply(r, f, data)
+        elif source == 'M':
+            def op(): apply(r, f, m[(r['H'] << 8) | r['L']])
+        else:
+            def op(): apply(r, f, r[source])
+        return op
+    return factory
+
+# Data transfer
+
+def _mov(state, rd, rs):
+    r, m = state.registers, state.memory
+    if rd == 'M':
+        def mov(): m[(r['H'] << 8) | r['L']] = r[rs]
+    elif rs == 'M':
+        def mov(): r[rd] = m[(r['H'] << 8) | r['L']]
+    else:
+        def mov(): r[rd] = r[rs]
+    return mov
+
+def _mvi(state, rd):
+    r, m = state.registers, state.memory
+    if rd == 'M':
+        def mvi(data): m[(r['H'] << 8) | r['L']] = data
+    else:
+        def mvi(data): r[rd] = data
+    return mvi
+
+_PAIRS = {'B': ('B', 'C'), 'D': ('D', 'E'), 'H': ('H', 'L')}
+
+def _lxi(state, rp):
+    if rp not in _PAIRS:
+        return None
+    r = state.registers
+    high, low = _PAIRS[rp]
+    def lxi(data):
+        r[high] = (data >> 8) & 0xFF
+        r[low] = data & 0xFF
+    return lxi
+
+def _ldax(state, rp):
+    if rp not in ('B', 'D'):
+        return None
+    r, m = state.registers, state.memory
+    high, low = _PAIRS[rp]
+    def ldax(): r['A'] = m[(r[high] << 8) | r[low]]
+    return ldax
+
+def _stax(state, rp):
+    if rp not in ('B', 'D'):
+        return None
+    r, m = state.registers, state.memory
+    high, low = _PAIRS[rp]
+    def stax(): m[(r[high] << 8) | r[low]] = r['A']
+    return stax
+
+def _lda(state):
+    r, m = state.registers, state.memory
+    def lda(address): r['A'] = m[address]
+    return lda
+
+def _sta(state):
+    r, m = state.registers, state.memory
+    def sta(address): m[address] = r['A']
+    return sta
+
+def _lhld(state):
+    r, m = state.registers, state.memory
+    def lhld(address):
+        r['L'] = m[address]
+        r['H'] = m[(address + 1) & 0xFFFF]
+    return lhld
+
+def _shld(state):
+    r, m = state.registers, state.memory
+    def shld(address):
+        m[address] = r['L']
+        m[(address + 1) & 0xFFFF] = r['H']
+    return shld
+
+def _xchg(state):
+    r = state.registers
+    def xchg():
+        r['D'], r['H'] = r['H'], r['D']
+        r['E'], r['L'] = r['L'], r['E']
+    return xchg
+
+# Arithmetic
+
+def _inr(state, rd):
+    r, f, m = state.registers, state.flags, state.memory
+    if rd == 'M':
+        def inr():
+            address = (r['H'] << 8) | r['L']
+            value = m[address]
+            m[address] = result = (value + 1) & 0xFF
+            f['AC'] = int((value & 0x0F) == 0x0F)
+            f['S'], f['Z'], f['P'] = result >> 7, int(result == 0), _PARITY[result]
+    else:
+        def inr():
+            value = r[rd]
+            r[rd] = result = (value + 1) & 0xFF
+            f['AC'] = int((value & 0x0F) == 0x0F)
+            f['S'], f['Z'], f['P'] = result >> 7, int(result == 0), _PARITY[result]
+    return inr
+
+def _dcr(state, rd):
+    r, f, m = state.registers, state.flags, state.memory
+    if rd == 'M':
+        def dcr():
+            address = (r['H'] << 8) | r['L']
+            value = m[address]
+            m[address] = result = (value - 1) & 0xFF
+            f['AC'] = int((value & 0x0F) != 0)
+            f['S'], f['Z'], f['P'] = result >> 7, int(result == 0), _PARITY[result]
+    else:
+        def dcr():
+            value = r[rd]
+            r[rd] = result = (value - 1) & 0xFF
+            f['AC'] = int((value & 0x0F) != 0)
+            f['S'], f['Z'], f['P'] = result >> 7, int(result == 0), _PARITY[result]
+    return dcr
+
+def _step(delta):
+    def factory(state, rp):
+        if rp not in _PAIRS:
+            return None
+        r = state.registers
+        high, low = _PAIRS[rp]
+        def step():
+            value = (((r[high] << 8) | r[low]) + delta) & 0xFFFF
+            r[high] = value >> 8
+            r[low] = value & 0xFF
+        return step
+    return factory
+
+def _dad(state, rp):
+    if rp not in _PAIRS:
+        return None
+    r, f = state.registers, state.flags
+    high, low = _PAIRS[rp]
+    def dad():
+        result = ((r['H'] << 8) | r['L']) + ((r[high] << 8) | r[low])
+        r['H'] = (result >> 8) & 0xFF
+        r['L'] = result & 0xFF
+        f['C'] = int(result > 0xFFFF)
+    return dad
+
+# Logical
+
+def _rlc(state):
+    r, f = state.registers, state.flags
+    def rlc():
+        a = r['A']
+        f['C'] = a >> 7
+        r['A'] = ((a << 1) | (a >> 7)) & 0xFF
+    return rlc
+
+def _rrc(state):
+    r, f = state.registers, state.flags
+    def rrc():
+        a = r['A']
+        f['C'] = a & 1
+        r['A'] = ((a >> 1) | (a << 7)) & 0xFF
+    return rrc
+
+def _ral(state):
+    r, f = state.registers, state.flags
+    def ral():
+        a = r['A']
+        r['A'] = ((a << 1) | f['C']) & 0xFF
+        f['C'] = a >> 7
+    return ral
+
+def _rar(state):
+    r, f = state.registers, state.flags
+    def rar():
+        a = r['A']
+        r['A'] = (a >> 1) | (f['C'] << 7)
+        f['C'] = a & 1
+    return rar
+
+def _cma(state):
+    r = state.registers
+    def cma(): r['A'] = ~r['A'] & 0xFF
+    return cma
+
+def _cmc(state):
+    f = state.flags
+    def cmc(): f['C'] = int(not f['C'])
+    return cmc
+
+def _stc(state):
+    f = state.flags
+    def stc(): f['C'] = 1
+    return stc
+
+# Branch and stack
+
+def _jmp(state):
+    r = state.registers
+    def jmp(address): r['PC'] = address
+    return jmp
+
+def _jump_if(flag, value):
+    def factory(state):
+        r, f = state.registers, state.flags
+        def jump(address):
+            if f[flag] == value: r['PC'] = address
+            else: r['PC'] = (r['PC'] + 3) & 0xFFFF
+        return jump
+    return factory
+
+def _call(state):
+    r, m = state.registers, state.memory
+    def call(address):
+        ret = (r['PC'] + 3) & 0xFFFF
+        sp = r['SP']
+        m[(sp - 1) & 0xFFFF] = ret >> 8
+        m[(sp - 2) & 0xFFFF] = ret & 0xFF
+        r['SP'] = (sp - 2) & 0xFFFF
+        r['PC'] = address
+    return call
+
+def _ret(state):
+    r, m = state.registers, state.memory
+    def ret():
+        sp = r['SP']
+        r['PC'] = m[sp] | (m[(sp + 1) & 0xFFFF] << 8)
+        r['SP'] = (sp + 2) & 0xFFFF
+    return ret
+
+def _push(state, rp):
+    if rp not in _PAIRS:
+        return None
+    r, m = state.registers, state.memory
+    high, low = _PAIRS[rp]
+    def push():
+        sp = r['SP']
+        m[(sp - 1) & 0xFFFF] = r[high]
+        m[(sp - 2) & 0xFFFF] = r[low]
+        r['SP'] = (sp - 2) & 0xFFFF
+    return push
+
+def _pop(state, rp):
+    if rp not in _PAIRS:
+        return None
+    r, m = state.registers, state.memory
+    high, low = _PAIRS[rp]
+    def pop():
+        sp = r['SP']
+        r[low] = m[sp]
+        r[high] = m[(sp + 1) & 0xFFFF]
+        r['SP'] = (sp + 2) & 0xFFFF
+    return pop
+
+def _nop(state):
+    def nop(): pass
+    return nop
+
+SPECIALIZED: dict[str, Callable] = {
+    'MOV': _mov, 'MVI': _mvi, 'LXI': _lxi, 'LDAX': _ldax, 'STAX': _stax,
+    'LDA': _lda, 'STA': _sta, 'LHLD': _lhld, 'SHLD': _shld, 'XCHG': _xchg,
+    'ADD': _alu(_add), 'ADC': _alu(_adc), 'SUB': _alu(_sub), 'SBB': _alu(_sbb),
+    'ADI': _alu(_add), 'ACI': _alu(_adc), 'SUI': _alu(_sub), 'SBI': _alu(_sbb),
+    'ANA': _alu(_ana), 'XRA': _alu(_xra), 'ORA': _alu(_ora), 'CMP': _alu(_cmp),
+    'ANI': _alu(_ana), 'XRI': _alu(_xra), 'ORI': _alu(_ora), 'CPI': _alu(_cmp),
+    'INR': _inr, 'DCR': _dcr, 'INX': _step(1), 'DCX': _step(-1), 'DAD': _dad,
+    'RLC': _rlc, 'RRC': _rrc, 'RAL': _ral, 'RAR': _rar,
+    'CMA': _cma, 'CMC': _cmc, 'STC': _stc, 'NOP': _nop,
+    'JMP': _jmp,
+    'JZ': _jump_if('Z', 1), 'JNZ': _jump_if('Z', 0),
+    'JC': _jump_if('C', 1), 'JNC': _jump_if('C', 0),
+    'JPE': _jump_if('P', 1), 'JPO': _jump_if('P', 0),
+    'JM': _jump_if('S', 1), 'JP': _jump_if('S', 0),
+    'CALL': _call, 'RET': _ret, 'PUSH': _push, 'POP': _pop,
+}
+
+class Dispatch:
+    """Handlers for one MachineState, one per (mnemonic, register operands)
+    form and created on first use. `fallback` holds the generic handlers
+    by mnemonic (Processor.inst)."""
+
+    def __init__(self, state:MachineState, fallback:dict):
+        self._state = state
+        self._fallback = fallback
+        self._handlers: dict[tuple[str, tuple], Callable] = {}
+
+    def handler(self, inst:str, operands:tuple = ()) -> Callable:
+        key = (inst, operands)
+        handler = self._handlers.get(key)
+        if handler is None:
+            specialize = SPECIALIZED.get(inst)
+            handler = specialize(self._state, *operands) if specialize else None
+            if handler is None:
+                handler = partial(self._fallback[inst], *operands) if operands else self._fallback[inst]
+            self._handlers[key] = handler
+        return handler
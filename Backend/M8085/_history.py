@@ -0,0 +1,165 @@
+"""Undo log and checkpoints for reverse execution.
+
+Processor.step() records, for every instruction, the old values of only
+what it overwrote: the registers, flags, memory bytes and ports in its
+Step, and the DB origin when ORG or DB moved it. Each old value is packed
+into one 64-bit entry of an array('Q') (kind, key, value), with an index
+of where each step's entries start, so a 10000-step run costs a few
+hundred KB instead of a state per step.
+
+Stepping back pops a step and writes its old values back, O(distance).
+Every CHECKPOINT_INTERVAL steps a full Snapshot is also kept, sharing
+unchanged pages with the previous one, so a seek far back restores the
+nearest checkpoint and re-executes forward from there instead of undoing
+the whole way.
+
+Configuration (environment):
+    M8085_CHECKPOINT   steps between checkpoints (default 1000)
+"""
+
+import os
+from array import array
+from typing import NamedTuple
+
+from ._memory import MachineState, Snapshot, REGISTERS, FLAGS
+from ._stream import Step
+
+CHECKPOINT_INTERVAL = int(os.getenv('M8085_CHECKPOINT', '1000'))
+
+REGISTER, FLAG, MEMORY, PORT, ORIGIN = range(5)
+_REGISTER_INDEX = {name: index for index, name in enumerate(REGISTERS)}
+_FLAG_INDEX = {name: index for index, name in enumerate(FLAGS)}
+
+class Counters(NamedTuple):
+    """Processor counters before a step."""
+    steps: int
+    tstates: int
+    mcycles: int
+    directives: int
+
+_COUNTERS = len(Counters._fields)
+
+class Checkpoint(NamedTuple):
+    position: int
+    snapshot: Snapshot
+    counters: Counters
+
+class Undone(NamedTuple):
+    """What undoing steps touched, to report the values now there."""
+    registers: set
+    flags: set
+    memory: set
+    ports: set
+
+def _pack(kind:int, key:int, value:int) -> int:
+    return (kind << 32) | (key << 16) | value
+
+class History:
+    """Undo entries per step, and periodic checkpoints."""
+
+    def __init__(self, interval:int = CHECKPOINT_INTERVAL):
+        self.interval = max(1, interval)
+        self.entries = array('Q')
+        self.starts = array('L') # first entry of each step
+        self.counters = array('Q') # Counters before each step
+        self.checkpoints: list[Checkpoint] = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def due(self) -> bool:
+        """Whether a checkpoint belongs before the next step."""
+        position = len(self.starts)
+        return position % self.interval == 0 and \
+            (not self.checkpoints or self.checkpoints[-1].position < position)
+
+    def checkpoint(self, state:MachineState, counters:Counters):
+        parent = self.checkpoints[-1].snapshot if self.checkpoints else None
+        self.checkpoints.append(Checkpoint(len(self.starts), state.snapshot(parent), counters))
+
+    def record(self, step:Step, counters:Counters, origin:int | None = None):
+        """Log a step's old values; `origin` is the DB origin before it, if
+        the step moved it."""
+        entries = self.entries
+        self.starts.append(len(entries))
+        self.counters.extend(counters)
+        registers, flags, memory, ports = step.undo
+        for name, value in registers.items():
+            entries.append(_pack(REGISTER, _REGISTER_INDEX[name], value))
+        for name, value in flags.items():
+            entries.append(_pack(FLAG, _FLAG_INDEX[name], value))
+        for address, value in memory.items():
+            entries.append(_pack(MEMORY, address, value))
+        for port, value in ports.items():
+            entries.append(_pack(PORT, port, value))
+        if origin is not None:
+            entries.append(_pack(ORIGIN, 0, origin))
+
+    def undo(self, state:MachineState, touched:Undone) -> Counters:
+        """Revert the last step. Returns the counters before it."""
+        start = self.starts.pop()
+        counters = Counters(*self.counters[-_COUNTERS:])
+        del self.counters[-_COUNTERS:]
+        for entry in self.entries[start:]:
+            kind, key, value = entry >> 32, (entry >> 16) & 0xFFFF, entry & 0xFFFF
+            if kind == REGISTER:
+                name = REGISTERS[key]
+                state.registers[name] = value
+                touched.registers.add(name)
+            elif kind == FLAG:
+                name = FLAGS[key]
+                state.flags[name] = value
+                touched.flags.add(name)
+            elif kind == MEMORY:
+                state.memory[key] = value
+                touched.memory.add(key)
+            elif kind == PORT:
+                state.ports[key] = value
+                touched.ports.add(key)
+            else:
+                state.origin = value
+        del self.entries[start:]
+        self.__drop_checkpoints(len(self.starts))
+        return counters
+
+    def touched(self, since:int, touched:Undone):
+        """Add everything steps from `since` on overwrote to `touched`."""
+        if since >= len(self.starts):
+            return
+        for entry in self.entries[self.starts[since]:]:
+            kind, key = entry >> 32, (entry >> 16) & 0xFFFF
+            if kind == REGISTER:
+                touched.registers.add(REGISTERS[key])
+            elif kind == FLAG:
+                touched.flags.add(FLAGS[key])
+            elif kind == MEMORY:
+                touched.memory.add(key)
+            elif kind == PORT:
+                touched.ports.add(key)
+
+    def truncate(self, position:int):
+        """Forget steps from `position` on, as after restoring a checkpoint."""
+        if position >= len(self.starts):
+            return
+        del self.entries[self.starts[position]:]
+        del self.starts[position:]
+        del self.counters[position * _COUNTERS:]
+        self.__drop_checkpoints(position)
+
+    def nearest(self, position:int) -> Checkpoint | None:
+        """The last checkpoint at or before `position`."""
+        best = None
+        for checkpoint in self.checkpoints:
+            if checkpoint.position > position:
+                break
+            best = checkpoint
+        return best
+
+    def __drop_checkpoints(self, position:int):
+        while self.checkpoints and self.checkpoints[-1].position > position:
+            self.checkpoints.pop()
+
+    def size(self) -> int:
+        """Bytes held by the undo log (checkpoints not included)."""
+        return (len(self.entries) * self.entries.itemsize + len(self.starts) * self.starts.itemsize
+                + len(self.counters) * self.counters.itemsize)
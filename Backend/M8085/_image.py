@@ -0,0 +1,165 @@
+"""Binary machine-code images of 8085 programs.
+
+Image.assemble() encodes a pass2'd assembler stack as real bytes: the
+opcode from INSTRUCTION followed by the immediate operand, 16-bit values
+little-endian, each instruction at the address pass1 gave it. ORG and DB
+keep their meaning in this simulator (DB data goes to the ORG'd data
+origin, C000H by default), except that the data is placed when the image
+is loaded instead of when the directive executes; their own one-byte slots
+in the code become NOPs, listed in `directives` so that Processor still
+treats them as directives rather than instructions.
+
+Images can also be read from and written to Intel HEX and raw binary, and
+loaded into a MachineState to run with Processor(mode='image').
+"""
+
+from ._utils import INSTRUCTION, Message, decode, encode
+from ._memory import MachineState, MEMORY_SIZE, DB_ORIGIN
+from ._decoder import decode_operands
+
+HEX_RECORD = 16 # data bytes per Intel HEX record
+NOP = 0x00
+
+def opcode(inst:str, operands:list) -> int | None:
+    """Opcode byte of an instruction, None if the form has no encoding."""
+    entry = INSTRUCTION[inst]
+    if entry.get('op'):
+        op = entry['op']
+    elif inst == 'MOV':
+        op = entry.get(','.join(operands))
+    else:
+        op = entry.get(operands[0]) if operands else None
+    return int(op, 16) if op else None
+
+class Image:
+    """A program as bytes: (address, data) segments in load order, and
+    the addresses of ORG and DB slots."""
+
+    __slots__ = ('segments', 'directives')
+
+    def __init__(self, segments:list[tuple[int, bytes]] | None = None,
+                 directives:dict[int, str] | None = None):
+        self.segments = segments or []
+        self.directives = directives or {}
+
+    def __len__(self):
+        return sum(len(data) for _, data in self.segments)
+
+    def __add(self, address:int, data:bytes):
+        # Extend the last segment when contiguous, split at the top of memory.
+        while data:
+            address &= 0xFFFF
+            chunk, data = data[:MEMORY_SIZE - address], data[MEMORY_SIZE - address:]
+            if self.segments:
+                start, last = self.segments[-1]
+                if start + len(last) == address:
+                    self.segments[-1] = (start, last + chunk)
+                    address += len(chunk)
+                    continue
+            self.segments.append((address, bytes(chunk)))
+            address += len(chunk)
+
+    @classmethod
+    def assemble(cls, stack:dict) -> 'Image | Message':
+        """Encode an assembler stack after pass2."""
+        image = cls()
+        data = []
+        origin = DB_ORIGIN
+        for pc, code in stack.items():
+            if not isinstance(code, list):
+                continue # label entry
+            inst, *operands = code
+            address = decode(pc)
+
+            if inst in ('ORG', 'DB'):
+                if inst == 'ORG':
+                    origin = decode(operands[0])
+                else:
+                    values = bytes(decode_operands(inst, operands))
+                    data.append((origin, values))
+                    origin = (origin + len(values)) & 0xFFFF
+                image.__add(address, bytes([NOP]))
+                image.directives[address] = inst
+                continue
+
+            op = opcode(inst, operands)
+            if op is None:
+                return Message('No opcode for instruction', inst, encode(address, bit=4),
+                               ' '.join(code), format=INSTRUCTION[inst]['syntax'])
+            length = INSTRUCTION[inst]['byte']
+            encoded = bytes([op])
+            if length > 1:
+                value = decode_operands(inst, operands)[-1]
+                encoded += value.to_bytes(length - 1, 'little')
+            image.__add(address, encoded)
+
+        for address, values in data:
+            image.__add(address, values)
+        return image
+
+    @classmethod
+    def from_binary(cls, data:bytes, address:int = 0) -> 'Image':
+        image = cls()
+        image.__add(address, bytes(data))
+        return image
+
+    @classmethod
+    def from_hex(cls, text:str) -> 'Image | Message':
+        """Parse Intel HEX (data, EOF and ignored address-extension records)."""
+        image = cls()
+        for number, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                if not line.startswith(':'):
+                    raise ValueError('record must start with ":"')
+                record = bytes.fromhex(line[1:])
+                if len(record) < 5 or len(record) != record[0] + 5:
+                    raise ValueError('bad record length')
+                if sum(record) & 0xFF:
+                    raise ValueError('bad checksum')
+            except ValueError as e:
+                return Message('Invalid HEX record', pos=f'line: {number}', line=line, format=str(e))
+
+            count, kind = record[0], record[3]
+            if kind == 0x00:
+                image.__add(int.from_bytes(record[1:3], 'big'), record[4:4 + count])
+            elif kind == 0x01:
+                break
+        return image
+
+    def to_hex(self, record:int = HEX_RECORD) -> str:
+        lines = []
+        for start, data in self.segments:
+            for offset in range(0, len(data), record):
+                chunk = data[offset:offset + record]
+                body = bytes([len(chunk)]) + (start + offset).to_bytes(2, 'big') + b'\x00' + chunk
+                lines.append(f":{body.hex().upper()}{-sum(body) & 0xFF:02X}")
+        lines.append(':00000001FF')
+        return '\n'.join(lines)
+
+    def to_binary(self) -> tuple[int, bytes]:
+        """Flat image from the lowest to the highest address, gaps zeroed."""
+        if not self.segments:
+            return 0, b''
+        low = min(start for start, _ in self.segments)
+        high = max(start + len(data) for start, data in self.segments)
+        flat = bytearray(high - low)
+        for start, data in self.segments:
+            flat[start - low:start - low + len(data)] = data
+        return low, bytes(flat)
+
+    def load(self, state:MachineState):
+        memory = state.memory
+        for start, data in self.segments:
+            memory[start:start + len(data)] = data
+
+    def as_dict(self) -> dict:
+        return {
+            "segments": [
+                {"address": encode(start, bit=4), "length": len(data)}
+                for start, data in self.segments
+            ],
+            "bytes": len(self),
+        }
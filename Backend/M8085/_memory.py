@@ -1,111 +1,297 @@
 """Memory, register, flag management and assembler for the 8085 simulator.
 
 This module contains the core state management:
+- MachineState: one simulator instance's memory, registers, flags, program
+  and DB origin
+- Snapshot: a saved MachineState, restored in place
 - Memory: 64KB addressable memory space
 - Register: A, B, C, D, E, H, L, M, PC, SP
 - Flag: S (Sign), Z (Zero), AC (Aux Carry), P (Parity), C (Carry)
 - Assembler: Two-pass assembler for label resolution
 """
 
+import re
+
 from ._utils import *
 
-# Global state - shared across all instances (singleton pattern)
+MEMORY_SIZE = 0x10000
+PORT_SIZE = 0x100
+REGISTERS = ('A', 'B', 'C', 'D', 'E', 'H', 'L', 'M', 'PC', 'SP')
+FLAGS = ('S', 'Z', 'AC', 'P', 'C')
+
+DB_ORIGIN = 0xC000 # where DB places data when no ORG precedes it
+
+_WIDE = ('PC', 'SP')  # 16-bit registers, serialized with 4 hex digits
+PAGE_SIZE = 0x100
+_BLANK = bytes(PAGE_SIZE)
+_NONZERO = re.compile(rb'[^\x00]')
+_PARITY = bytes( int( bin(n).count('1') % 2 == 0 ) for n in range(256) )
+
+class MachineState:
+    """Complete state of one simulated 8085.
+
+    Memory, Register, Flag, Assembler, Parser, Processor and every
+    Instruction subclass are views over the MachineState they are given,
+    so separate states can run concurrently without sharing anything.
+    """
 
-_MEMORY = {}
-_STACK = {}
-_REGISTER = {
-    'A':'00H','B':'00H','C':'00H','D':'00H','E':'00H','H':'00H','L':'00H','M':'00H',
-    'PC':'0000H','SP':'0000H'
-}
-_FLAG = {'S':0,'Z':0,'AC':0,'P':0,'C':0}
+    def __init__(self):
+        self.memory = bytearray(MEMORY_SIZE)
+        self.ports = bytearray(PORT_SIZE)
+        self.stack = {}  # assembler stack: address/label -> code
+        self.registers = dict.fromkeys(REGISTERS, 0)
+        self.flags = dict.fromkeys(FLAGS, 0)
+        self.origin = DB_ORIGIN # where the next DB places its data (moved by ORG)
+
+    def reset(self):
+        self.memory[:] = bytes(MEMORY_SIZE)
+        self.ports[:] = bytes(PORT_SIZE)
+        self.stack.clear()
+        for reg in self.registers: self.registers[reg] = 0
+        for flag in self.flags: self.flags[flag] = 0
+        self.origin = DB_ORIGIN
+
+    def snapshot(self, parent:'Snapshot | None' = None) -> 'Snapshot':
+        return Snapshot(self, parent)
+
+    def restore(self, snapshot:'Snapshot'):
+        snapshot.restore(self)
+
+class Snapshot:
+    """An immutable copy of a MachineState.
+
+    Memory is kept as 256 read-only pages. Pages equal to the parent
+    snapshot's are shared with it and all-zero pages with every snapshot,
+    so a series of snapshots that differ in a few bytes costs a few pages
+    each. Restoring copies the pages back into the same bytearray, so
+    handlers and Memory views bound to state.memory stay valid.
+    """
+
+    __slots__ = ('pages', 'ports', 'registers', 'flags', 'origin', 'stack')
+
+    def __init__(self, state:MachineState, parent:'Snapshot | None' = None):
+        # Pages are compared in place (startswith at the page offset); only
+        # the ones that differ from both the parent's and the blank page are copied.
+        memory = state.memory
+        shared = parent.pages if parent is not None else None
+        pages = []
+        for index, start in enumerate(range(0, MEMORY_SIZE, PAGE_SIZE)):
+            if shared is not None and memory.startswith(shared[index], start):
+                page = shared[index]
+            elif memory.startswith(_BLANK, start):
+                page = _BLANK
+            else:
+                page = bytes(memory[start:start + PAGE_SIZE])
+            pages.append(page)
+        self.pages = tuple(pages)
+        self.ports = bytes(state.ports)
+        self.registers = dict(state.registers)
+        self.flags = dict(state.flags)
+        self.origin = state.origin
+        self.stack = {key: list(code) if isinstance(code, list) else code
+                      for key, code in state.stack.items()}
+
+    def restore(self, state:MachineState):
+        state.memory[:] = b''.join(self.pages)
+        state.ports[:] = self.ports
+        state.registers.update(self.registers)
+        state.flags.update(self.flags)
+        state.origin = self.origin
+        state.stack.clear()
+        state.stack.update((key, list(code) if isinstance(code, list) else code)
+                           for key, code in self.stack.items())
+
+    def state(self) -> MachineState:
+        """A new MachineState holding this snapshot."""
+        state = MachineState()
+        self.restore(state)
+        return state
+
+    def size(self, parent:'Snapshot | None' = None) -> int:
+        """Bytes of memory pages not shared with `parent` or blank."""
+        shared = {id(page) for page in parent.pages} if parent is not None else set()
+        shared.add(id(_BLANK))
+        return sum(PAGE_SIZE for page in self.pages if id(page) not in shared)
 
 class Memory:
-    """64KB memory space. Addresses are hex strings (e.g., '2000H')."""
-
-    def __getitem__(self,address):
-        if address in _MEMORY: return _MEMORY[address]
-        else:
-            addr = decode(address)  # Validate address
-            if isinstance(addr, int): return '00H'
-            else: return Message(f'Invalid Memory Address: {address}')
-
-    def __setitem__(self,address, data):
-        if data == '00H':
-            if address in _MEMORY: _MEMORY.pop(address, None)
-        else:
-            _MEMORY[address] = data
-
-    def write(self,address, data):
-        if data == '00H':
-            if address in _MEMORY: _MEMORY.pop(address, None)
-        else:
-            _MEMORY[address] = data
-
-    def read(self,address):
-        if address in _MEMORY: return _MEMORY[address]
-    
+    """64KB memory space backed by a single bytearray.
+
+    Addresses and values are ints. Indexing with a slice returns a
+    zero-copy memoryview, which is what block moves should use. The
+    hex-string view ('2000H': '3FH') is only built by get_all().
+    """
+
+    def __init__(self, state:MachineState):
+        self._memory = state.memory
+        self._port = state.ports
+
+    def __getitem__(self, address:int | slice) -> int | memoryview:
+        if isinstance(address, slice):
+            return memoryview(self._memory)[address]
+        return self._memory[address]
+
+    def __setitem__(self, address:int | slice, data):
+        self._memory[address] = data
+
+    def load(self, address:int) -> int:
+        """Read the byte at an integer address."""
+        return self._memory[address]
+
+    def store(self, address:int, data:int):
+        """Write a byte to an integer address."""
+        self._memory[address] = data
+
+    read, write = load, store
+
+    def view(self, address:int, length:int) -> memoryview:
+        """Zero-copy view over `length` bytes starting at `address`."""
+        return memoryview(self._memory)[address:address + length]
+
+    def copy(self, source:int, destination:int, length:int):
+        """Block move of `length` bytes; overlapping ranges are handled."""
+        self._memory[destination:destination + length] = self._memory[source:source + length]
+
+    def fill(self, address:int, data:bytes | bytearray | memoryview):
+        """Write a block of bytes starting at `address`."""
+        self._memory[address:address + len(data)] = data
+
+    def input(self, port:int) -> int:
+        return self._port[port]
+
+    def output(self, port:int, data:int):
+        self._port[port] = data
+
+    def nonzero(self):
+        """Yield the addresses holding a non-zero byte, in ascending order."""
+        for match in _NONZERO.finditer(self._memory):
+            yield match.start()
+
     def get_used_addresses(self):
-        return _MEMORY.keys()
+        return [encode(addr, bit=4) for addr in self.nonzero()]
     
     def get_all(self):
-        return _MEMORY
+        memory = {encode(addr, bit=4): encode(self._memory[addr]) for addr in self.nonzero()}
+        for match in _NONZERO.finditer(self._port):
+            port = match.start()
+            memory[encode(port)] = encode(self._port[port])
+        return memory
 
     def reset(self):
-        _MEMORY.clear()
+        self._memory[:] = bytes(MEMORY_SIZE)
+        self._port[:] = bytes(PORT_SIZE)
     
 
 class Register:
-    """8085 registers: A, B, C, D, E, H, L, M (memory ref), PC, SP."""
+    """8085 registers: A, B, C, D, E, H, L, M (memory ref), PC, SP.
+
+    Values are plain ints; the hex-string view is only built by get_all().
+    """
+
+    def __init__(self, state:MachineState):
+        self._registers = state.registers
 
     def __getitem__(self,register):
-        if register in _REGISTER: return _REGISTER[register]
+        if register in self._registers: return self._registers[register]
         else: raise KeyError(f"Register {register} not found.")
     
     def __setitem__(self,register, data):
         self.write(register, data)
 
     def write(self,register, data):
-        if register in _REGISTER:
-            _REGISTER[register] = data
+        if register in self._registers:
+            self._registers[register] = data
     
     def read(self,register):
-        if register in _REGISTER:
-            return _REGISTER[register]
+        if register in self._registers:
+            return self._registers[register]
 
     def get_all(self):
-        return _REGISTER
+        return {
+            reg: encode(value, bit=4 if reg in _WIDE else 2)
+            for reg, value in self._registers.items()
+        }
     
     def reset(self):
-        for reg in _REGISTER:
-            if reg in ['PC', 'SP']:
-                _REGISTER[reg] = '0000H'
-            else:
-                _REGISTER[reg] = '00H'
+        for reg in self._registers:
+            self._registers[reg] = 0
+
+    def decode_rp(self, rp: str = 'H') -> int:
+        """Get 16-bit value from register pair (B=BC, D=DE, H=HL)."""
+        registers = self._registers
+        if rp == 'B': return (registers['B'] << 8) | registers['C']
+        elif rp == 'D': return (registers['D'] << 8) | registers['E']
+        else: return (registers['H'] << 8) | registers['L']
+
+    def encode_rp(self, value: int, rp: str = 'H'):
+        """Store 16-bit value into register pair (B=BC, D=DE, H=HL)."""
+        registers = self._registers
+        high, low = (value >> 8) & 0xFF, value & 0xFF
+        if rp == 'B':
+            registers['B'], registers['C'] = high, low
+        elif rp == 'D':
+            registers['D'], registers['E'] = high, low
+        elif rp == 'H':
+            registers['H'], registers['L'] = high, low
 
 class Flag:
     """8085 flags: S (Sign), Z (Zero), AC (Aux Carry), P (Parity), C (Carry)."""
 
+    def __init__(self, state:MachineState):
+        self._flags = state.flags
+
     def __getitem__(self,flag):
-        if flag in _FLAG: return _FLAG[flag]
+        if flag in self._flags: return self._flags[flag]
         else: raise KeyError(f"Flag {flag} not found.")
 
     def __setitem__(self,flag, value):
         self.set(flag, value)
 
     def set(self,flag, value):
-        if flag in _FLAG:
-            _FLAG[flag] = 1 if value else 0
+        if flag in self._flags:
+            self._flags[flag] = 1 if value else 0
     
     def get(self,flag):
-        if flag in _FLAG:
-            return _FLAG[flag]
+        if flag in self._flags:
+            return self._flags[flag]
     
     def get_all(self):
-        return _FLAG
+        return dict(self._flags)
     
     def reset(self):
-        for flag in _FLAG:
-            _FLAG[flag] = 0
+        for flag in self._flags:
+            self._flags[flag] = 0
+
+    def check_carry(self, result: int, bit: int = 2):
+        """Set carry flag if result overflows (8-bit: >0xFF, 16-bit: >0xFFFF)."""
+        if bit == 4:
+            self._flags['C'] = int( result > 0xFFFF )
+        elif bit == 2: 
+            self._flags['C'] = int( result > 0xFF )
+
+    def check_aux_carry(self, op1: int, op2: int, carry: int = 0):
+        """Set auxiliary carry flag if lower nibble sum > 0x0F."""
+        self._flags['AC'] = int( (op1 & 0x0F) + (op2 & 0x0F) + carry > 0x0F )
+
+    def check_parity(self, result: int):
+        """Set parity flag if number of 1-bits is even.""" 
+        self._flags['P'] = _PARITY[result & 0xFF]
+        
+    def check_zero(self, result: int):
+        """Set zero flag if result is zero."""
+        self._flags['Z'] = int( (result & 0xFF) == 0 )
+
+    def check_sign(self, result: int):
+        """Set sign flag based on MSB (bit 7) of result."""
+        self._flags['S'] = (result >> 7) & 1
+
+    def check_szp(self, result: int):
+        """Set sign, zero and parity flags from the low byte of result,
+        as check_zero and check_parity do."""
+        result &= 0xFF
+        flags = self._flags
+        flags['S'] = result >> 7
+        flags['Z'] = int( result == 0 )
+        flags['P'] = _PARITY[result]
 
 class Assembler:
     """Two-pass assembler for 8085 assembly code.
@@ -114,34 +300,38 @@ class Assembler:
     Pass 2: Resolve label references to actual addresses
     """
 
+    def __init__(self, state:MachineState):
+        self._stack = state.stack
+        self._registers = state.registers
+
     def pass1(self, line:dict):
 
-        pc = _REGISTER['PC']
+        pc = self._registers['PC']
         
         if 'label' in line:
             label = line['label']
-            _STACK[label] = pc
+            self._stack[label] = encode(pc, bit=4)
 
         if 'code' in line:
             inst = line['inst']
             code = line['code']
             inr = INSTRUCTION[inst]['byte']
 
-            _STACK[pc] = code
-            _REGISTER['PC'] = encode(decode(pc) + inr, bit =4)
+            self._stack[encode(pc, bit=4)] = code
+            self._registers['PC'] = (pc + inr) & 0xFFFF
         
     def pass2(self):
-        for pc, code in _STACK.items():
+        for pc, code in self._stack.items():
             if not isinstance(code, list):
                 continue
             inst = code[0]
             if INSTRUCTION[inst]['param_rule'] == ['l']:
                 label = code[1]
-                if label not in _STACK:
+                if label not in self._stack:
                     self.reset()
                     return Message(f'Subroutine {label} not defined')
-                code[1] = _STACK[label]
-                _STACK[pc] = code
+                code[1] = self._stack[label]
+                self._stack[pc] = code
 
         self.reset_pc()
         return 0
@@ -149,13 +339,13 @@ class Assembler:
     def assemble(self) -> list:
         sck = []
         label_flag = False
-        for i in _STACK:
-            if isinstance(_STACK[i], str): 
-                sck.append([_STACK[i],i])
+        for i in self._stack:
+            if isinstance(self._stack[i], str): 
+                sck.append([self._stack[i],i])
                 label_flag = True
             
-            elif isinstance(_STACK[i], list):
-                inst, *code = _STACK[i]
+            elif isinstance(self._stack[i], list):
+                inst, *code = self._stack[i]
                 if inst in ['DB','ORG']: continue
                 byte = str(INSTRUCTION[inst]['byte'])
             
@@ -182,18 +372,18 @@ class Assembler:
         return sck
     
     def get_stack(self):
-        return _STACK
+        return self._stack
     
     def reset(self):
-        _STACK.clear()
+        self._stack.clear()
         self.reset_pc()
         self.reset_sp()
     
     def reset_sp(self):
-        _REGISTER['SP'] = '0000H'
+        self._registers['SP'] = 0
     
     def reset_pc(self):
-        _REGISTER['PC'] = '0000H'
+        self._registers['PC'] = 0
     
     def as_dict(self):
         assembled_data = self.assemble()
@@ -205,52 +395,3 @@ class Assembler:
             "label": labels,
             "data": assembled_data
         }
-
-def decode_rp(rp: str = 'H') -> str:
-    """Get 16-bit address from register pair (B=BC, D=DE, H=HL)."""
-    if rp == 'B': return _REGISTER['B'][:-1] + _REGISTER['C']
-    elif rp == 'D': return  _REGISTER['D'][:-1] + _REGISTER['E']
-    else: return _REGISTER['H'][:-1] + _REGISTER['L']
-
-def encode_rp(value: str, rp: str = 'H'):
-    """Store 16-bit value into register pair (B=BC, D=DE, H=HL)."""
-    if rp == 'B':
-        _REGISTER['B'] = value[:2] + 'H'
-        _REGISTER['C'] = value[2:] 
-    elif rp == 'D':
-        _REGISTER['D'] = value[:2] + 'H'
-        _REGISTER['E'] = value[2:] 
-    elif rp == 'H':
-        _REGISTER['H'] = value[:2] + 'H'
-        _REGISTER['L'] = value[2:]
-
-def check_carry(result: str | int, bit: int = 2):
-    """Set carry flag if result overflows (8-bit: >0xFF, 16-bit: >0xFFFF)."""
-    if isinstance(result, str):
-        result = decode(result)
-    if bit == 4:
-        _FLAG['C'] = int( result > 0xFFFF )
-    elif bit == 2: 
-        _FLAG['C'] = int( result > 0xFF )
-
-def check_aux_carry(op1: str | int, op2: str | int):
-    """Set auxiliary carry flag if lower nibble sum > 0x0F."""
-    if isinstance(op1, str): op1 = decode(op1)
-    if isinstance(op2, str): op2 = decode(op2)
-    low_nibble_sum = (op1 & 0x0F) + (op2 & 0x0F)
-    _FLAG['AC'] = int( low_nibble_sum > 0x0F )
-
-def check_parity(result: str | int):
-    """Set parity flag if number of 1-bits is even.""" 
-    if isinstance(result, str): result = decode(result)
-    _FLAG['P'] = int( bin(result).count('1') % 2 == 0 )
-    
-def check_zero(result: str | int):
-    """Set zero flag if result is zero."""
-    if isinstance(result, str): result = decode(result)
-    _FLAG['Z'] = int( result == 0 )
-
-def check_sign(result: str | int):
-    """Set sign flag based on MSB (bit 7) of result."""
-    if isinstance(result, str): result = decode(result)
-    _FLAG['S'] = (result >> 7) & 1
\ No newline at end of file
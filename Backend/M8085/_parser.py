@@ -4,19 +4,99 @@ Parses assembly code into structured format, validates operands,
 and prepares instructions for the assembler.
 """
 
+import os
+import re
+
 import pyparsing as pp
 
 from ._utils import encode, decode, INSTRUCTION, Message
-from ._memory import Assembler
+from ._memory import MachineState, Assembler
 
 IDENTIFIER = pp.Word(pp.alphas + "_", pp.alphanums + "_")  # label
 HEX_ADDRESS = pp.Regex(r'[0-9A-F]+H') # e.g. 2000H
-REGISTER = pp.Word("ABCDEHLM", exact=1) | pp.Literal("SP") | pp.Literal("PSW") | pp.Literal('PC')
-MNEMONICS =  pp.MatchFirst(
-map(lambda m:pp.Keyword(m), INSTRUCTION.keys())
+REGISTER = frozenset('ABCDEHLM') | {'SP', 'PSW', 'PC'}
+# One regex instead of a MatchFirst of Keywords. Longest first so e.g. INR
+# is not read as IN; the lookahead keeps Keyword's whole-word semantics.
+MNEMONICS = pp.Regex(
+    r'(?:%s)(?![\w$])' % '|'.join(map(re.escape, sorted(INSTRUCTION, key=len, reverse=True)))
 ) ('inst')
 MEMORY_RANGE:range = range(65536)
 PORT_RANGE:range = range(256)
+FAST_LEXER = os.getenv('M8085_FAST_LEXER', '1') == '1'
+
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*').fullmatch
+_HEX_ADDRESS = re.compile(r'[0-9A-F]+H').fullmatch
+
+def _build_rules() -> pp.ParserElement:
+    """Build the line grammar. Done once at import and shared by every Parser."""
+    # Label definition: LABEL:
+    label = pp.Combine(IDENTIFIER + pp.Suppress(":")) ('label')
+    #operands
+    operand = IDENTIFIER | HEX_ADDRESS
+    #instruction
+    instruction = (
+    MNEMONICS + pp.Optional(operand('op1') + pp.Optional(pp.Suppress(",") + operand('op2')))
+    )('code')
+    # Comment: ; rest of line
+    comment = pp.Group(pp.Suppress(";") + pp.restOfLine) ('comment')
+
+    rules = (
+        label + instruction + comment |
+        label + instruction |
+        label + comment |
+        instruction + comment |
+        label |
+        instruction |
+        comment
+    )
+    rules.streamline()
+    return rules
+
+RULES = _build_rules()
+
+def tokenize(line:str) -> dict | None:
+    """Hand-written lexer for the common, well-formed line shapes.
+
+    Returns the same dict RULES.parseString(line).asDict() would, or None
+    when the line is anything but plainly well-formed (including every
+    line pyparsing would reject or only partially consume), in which case
+    the caller falls back to the grammar for the result or the error.
+    """
+    body, semicolon, comment = line.expandtabs().partition(';') # as pyparsing does
+    parsed = {}
+
+    head, colon, rest = body.partition(':')
+    if colon:
+        label = head.lstrip(' ')
+        if not _IDENTIFIER(label):
+            return None
+        parsed['label'] = label
+        body = rest
+
+    inst, _, operands = body.strip(' ').partition(' ')
+    if inst:
+        if inst not in INSTRUCTION:
+            return None
+        code = [inst]
+        operands = operands.strip(' ')
+        if operands:
+            ops = operands.split(',')
+            if len(ops) > 2:
+                return None
+            for op in ops:
+                op = op.strip(' ')
+                if not (_IDENTIFIER(op) or _HEX_ADDRESS(op)):
+                    return None
+                code.append(op)
+
+        parsed['inst'] = inst
+        if len(code) > 1: parsed['op1'] = code[1]
+        if len(code) > 2: parsed['op2'] = code[2]
+        parsed['code'] = code
+
+    if semicolon:
+        parsed['comment'] = [comment]
+    return parsed
 
 class Parser:
     """Parses 8085 assembly source code.
@@ -25,27 +105,9 @@ class Parser:
     Validates operand types against instruction requirements.
     """
 
-    def __init__(self,code:str):
-        # Label definition: LABEL:
-        label = pp.Combine(IDENTIFIER + pp.Suppress(":")) ('label')
-        #operands
-        operand = IDENTIFIER | HEX_ADDRESS
-        #instruction
-        instruction = (
-        MNEMONICS + pp.Optional(operand('op1') + pp.Optional(pp.Suppress(",") + operand('op2')))
-        )('code')
-        # Comment: ; rest of line
-        comment = pp.Group(pp.Suppress(";") + pp.restOfLine) ('comment')
-
-        self._rules = (
-            label + instruction + comment |
-            label + instruction |
-            label + comment |
-            instruction + comment |
-            label |
-            instruction |
-            comment
-        )
+    def __init__(self,code:str, state:MachineState, fast:bool = FAST_LEXER):
+        self._rules = RULES
+        self._fast = fast
 
         self._code = code.upper()
         self._operand = {
@@ -59,27 +121,33 @@ class Parser:
 
         self.__halt = False
 
-        self.__pc = Assembler()
+        self.__pc = Assembler(state)
+        self.__registers = state.registers
+        self.lines: dict[int, tuple[int, str]] = {} # address -> (source line, text)
 
     def __preprocess(self):
-        return filter(lambda line: line.strip() != '', self._code.splitlines())
+        # (source line number, line) of the non-blank lines
+        return filter(lambda item: item[1].strip() != '', enumerate(self._code.splitlines(), start=1))
 
-    def __add_line_info(self,parsed:dict, line:str, idx:int):
+    def __add_line_info(self,parsed:dict, line:str, idx:int, lineno:int):
         parsed['pos'] = f"line: {idx}"
         parsed['line'] = line.strip()
+        parsed['lineno'] = lineno
         return parsed
 
     def parse(self):
-        for idx, line in enumerate(self.__preprocess(), start=1):
+        for idx, (lineno, line) in enumerate(self.__preprocess(), start=1):
             try:
-                parsed = self._rules.parseString(line)
-                wrapped = self.__add_line_info(parsed.asDict(), line, idx)
+                parsed = tokenize(line) if self._fast else None
+                if parsed is None:
+                    parsed = self._rules.parseString(line).asDict()
+                wrapped = self.__add_line_info(parsed, line, idx, lineno)
                 result = self._param_check(wrapped)
                 if isinstance(result,Message):
                     return result
             except pp.ParseException as p:
                 key = p.found[1:-1] # p.found is in quotes by default. Removed them.
-                if key in map(lambda m:m, INSTRUCTION.keys()):
+                if key in INSTRUCTION:
                     expected = INSTRUCTION[key]['syntax']
                     return Message('Invalid Syntax',key,f'line: {idx}',p.line,format=expected)
                 else:
@@ -105,6 +173,8 @@ class Parser:
                     operand = code[i+1]
                     rule = param_rule[i]
                     result = self._operand.get( rule )( operand )
+                    if rule == 'rp' and operand not in INSTRUCTION[inst]: # LDAX/STAX take B and D only
+                        result = False
                     if not result:
                         syntax = INSTRUCTION[inst]['syntax']
                         return Message('Invalid',inst,line['pos'],line['line'],tag=rule,format=syntax)
@@ -114,7 +184,9 @@ class Parser:
                 if isinstance(result, Message): return result
                 else:
                     line['inst'], line['code'] = result
-        
+
+            self.lines[self.__registers['PC']] = (line['lineno'], line['line'])
+
         self.__pc.pass1(line)
 
     def __check_addr8(self,operand:str): 
@@ -127,11 +199,7 @@ class Parser:
             return decode(operand) in MEMORY_RANGE
         return False
 
-    def __check_register(self,operand:str): 
-        try:
-            REGISTER.parseString(operand,parseAll=True)
-            return True
-        except pp.ParseException: return False
+    def __check_register(self,operand:str): return operand in REGISTER
 
     def __check_reference(self,operand:str): return self._code.find(operand) != -1
 
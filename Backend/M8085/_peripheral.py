@@ -1,20 +1,20 @@
 """I/O instructions: IN, OUT."""
 
 from ._base import Instruction
-from ._memory import Memory, Register
+from ._memory import MachineState, Memory, Register
 
 class Peripheral(Instruction):
     """Implements I/O port operations (IN reads port to A, OUT writes A to port)."""
 
-    def __init__(self):
-        self._port:Memory = Memory()
-        self._register:Register = Register()
+    def __init__(self, state:MachineState):
+        self._port:Memory = Memory(state)
+        self._register:Register = Register(state)
 
-    def __in(self, port:str):
+    def __in(self, port:int):
         self._register['A'] = port
 
-    def __out(self, port: str):
-        self._port[port] = self._register['A']
+    def __out(self, port: int):
+        self._port.output(port, self._register['A'])
 
     def get_inst(self):
         return {
@@ -0,0 +1,134 @@
+"""Execution profiler for the 8085 simulator.
+
+Profiling is off by default (set M8085_PROFILE=1, or pass profile=True to
+Processor). When on, the execute loop reports every step with its address,
+length and handler wall time. Counts are kept per address only; everything
+else (per mnemonic, basic blocks, loops) is derived from them, and from the
+taken branches, when the report is built.
+
+Times are host wall time spent in the Python handlers, useful for finding
+slow simulator code, not 8085 clock cycles.
+"""
+
+import os
+
+from ._utils import encode
+
+PROFILE = os.getenv('M8085_PROFILE', '0') == '1'
+PROFILE_TOP = int(os.getenv('M8085_PROFILE_TOP', '20'))
+
+class Profiler:
+    """Per-address execution counts and handler time, plus taken branches."""
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.times: dict[int, float] = {}
+        self.edges: dict[tuple[int, int], int] = {} # (from, to) -> times taken
+        self.lengths: dict[int, int] = {}
+        self.__last = None
+        self.__next = None
+
+    def record(self, pc:int, length:int, elapsed:float):
+        if pc != self.__next and self.__last is not None:
+            edge = (self.__last, pc)
+            self.edges[edge] = self.edges.get(edge, 0) + 1
+        self.counts[pc] = self.counts.get(pc, 0) + 1
+        self.times[pc] = self.times.get(pc, 0.0) + elapsed
+        self.lengths[pc] = length
+        self.__last = pc
+        self.__next = (pc + length) & 0xFFFF
+
+    def clear(self):
+        self.__init__()
+
+    def blocks(self) -> list[tuple[int, ...]]:
+        """Executed addresses split into basic blocks, in address order.
+
+        A block starts at a branch target or after a taken branch, and ends
+        where execution left it or the code is not contiguous.
+        """
+        leaders = {dst for _, dst in self.edges}
+        enders = {src for src, _ in self.edges}
+        blocks, block = [], []
+        for pc in sorted(self.counts):
+            if block and (pc in leaders or block[-1] in enders
+                          or block[-1] + self.lengths[block[-1]] != pc):
+                blocks.append(tuple(block))
+                block = []
+            block.append(pc)
+        if block:
+            blocks.append(tuple(block))
+        return blocks
+
+    def report(self, stack:dict, lines:dict[int, tuple[int, str]] | None = None,
+               top:int = PROFILE_TOP) -> dict:
+        """Hot-spot report. `stack` names each address's instruction; `lines`
+        maps addresses to (source line, text) as recorded by the Parser."""
+        lines = lines or {}
+        counts, times = self.counts, self.times
+
+        def inst(pc):
+            code = stack.get(encode(pc, bit=4))
+            return code[0] if isinstance(code, list) else None
+
+        def source(pcs):
+            return sorted({lines[pc][0] for pc in pcs if pc in lines})
+
+        mnemonics = {}
+        for pc, count in counts.items():
+            entry = mnemonics.setdefault(inst(pc), [0, 0.0])
+            entry[0] += count
+            entry[1] += times[pc]
+
+        addresses = sorted(counts, key=counts.get, reverse=True)[:top]
+
+        blocks = []
+        for block in self.blocks():
+            blocks.append({
+                "start": encode(block[0], bit=4),
+                "end": encode(block[-1], bit=4),
+                "lines": source(block),
+                "count": counts[block[0]],
+                "steps": sum(counts[pc] for pc in block),
+                "seconds": sum(times[pc] for pc in block),
+            })
+        blocks.sort(key=lambda b: b["steps"], reverse=True)
+
+        # A backward taken branch closes a loop over [target, branch].
+        loops = []
+        for (src, dst), taken in self.edges.items():
+            if dst > src:
+                continue
+            body = [pc for pc in counts if dst <= pc <= src]
+            loops.append({
+                "start": encode(dst, bit=4),
+                "end": encode(src, bit=4),
+                "lines": source(body),
+                "iterations": taken,
+                "steps": sum(counts[pc] for pc in body),
+                "seconds": sum(times[pc] for pc in body),
+            })
+        loops.sort(key=lambda l: l["steps"], reverse=True)
+
+        return {
+            "steps": sum(counts.values()),
+            "seconds": sum(times.values()),
+            "instructions": [
+                {"instruction": name, "count": count, "seconds": seconds}
+                for name, (count, seconds) in sorted(
+                    mnemonics.items(), key=lambda item: item[1][1], reverse=True)
+            ],
+            "addresses": [
+                {
+                    "address": encode(pc, bit=4),
+                    "instruction": inst(pc),
+                    "line": lines[pc][0] if pc in lines else None,
+                    "source": lines[pc][1] if pc in lines else None,
+                    "count": counts[pc],
+                    "seconds": times[pc],
+                }
+                for pc in addresses
+            ],
+            "blocks": blocks[:top],
+            "loops": loops[:top],
+        }
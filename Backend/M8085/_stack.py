@@ -1,46 +1,59 @@
-"""Stack and control instructions: PUSH, POP, XTHL, SPHL, PCHL, ORG, DB, HLT, RST."""
+"""Stack and control instructions: PUSH, POP, XTHL, SPHL, PCHL, ORG, DB, NOP, HLT, RST."""
 
 from ._base import Instruction
-from ._utils import encode,decode
-from ._memory import Flag, Memory, Register, decode_rp, encode_rp
+from ._dispatch import Dispatch
+from ._memory import MachineState, Flag, Memory, Register, MEMORY_SIZE, DB_ORIGIN
 
 class Stack(Instruction):
     """Implements stack operations and assembler directives (ORG, DB)."""
-    def __init__(self):
-        self._stack:Memory = Memory()
-        self._register:Register = Register()
-        self._flag:Flag = Flag()
+
+    branches = frozenset(['PCHL'])
+
+    def __init__(self, state:MachineState):
+        self._stack:Memory = Memory(state)
+        self._register:Register = Register(state)
+        self._flag:Flag = Flag(state)
+        self._state = state
+        self._forms = Dispatch(state, {})
 
     def __push(self, rp:str):
-        self._register['SP'] = encode(decode(self._register['SP'])-1, bit=4)
-        self._stack[self._register['SP']] = decode_rp(rp=rp)
+        self._form('PUSH', rp)()
 
     def __pop(self,rp:str):
-        encode_rp(value=self._stack[self._register['SP']], rp=rp)
-        self._register['SP'] = encode(decode(self._register['SP'])+1, bit=4)
+        self._form('POP', rp)()
 
     def __xthl(self):
-        data = decode_rp(rp='H')
-        data, self._register['SP'] = self._register['SP'], data
-        encode_rp(data,rp='H')
+        sp = self._register['SP']
+        data = self._register.decode_rp(rp='H')
+        top = self._stack.load(sp) | (self._stack.load((sp + 1) & 0xFFFF) << 8)
+        self._stack.store(sp, data & 0xFF)
+        self._stack.store((sp + 1) & 0xFFFF, data >> 8)
+        self._register.encode_rp(top, rp='H')
 
     def __sphl(self):
-        self._register['SP'] = decode_rp(rp='H')
+        self._register['SP'] = self._register.decode_rp(rp='H')
     
     def __pchl(self):
-        self._register['PC'] = decode_rp(rp='H')
+        self._register['PC'] = self._register.decode_rp(rp='H')
 
-    def __org(self,addr):
-        self._stack['IDX'] = addr
+    def __org(self,addr:int):
+        self._state.origin = addr
     
-    def __db(self,*arg):
-        if self._stack['IDX'] == '00H':
-            self._stack['IDX'] = 'C000H'
-        for num in arg:
-            curr = self._stack['IDX']
-            self._stack[curr] = num
-            self._stack['IDX'] = encode( ( decode(curr) + 1 ) & 0xffff, bit=4 )
+    def __db(self,*arg:int):
+        data = bytes(arg)
+        origin = self._state.origin
+        end = origin + len(data)
+        if end > MEMORY_SIZE: # wrap around the top of the address space
+            split = MEMORY_SIZE - origin
+            self._stack.fill(origin, data[:split])
+            self._stack.fill(0, data[split:])
+        else:
+            self._stack.fill(origin, data)
+        self._state.origin = end & 0xFFFF
     
+    def __nop(self):
+        self._form('NOP')()
+
     def __hlt(self):
         pass
     
@@ -69,6 +82,7 @@ class Stack(Instruction):
             "PCHL": self.__pchl,
             "ORG": self.__org,
             "DB": self.__db,
+            "NOP": self.__nop,
             "HLT": self.__hlt,
             "RST5.5": self.__rst55,
         }
\ No newline at end of file
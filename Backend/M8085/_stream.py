@@ -0,0 +1,164 @@
+"""Per-step state deltas for streamed execution.
+
+Processor.stream() runs one instruction at a time and yields a Step with
+what that instruction changed: registers, flags, memory and ports, new
+values and the old ones they replaced. Memory is not diffed whole: ahead
+of each step, Before reads only the bytes the instruction can write (HL
+for MOV M,r, the stack slots for PUSH and CALL, the operand address for
+STA and SHLD, ...). Only DB, which writes a run of bytes at its origin,
+falls back to comparing all of memory.
+
+A Frame coalesces the Steps sent in one update, keeping the last value of
+everything that changed, so a client at 30 frames per second gets 30
+small messages however many instructions ran in between.
+"""
+
+from typing import NamedTuple
+
+from ._utils import encode
+from ._memory import MachineState, _WIDE
+
+_CALLS = ('CALL', 'CNZ', 'CZ', 'CNC', 'CC', 'CPO', 'CPE', 'CP', 'CM')
+
+class Step(NamedTuple):
+    """One executed instruction and what it changed (int values)."""
+    pc: int
+    decoded: tuple # the Decoded record that ran
+    registers: dict[str, int]
+    flags: dict[str, int]
+    memory: dict[int, int]
+    ports: dict[int, int]
+    undo: tuple[dict, dict, dict, dict] # old values of the same registers, flags, memory, ports
+
+def writes(decoded:tuple, registers:dict) -> tuple[int, ...] | None:
+    """Addresses an instruction may write, None if it cannot be told
+    without running it (DB)."""
+    inst, operands, args = decoded.inst, decoded.operands, decoded.args
+    if inst == 'DB':
+        return None
+    if inst in ('MOV', 'MVI', 'INR', 'DCR'):
+        if operands and operands[0] == 'M':
+            return ((registers['H'] << 8) | registers['L'],)
+        return ()
+    if inst == 'STA':
+        return (args[0],)
+    if inst == 'SHLD':
+        return (args[0], (args[0] + 1) & 0xFFFF)
+    if inst == 'STAX':
+        high, low = ('B', 'C') if operands[0] == 'B' else ('D', 'E')
+        return ((registers[high] << 8) | registers[low],)
+    if inst == 'PUSH' or inst in _CALLS:
+        sp = registers['SP']
+        return ((sp - 1) & 0xFFFF, (sp - 2) & 0xFFFF)
+    if inst == 'XTHL':
+        sp = registers['SP']
+        return (sp, (sp + 1) & 0xFFFF)
+    return ()
+
+class Before:
+    """The part of a MachineState one instruction can change, taken before
+    it runs."""
+
+    __slots__ = ('state', 'registers', 'flags', 'addresses', 'memory', 'port')
+
+    def __init__(self, state:MachineState, decoded:tuple | None):
+        self.state = state
+        self.registers = dict(state.registers)
+        self.flags = dict(state.flags)
+        self.addresses = writes(decoded, state.registers) if decoded is not None else ()
+        if self.addresses is None:
+            self.memory = bytes(state.memory)
+        else:
+            self.memory = [state.memory[address] for address in self.addresses]
+        self.port = None
+        if decoded is not None and decoded.inst == 'OUT':
+            self.port = decoded.args[0] & 0xFF, state.ports[decoded.args[0] & 0xFF]
+
+    def step(self, pc:int, decoded:tuple) -> Step:
+        """What changed since the snapshot was taken."""
+        state = self.state
+        memory = state.memory
+        if self.addresses is None:
+            before = self.memory
+            old = {address: before[address]
+                   for address in range(len(memory)) if memory[address] != before[address]} \
+                if memory != before else {}
+        else:
+            old = {address: value
+                   for address, value in zip(self.addresses, self.memory) if memory[address] != value}
+        ports = {}
+        if self.port is not None and state.ports[self.port[0]] != self.port[1]:
+            ports[self.port[0]] = self.port[1]
+        registers = {name: old for name, old in self.registers.items() if state.registers[name] != old}
+        flags = {name: old for name, old in self.flags.items() if state.flags[name] != old}
+        return Step(
+            pc,
+            decoded,
+            {name: state.registers[name] for name in registers},
+            {name: state.flags[name] for name in flags},
+            {address: memory[address] for address in old},
+            {port: state.ports[port] for port in ports},
+            (registers, flags, old, ports),
+        )
+
+def instruction(decoded:tuple) -> str:
+    """Source form of a decoded instruction, e.g. 'MVI A,05H'."""
+    width = 4 if decoded.length == 3 else 2
+    operands = [*decoded.operands, *(encode(arg, bit=width) for arg in decoded.args)]
+    return f"{decoded.inst} {','.join(operands)}" if operands else decoded.inst
+
+class Frame:
+    """Steps coalesced into one update."""
+
+    def __init__(self):
+        self.steps = 0
+        self.last: Step | None = None
+        self.hit = None # the breakpoint or watchpoint that ended the frame
+        self.registers: dict[str, int] = {}
+        self.flags: dict[str, int] = {}
+        self.memory: dict[int, int] = {}
+        self.ports: dict[int, int] = {}
+
+    def add(self, step:Step):
+        self.steps += 1
+        self.last = step
+        self.registers.update(step.registers)
+        self.flags.update(step.flags)
+        self.memory.update(step.memory)
+        self.ports.update(step.ports)
+
+    def merge(self, other:'Frame'):
+        self.steps += other.steps
+        self.last = other.last or self.last
+        self.hit = other.hit or self.hit
+        self.registers.update(other.registers)
+        self.flags.update(other.flags)
+        self.memory.update(other.memory)
+        self.ports.update(other.ports)
+
+    def touch(self, state:MachineState, touched):
+        """Add the current values of touched registers, flags, memory and
+        ports (sets of names and addresses), as after stepping back."""
+        registers, flags, memory, ports = touched
+        self.registers.update((name, state.registers[name]) for name in registers)
+        self.flags.update((name, state.flags[name]) for name in flags)
+        self.memory.update((address, state.memory[address]) for address in memory)
+        self.ports.update((port, state.ports[port]) for port in ports)
+
+    def as_dict(self) -> dict:
+        """The changes in the layout of the execute response's newState."""
+        memory = {encode(address, bit=4): encode(value) for address, value in sorted(self.memory.items())}
+        memory.update((encode(port), encode(value)) for port, value in sorted(self.ports.items()))
+        frame = {
+            "type": "frame",
+            "steps": self.steps,
+            "pc": encode(self.last.pc, bit=4) if self.last else None,
+            "instruction": instruction(self.last.decoded) if self.last else None,
+            "registers": {name: encode(value, bit=4 if name in _WIDE else 2)
+                          for name, value in self.registers.items()},
+            "flags": dict(self.flags),
+            "memory": memory,
+        }
+        if self.hit is not None:
+            frame["break"] = self.hit.as_dict()
+        return frame
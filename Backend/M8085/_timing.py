@@ -2,37 +2,51 @@
 
 Generates visual timing diagrams showing clock cycles, address bus,
 data bus, and control signals for each instruction.
+
+The waveforms themselves live in _waveform.py. A diagram depends only on
+the instruction's machine-cycle sequence (its `state` list), and many
+mnemonics share one, so rendered diagrams are cached per sequence. The
+cache can be warmed up front, and backed by a directory of pre-rendered
+PNGs (M8085_TIMING_CACHE).
 """
 
+import base64
+import io
+import os
+import threading
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 from matplotlib import gridspec
-import numpy as np
-import yaml
 
 from ._utils import INSTRUCTION
+from ._waveform import CYCLES, COLORS, SIGNALS, HEIGHT, Cycle, cycles, etag
+
+TIMING_CACHE_DIR = os.getenv('M8085_TIMING_CACHE') # directory of pre-rendered PNGs
+
+# pyplot keeps global "current figure" state, so renders must not interleave
+# when diagrams are requested from several worker threads.
+_PYPLOT_LOCK = threading.Lock()
 
 class TimingDiagram:
     """Generates timing diagrams as base64-encoded PNG images."""
+
+    _diagrams: dict[tuple[str, ...], str] = {} # cycle sequence -> data URL, shared
+
     def __init__(self):
-        self.colors = ['#FF0000', '#0000FF', '#0000FF', '#008000', '#008000', '#FFA500', '#FF00FF', '#FF00FF', '#A52A2A', '#00FFFF']
+        self.colors = list(COLORS)
 
     def get_table(self, instructions):
-        decoded_timing = INSTRUCTION[instructions]['state']
-        plot_functions = {
-            'opcode': self.__plot_opcodefetch,
-            'read': self.__plot_read,
-            'write': self.__plot_write,
-            'io_read': self.__plot_io_read,
-            'io_write': self.__plot_io_write,
-            'time_label': self.__plot_time_label
-        }
+        return self.get_figure(INSTRUCTION[instructions]['state'])
+
+    def get_figure(self, decoded_timing):
         fig = plt.figure(figsize=(15, 8)) 
         dynamic_wratio = [6 if op =='opcode' else 4.5 for op in decoded_timing]
         gs = gridspec.GridSpec(1, len(decoded_timing), width_ratios=dynamic_wratio)
-        plot_functions['time_label']()
+        self.__plot_time_label()
         for i, operation in enumerate(decoded_timing):
             plt.subplot(gs[i])
-            plot_functions[operation]()
+            self.__plot_cycle(CYCLES[operation])
         plt.subplots_adjust(wspace=0, hspace=0)
         return fig
 
@@ -61,212 +75,85 @@ class TimingDiagram:
         self.__plot_data(x_data, y_data, self.colors)
         self.__set_plot_limits(title, xlim, ylim)
 
-    def __plot_opcodefetch(self):
-        title = 'Opcode Fetch'
-        column_label = ['T1', 'T2', 'T3', 'T4']
+    def __plot_cycle(self, cycle:Cycle):
         row_label = ['' for _ in range(8)]
-        x_data, y_data = self.__get_opcodefetch_data()
-        x_lim , y_lim = [0, 6], [0,8]
-        self.__plot_timing_diagram(title, column_label, row_label, x_data, y_data, x_lim, y_lim)
+        x_data = [x for x, _ in cycle.traces]
+        y_data = [y for _, y in cycle.traces]
+        x_lim , y_lim = [0, cycle.width], [0, HEIGHT]
+        self.__plot_timing_diagram(cycle.title, list(cycle.states), row_label, x_data, y_data, x_lim, y_lim)
 
     def __plot_time_label(self):
         column_label = ['']
-        row_label = ['Clock', 'A₁₅-A₈', 'A₇-A₀', 'ALE', 'IO/M\'S₁S₀', 'RD\'', 'WR\'']
+        row_label = list(SIGNALS)
         x_data, y_data = [], []
-        x_lim , y_lim = [0, 1.5], [0,8]
+        x_lim , y_lim = [0, 1.5], [0, HEIGHT]
         self.__plot_timing_diagram("", column_label, row_label, x_data, y_data, x_lim, y_lim)
 
-    def __plot_read(self):
-        title = 'Read'
-        column_label = ['T1', 'T2', 'T3']
-        row_label = ['' for _ in range(8)]
-        x_data, y_data = self.__get_read_data()
-        x_lim , y_lim = [0, 4.5], [0,8]
-        self.__plot_timing_diagram(title, column_label, row_label, x_data, y_data, x_lim, y_lim)
-        
-    def __plot_write(self):
-        title = 'Write'
-        column_label = ['T1', 'T2', 'T3']
-        row_label = ['' for _ in range(8)]
-        x_data, y_data = self.__get_write_data()
-        x_lim , y_lim = [0, 4.5], [0,8]
-        self.__plot_timing_diagram(title, column_label, row_label, x_data, y_data, x_lim, y_lim)
-
-    def __plot_io_read(self):
-        title = 'IO Read'
-        column_label = ['T1', 'T2', 'T3']
-        row_label = ['' for _ in range(8)]
-        x_data, y_data = self.__get_io_read_data()
-        x_lim , y_lim = [0, 4.5], [0,8]
-        self.__plot_timing_diagram(title, column_label, row_label, x_data, y_data, x_lim, y_lim)
-        
-    def __plot_io_write(self):
-        title = 'IO Write'
-        column_label = ['T1', 'T2', 'T3']
-        row_label = ['' for _ in range(8)]
-        x_data, y_data = self.__get_io_write_data()
-        x_lim , y_lim = [0, 4.5], [0,8]
-        self.__plot_timing_diagram(title, column_label, row_label, x_data, y_data, x_lim, y_lim)
-
-    def __get_opcodefetch_data(self):
-        x_data = [
-            np.array([0, 0.15, 0.75, 0.90, 1.5, 1.65, 2.25, 2.40, 3, 3.15, 3.75, 3.90, 4.5, 4.65, 5.25, 5.40, 6]),
-            np.array([0, 0.15, 0.25, 4.65, 4.75, 6]),
-            np.array([0, 0.15, 0.25, 4.65, 4.75, 6]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 6]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 6]),
-            np.array([0, 0.15, 0.75, 0.90, 6]),
-            np.array([0, 0.15, 0.25,  6]),
-            np.array([0, 0.15, 0.25,  6]),
-            np.array([0, 0.15,1.75,2.25,2.45, 3.65,3.85, 6]),
-            np.array([0, 0.15,  6])
-            ]   
-        y_data = [
-            np.array([6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8]),
-            np.array([5.8, 5.8, 5.1, 5.1, 5.8, 5.8]),
-            np.array([5.1, 5.1, 5.8, 5.8, 5.1, 5.1]),
-            np.array([4.8, 4.8, 4.1, 4.1, 4.45, 4.45, 4.1, 4.1, 4.45, 4.45]),
-            np.array([4.1, 4.1, 4.8, 4.8, 4.45, 4.45, 4.8, 4.8, 4.45, 4.45]),
-            np.array([3.1, 3.8, 3.8, 3.1, 3.1]),
-            np.array([2.8, 2.8, 2.1, 2.1]),
-            np.array([2.1, 2.1, 2.8, 2.8]),
-            np.array([1.1, 1.8, 1.8,1.8,1.1, 1.1,1.8, 1.8]),
-            np.array([0.1, 0.8, 0.8])
-        ]
-        return x_data, y_data
-
-    def __get_read_data(self):
-        x_data = [
-            np.array([0, 0.15, 0.75, 0.90, 1.5, 1.65, 2.25, 2.40, 3, 3.15, 3.75, 3.90, 4.5]),
-            np.array([0, 0.15, 0.25, 4.5]),
-            np.array([0, 0.15, 0.25, 4.5]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 4.5]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 4.5]),
-            np.array([0, 0.15, 0.75, 0.90, 4.5]),
-            np.array([0, 0.15, 0.25,  4.5]),
-            np.array([0, 0.15, 0.25,  4.5]),
-            np.array([0, 1.75, 2.25, 2.45, 3.65, 3.85, 4.5]),
-            np.array([0, 4.5])
-            ]   
-        y_data = [
-            np.array([6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8]),
-            np.array([5.8, 5.8, 5.1, 5.1]),
-            np.array([5.1, 5.1, 5.8, 5.8]),
-            np.array([4.45, 4.45, 4.1, 4.1, 4.45, 4.45, 4.1, 4.1, 4.45, 4.45]),
-            np.array([4.45, 4.45, 4.8, 4.8, 4.45, 4.45, 4.8, 4.8, 4.45, 4.45]),
-            np.array([3.1, 3.8, 3.8, 3.1, 3.1]),
-            np.array([2.8, 2.8, 2.1, 2.1]),
-            np.array([2.1, 2.1, 2.8, 2.8]),
-            np.array([ 1.8, 1.8,1.8,1.1, 1.1,1.8, 1.8]),
-            np.array([ 0.8, 0.8])
-        ] 
-        return x_data , y_data
-
-    def __get_write_data(self):
-        x_data = [
-            np.array([0, 0.15, 0.75, 0.90, 1.5, 1.65, 2.25, 2.40, 3, 3.15, 3.75, 3.90, 4.5]),
-            np.array([0, 0.15, 0.25, 4.5]),
-            np.array([0, 0.15, 0.25, 4.5]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 4.5]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 4.5]),
-            np.array([0, 0.15, 0.75, 0.90, 4.5]),
-            np.array([0, 0.15, 0.25,  4.5]),
-            np.array([0, 0.15, 0.25,  4.5]),
-            np.array([0, 4.5]),
-            np.array([0, 1.75, 2.25, 2.45, 3.65, 3.85, 4.5])
-            ]   
-        y_data = [
-            np.array([6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8]),
-            np.array([5.8, 5.8, 5.1, 5.1]),
-            np.array([5.1, 5.1, 5.8, 5.8]),
-            np.array([4.45, 4.45, 4.1, 4.1, 4.45, 4.45, 4.1, 4.1, 4.45, 4.45]),
-            np.array([4.45, 4.45, 4.8, 4.8, 4.45, 4.45, 4.8, 4.8, 4.45, 4.45]),
-            np.array([3.1, 3.8, 3.8, 3.1, 3.1]),
-            np.array([2.8, 2.8, 2.1, 2.1]),
-            np.array([2.1, 2.1, 2.8, 2.8]),
-            np.array([ 1.8, 1.8]),
-            np.array([ 0.8, 0.8,0.8,0.1, 0.1,0.8, 0.8])
-        ]
-        return x_data, y_data
-
-    def __get_io_read_data(self):
-        x_data = [
-            np.array([0, 0.15, 0.75, 0.90, 1.5, 1.65, 2.25, 2.40, 3, 3.15, 3.75, 3.90, 4.5]),
-            np.array([0, 0.15, 0.25, 4.5]),
-            np.array([0, 0.15, 0.25, 4.5]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 4.5]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 4.5]),
-            np.array([0, 0.15, 0.75, 0.90, 4.5]),
-            np.array([0, 0.15, 0.25,  4.5]),
-            np.array([0, 0.15, 0.25,  4.5]),
-            np.array([0, 1.75, 2.25, 2.45, 3.65, 3.85, 4.5]),
-            np.array([0, 4.5])
-            ]   
-        y_data = [
-            np.array([6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8]),
-            np.array([5.8, 5.8, 5.1, 5.1]),
-            np.array([5.1, 5.1, 5.8, 5.8]),
-            np.array([4.45, 4.45, 4.1, 4.1, 4.45, 4.45, 4.1, 4.1, 4.45, 4.45]),
-            np.array([4.45, 4.45, 4.8, 4.8, 4.45, 4.45, 4.8, 4.8, 4.45, 4.45]),
-            np.array([3.1, 3.8, 3.8, 3.1, 3.1]),
-            np.array([2.8, 2.8, 2.1, 2.1]),
-            np.array([2.1, 2.1, 2.8, 2.8]),
-            np.array([ 1.8, 1.8,1.8,1.1, 1.1,1.8, 1.8]),
-            np.array([ 0.8, 0.8])
-        ]
-        return x_data, y_data
-
-    def __get_io_write_data(self):
-        x_data = [
-            np.array([0, 0.15, 0.75, 0.90, 1.5, 1.65, 2.25, 2.40, 3, 3.15, 3.75, 3.90, 4.5]),
-            np.array([0, 0.15, 0.25, 4.5]),
-            np.array([0, 0.15, 0.25, 4.5]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 4.5]),
-            np.array([0, 0.15, 0.25, 1.65, 1.75,2.25, 2.35,3.75,3.85, 4.5]),
-            np.array([0, 0.15, 0.75, 0.90, 4.5]),
-            np.array([0, 0.15, 0.25,  4.5]),
-            np.array([0, 0.15, 0.25,  4.5]),
-            np.array([0, 4.5]),
-            np.array([0, 1.75, 2.25, 2.45, 3.65, 3.85, 4.5])
-            ]   
-        y_data = [
-            np.array([6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8]),
-            np.array([5.8, 5.8, 5.1, 5.1]),
-            np.array([5.1, 5.1, 5.8, 5.8]),
-            np.array([4.45, 4.45, 4.1, 4.1, 4.45, 4.45, 4.1, 4.1, 4.45, 4.45]),
-            np.array([4.45, 4.45, 4.8, 4.8, 4.45, 4.45, 4.8, 4.8, 4.45, 4.45]),
-            np.array([3.1, 3.8, 3.8, 3.1, 3.1]),
-            np.array([2.8, 2.8, 2.1, 2.1]),
-            np.array([2.1, 2.1, 2.8, 2.8]),
-            np.array([ 1.8, 1.8]),
-            np.array([ 0.8, 0.8,0.8,0.1, 0.1,0.8, 0.8])
-        ] 
-        return x_data, y_data
+    def render(self, states:tuple[str, ...]) -> bytes:
+        """Draw the diagram for a cycle sequence and return it as PNG."""
+        img_buffer = io.BytesIO()
+        with _PYPLOT_LOCK:
+            fig = self.get_figure(states)
+            fig.savefig(img_buffer, format='png', bbox_inches='tight', pad_inches=0.05, dpi=100)
+            plt.close(fig)
+        return img_buffer.getvalue()
+
+    def diagram(self, states:tuple[str, ...]) -> str:
+        """Cached data URL for a cycle sequence."""
+        url = self._diagrams.get(states)
+        if url is None:
+            url = self.__store(states, self.render(states))
+        return url
+
+    def __store(self, states:tuple[str, ...], png:bytes) -> str:
+        url = f"data:image/png;base64,{base64.b64encode(png).decode('utf-8')}"
+        self._diagrams[states] = url
+        return url
+
+    def warm(self, directory:str | None = TIMING_CACHE_DIR) -> int:
+        """Fill the cache for every cycle sequence in the instruction table.
+
+        With a directory, PNGs found there (named like opcode-read-read.png)
+        are loaded instead of rendered, and newly rendered ones are saved.
+        Returns the number of cached sequences.
+        """
+        path = Path(directory) if directory else None
+        if path is not None:
+            path.mkdir(parents=True, exist_ok=True)
+
+        for entry in INSTRUCTION.values():
+            states = tuple(entry['state'] or ())
+            if states in self._diagrams or not all(states):
+                continue # already cached, or a directive with no bus cycles
+
+            file = path / f"{'-'.join(states)}.png" if path is not None else None
+            if file is not None and file.is_file():
+                self.__store(states, file.read_bytes())
+                continue
+
+            png = self.render(states)
+            self.__store(states, png)
+            if file is not None:
+                file.write_bytes(png)
+
+        return len(self._diagrams)
 
     def as_dict(self, instruction):
         try:
             normalized = instruction.upper()
             if normalized not in INSTRUCTION:
                 return None
-            
-            fig = self.get_table(instruction)
-            import io, base64
-            img_buffer = io.BytesIO()
-            fig.savefig(img_buffer, format='png', bbox_inches='tight', pad_inches=0.05, dpi=100)
-            img_buffer.seek(0)
-
-            img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-            plt.close(fig)
-            img_buffer.close()
 
+            states = cycles(normalized)
             return {
                 "success": True,
                 "instruction": normalized,
                 "format": "base64",
-                "diagram": f"data:image/png;base64,{img_base64}",
+                "diagram": self.diagram(states),
+                "etag": etag(states),
             }
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
@@ -0,0 +1,74 @@
+"""T-state and machine-cycle costs of 8085 instructions.
+
+The `state` lists in commands_property.yml describe one representative
+form per mnemonic for the timing diagrams; they do not tell MOV B,C from
+MOV M,C, nor a taken conditional branch from one that falls through. The
+costs here follow the 8085 datasheet instead. Conditional jumps, calls
+and returns have a base (not taken) cost and an extra cost the execute
+loop adds when their condition holds, whether or not the target is the
+next instruction anyway.
+
+ORG and DB are assembler directives: they cost nothing and are not
+counted as instructions, in either execution mode.
+
+Simulated time is T-states divided by the clock, M8085_CLOCK_MHZ (3 MHz by
+default). M8085_MAX_CYCLES bounds a run in T-states (0 disables the bound;
+the step limit RUNTIME always applies).
+"""
+
+import os
+from typing import NamedTuple
+
+CLOCK_MHZ = float(os.getenv('M8085_CLOCK_MHZ', '3'))
+MAX_CYCLES = int(os.getenv('M8085_MAX_CYCLES', '0'))
+
+class Cost(NamedTuple):
+    """T-states and machine cycles, base and extra when a branch is taken."""
+    tstates: int
+    mcycles: int
+    taken_tstates: int = 0
+    taken_mcycles: int = 0
+
+NONE = Cost(0, 0) # ORG, DB
+
+# Register operand / M (memory through HL) operand.
+_REGISTER = Cost(4, 1), Cost(7, 2)
+_INR_DCR = Cost(4, 1), Cost(10, 3)
+
+_MNEMONIC = {
+    **dict.fromkeys(('ADD', 'ADC', 'SUB', 'SBB', 'ANA', 'XRA', 'ORA', 'CMP'), _REGISTER),
+    **dict.fromkeys(('INR', 'DCR'), _INR_DCR),
+    'MVI': (Cost(7, 2), Cost(10, 3)),
+    **dict.fromkeys(('ADI', 'ACI', 'SUI', 'SBI', 'ANI', 'XRI', 'ORI', 'CPI', 'LDAX', 'STAX'), Cost(7, 2)),
+    **dict.fromkeys(('RLC', 'RRC', 'RAL', 'RAR', 'CMA', 'CMC', 'STC', 'DAA', 'NOP', 'XCHG'), Cost(4, 1)),
+    **dict.fromkeys(('INX', 'DCX', 'SPHL', 'PCHL'), Cost(6, 1)),
+    **dict.fromkeys(('LXI', 'DAD', 'POP', 'IN', 'OUT', 'JMP', 'RET'), Cost(10, 3)),
+    **dict.fromkeys(('LDA', 'STA'), Cost(13, 4)),
+    **dict.fromkeys(('LHLD', 'SHLD', 'XTHL'), Cost(16, 5)),
+    'PUSH': Cost(12, 3),
+    'CALL': Cost(18, 5),
+    'HLT': Cost(5, 1),
+    **dict.fromkeys(('JNZ', 'JZ', 'JNC', 'JC', 'JPO', 'JPE', 'JP', 'JM'), Cost(7, 2, 3, 1)),
+    **dict.fromkeys(('CNZ', 'CZ', 'CNC', 'CC', 'CPO', 'CPE', 'CP', 'CM'), Cost(9, 2, 9, 3)),
+    **dict.fromkeys(('RNZ', 'RZ', 'RNC', 'RC', 'RPO', 'RPE', 'RP', 'RM'), Cost(6, 1, 6, 2)),
+}
+
+# Flag and value a conditional branch tests: JNZ, CNZ and RNZ branch when Z == 0.
+_CONDITION_CODES = {
+    'NZ': ('Z', 0), 'Z': ('Z', 1), 'NC': ('C', 0), 'C': ('C', 1),
+    'PO': ('P', 0), 'PE': ('P', 1), 'P': ('S', 0), 'M': ('S', 1),
+}
+CONDITIONS = {kind + code: test for code, test in _CONDITION_CODES.items() for kind in 'JCR'}
+
+def cost(inst:str, operands:tuple = ()) -> Cost:
+    """Cost of one instruction with its (pre-decoded) operands."""
+    if inst == 'MOV':
+        return Cost(7, 2) if 'M' in operands else Cost(4, 1)
+    entry = _MNEMONIC.get(inst, NONE)
+    if isinstance(entry, tuple) and not isinstance(entry, Cost):
+        register, memory = entry
+        return memory if operands and operands[0] == 'M' else register
+    return entry
+
+def microseconds(tstates:int, clock:float = CLOCK_MHZ) -> float:
+    return tstates / clock
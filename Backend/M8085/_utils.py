@@ -1,14 +1,76 @@
-"""Utility functions for hex encoding/decoding and error messaging."""
+"""Utility functions for hex encoding/decoding, data tables and error messaging."""
 
+import hashlib
+import marshal
+import os
+import sys
 from pathlib import Path
-import yaml
-from .logs import setup_logger, warn
-setup_logger()
+from .logs import warn
 
 PATH = Path(__file__).parent
+CACHE = PATH / '__pycache__'
 
-with open(f"{PATH}/commands_property.yml", "r") as f:
-    INSTRUCTION:dict = yaml.safe_load(f)
+TABLES = ("commands_property.yml", "docs.yml")
+
+def load_yaml(name: str) -> dict:
+    """Load one of the package's YAML data files through a compiled artifact.
+
+    The parsed data is marshalled to __pycache__/<stem>.<cache tag>.marshal
+    along with the source's mtime, size and content hash. Later loads read
+    the artifact instead of parsing YAML while the mtime and size match, or,
+    if they moved (e.g. files copied into a bundle), while the hash does. If
+    the artifact cannot be written (read-only install) the YAML is simply
+    parsed every time.
+    """
+    source = PATH / name
+    stat = source.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    artifact = CACHE / f"{source.stem}.{sys.implementation.cache_tag}.marshal"
+
+    try:
+        with open(artifact, 'rb') as f:
+            cached_stamp, cached_digest, data = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        cached_stamp = cached_digest = None # missing, old format or corrupt
+
+    if cached_stamp == stamp:
+        return data
+
+    text = source.read_bytes()
+    if cached_digest == hashlib.blake2b(text).digest():
+        return data
+    return compile_yaml(text, artifact, stamp)
+
+def compile_yaml(text: bytes, artifact: Path, stamp: tuple) -> dict:
+    """Parse YAML source and write its marshal artifact. Returns the data."""
+    import tempfile
+    import yaml
+    # The libyaml loader is several times faster when PyYAML was built with it.
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    data = yaml.load(text, Loader=loader)
+
+    partial = None
+    try:
+        artifact.parent.mkdir(exist_ok=True)
+        # A unique name per writer, so threads of one process don't share it either.
+        with tempfile.NamedTemporaryFile(dir=artifact.parent, prefix=f"{artifact.name}.",
+                                         suffix='.tmp', delete=False) as f:
+            partial = f.name
+            marshal.dump((stamp, hashlib.blake2b(text).digest(), data), f)
+        os.replace(partial, artifact) # atomic, concurrent workers never see half a file
+    except OSError as e:
+        warn(f"Could not cache {artifact.name}: {e}")
+        if partial is not None and os.path.exists(partial):
+            os.remove(partial)
+    return data
+
+def compile_tables() -> list[Path]:
+    """Build step: (re)compile every data table. Returns the artifact paths."""
+    for name in TABLES:
+        load_yaml(name)
+    return sorted(CACHE.glob(f"*.{sys.implementation.cache_tag}.marshal"))
+
+INSTRUCTION:dict = load_yaml("commands_property.yml")
 
 def decode(arg: str) -> int | None:
     """Convert hex string (e.g., '2000H') to integer."""
@@ -0,0 +1,161 @@
+"""Timing waveforms of 8085 machine cycles, as plain data.
+
+Each machine cycle is a set of polylines in diagram units: x runs across
+the cycle's T-states (1.5 units each) and y across the signal rows, one
+unit per signal with the clock at the top and WR' at the bottom.
+TimingDiagram draws these with matplotlib; waveform() and svg() hand them
+to clients that render themselves, without importing matplotlib at all.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from ._utils import INSTRUCTION
+
+DIAGRAM_VERSION = '1' # bump when the waveforms or their drawing change, invalidates ETags
+
+SIGNALS = ('Clock', 'A₁₅-A₈', 'A₇-A₀', 'ALE', 'IO/M\'S₁S₀', 'RD\'', 'WR\'')
+# Row of each polyline in a cycle. Buses are drawn as two crossing lines.
+TRACE_SIGNALS = (0, 1, 1, 2, 2, 3, 4, 4, 5, 6)
+COLORS = ('#FF0000', '#0000FF', '#0000FF', '#008000', '#008000', '#FFA500', '#FF00FF', '#FF00FF', '#A52A2A', '#00FFFF')
+T_STATE = 1.5 # width of one T-state
+HEIGHT = 8 # y extent of every cycle
+_ENTITY_TAG = re.compile(r'\s*(\*|(?:W/)?"[^"]*")\s*(?:,|$)')
+
+class Cycle(NamedTuple):
+    """One machine cycle: title, T-state labels and (x, y) polylines."""
+    title: str
+    states: tuple[str, ...]
+    traces: tuple[tuple[tuple[float, ...], tuple[float, ...]], ...]
+
+    @property
+    def width(self) -> float:
+        return len(self.states) * T_STATE
+
+_OPCODE_FETCH = (
+    ((0, 0.15, 0.75, 0.9, 1.5, 1.65, 2.25, 2.4, 3, 3.15, 3.75, 3.9, 4.5, 4.65, 5.25, 5.4, 6), (6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8)),
+    ((0, 0.15, 0.25, 4.65, 4.75, 6), (5.8, 5.8, 5.1, 5.1, 5.8, 5.8)),
+    ((0, 0.15, 0.25, 4.65, 4.75, 6), (5.1, 5.1, 5.8, 5.8, 5.1, 5.1)),
+    ((0, 0.15, 0.25, 1.65, 1.75, 2.25, 2.35, 3.75, 3.85, 6), (4.8, 4.8, 4.1, 4.1, 4.45, 4.45, 4.1, 4.1, 4.45, 4.45)),
+    ((0, 0.15, 0.25, 1.65, 1.75, 2.25, 2.35, 3.75, 3.85, 6), (4.1, 4.1, 4.8, 4.8, 4.45, 4.45, 4.8, 4.8, 4.45, 4.45)),
+    ((0, 0.15, 0.75, 0.9, 6), (3.1, 3.8, 3.8, 3.1, 3.1)),
+    ((0, 0.15, 0.25, 6), (2.8, 2.8, 2.1, 2.1)),
+    ((0, 0.15, 0.25, 6), (2.1, 2.1, 2.8, 2.8)),
+    ((0, 0.15, 1.75, 2.25, 2.45, 3.65, 3.85, 6), (1.1, 1.8, 1.8, 1.8, 1.1, 1.1, 1.8, 1.8)),
+    ((0, 0.15, 6), (0.1, 0.8, 0.8)),
+)
+
+# Memory and I/O cycles share their waveforms; only the title differs.
+_READ = (
+    ((0, 0.15, 0.75, 0.9, 1.5, 1.65, 2.25, 2.4, 3, 3.15, 3.75, 3.9, 4.5), (6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8, 6.1, 6.1, 6.8, 6.8)),
+    ((0, 0.15, 0.25, 4.5), (5.8, 5.8, 5.1, 5.1)),
+    ((0, 0.15, 0.25, 4.5), (5.1, 5.1, 5.8, 5.8)),
+    ((0, 0.15, 0.25, 1.65, 1.75, 2.25, 2.35, 3.75, 3.85, 4.5), (4.45, 4.45, 4.1, 4.1, 4.45, 4.45, 4.1, 4.1, 4.45, 4.45)),
+    ((0, 0.15, 0.25, 1.65, 1.75, 2.25, 2.35, 3.75, 3.85, 4.5), (4.45, 4.45, 4.8, 4.8, 4.45, 4.45, 4.8, 4.8, 4.45, 4.45)),
+    ((0, 0.15, 0.75, 0.9, 4.5), (3.1, 3.8, 3.8, 3.1, 3.1)),
+    ((0, 0.15, 0.25, 4.5), (2.8, 2.8, 2.1, 2.1)),
+    ((0, 0.15, 0.25, 4.5), (2.1, 2.1, 2.8, 2.8)),
+    ((0, 1.75, 2.25, 2.45, 3.65, 3.85, 4.5), (1.8, 1.8, 1.8, 1.1, 1.1, 1.8, 1.8)),
+    ((0, 4.5), (0.8, 0.8)),
+)
+
+_WRITE = _READ[:8] + (
+    ((0, 4.5), (1.8, 1.8)),
+    ((0, 1.75, 2.25, 2.45, 3.65, 3.85, 4.5), (0.8, 0.8, 0.8, 0.1, 0.1, 0.8, 0.8)),
+)
+
+CYCLES: dict[str, Cycle] = {
+    'opcode': Cycle('Opcode Fetch', ('T1', 'T2', 'T3', 'T4'), _OPCODE_FETCH),
+    'read': Cycle('Read', ('T1', 'T2', 'T3'), _READ),
+    'write': Cycle('Write', ('T1', 'T2', 'T3'), _WRITE),
+    'io_read': Cycle('IO Read', ('T1', 'T2', 'T3'), _READ),
+    'io_write': Cycle('IO Write', ('T1', 'T2', 'T3'), _WRITE),
+}
+
+def cycles(instruction:str) -> tuple[str, ...] | None:
+    """Machine-cycle sequence of a mnemonic, e.g. ('opcode', 'read', 'read')."""
+    entry = INSTRUCTION.get(instruction.upper())
+    return tuple(entry['state']) if entry else None
+
+def etag(states:tuple[str, ...], kind:str = 'png') -> str:
+    """Validator for a diagram, derived from its cycle sequence and format."""
+    key = '-'.join(states) + kind + DIAGRAM_VERSION
+    return 'W/"%s"' % hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+def etag_matches(if_none_match:str, tag:str) -> bool:
+    """Whether an If-None-Match header lists `tag` or is `*`. Tags are
+    compared whole and weakly (W/ ignored), as RFC 9110 has it for
+    If-None-Match; a malformed header matches nothing."""
+    opaque = tag.removeprefix('W/')
+    position = 0
+    while position < len(if_none_match):
+        found = _ENTITY_TAG.match(if_none_match, position)
+        if found is None or found.end() == position:
+            return False
+        listed = found.group(1)
+        if listed == '*' or listed.removeprefix('W/') == opaque:
+            return True
+        position = found.end()
+    return False
+
+@lru_cache(maxsize=None)
+def waveform(states:tuple[str, ...]) -> dict:
+    """JSON-ready waveforms for a cycle sequence.
+
+    Points are flattened as [x0, y0, x1, y1, ...] in diagram units; each
+    trace names its row in `signals`.
+    """
+    return {
+        'signals': list(SIGNALS),
+        'height': HEIGHT,
+        'cycles': [
+            {
+                'title': cycle.title,
+                'states': list(cycle.states),
+                'width': cycle.width,
+                'traces': [
+                    {
+                        'signal': signal,
+                        'color': color,
+                        'points': [v for point in zip(x, y) for v in point],
+                    }
+                    for (x, y), signal, color in zip(cycle.traces, TRACE_SIGNALS, COLORS)
+                ],
+            }
+            for cycle in map(CYCLES.__getitem__, states)
+        ],
+    }
+
+@lru_cache(maxsize=None)
+def svg(states:tuple[str, ...], scale:int = 40) -> str:
+    """Standalone SVG of a cycle sequence, laid out like the PNG diagram."""
+    label = T_STATE # width of the signal-name column
+    width = label + sum(CYCLES[state].width for state in states)
+    top = 1 # room for cycle titles
+
+    def px(x, y):
+        return f'{x * scale:g},{(top + HEIGHT - y) * scale:g}'
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width * scale:g} {(top + HEIGHT) * scale:g}" '
+        f'font-family="sans-serif" font-size="{scale * 0.3:g}" text-anchor="middle" fill="none">'
+    ]
+    for row, name in enumerate(SIGNALS):
+        out.append(f'<text x="{label * scale / 2:g}" y="{(top + 1.55 + row) * scale:g}" fill="black">{name}</text>')
+
+    x0 = label
+    for cycle in map(CYCLES.__getitem__, states):
+        out.append(f'<text x="{(x0 + cycle.width / 2) * scale:g}" y="{top * scale * 0.7:g}" fill="black">{cycle.title}</text>')
+        for i, name in enumerate(cycle.states):
+            x = x0 + i * T_STATE
+            out.append(f'<path d="M{px(x, HEIGHT)}V{(top + HEIGHT) * scale:g}" stroke="#ccc"/>')
+            out.append(f'<text x="{(x + T_STATE / 2) * scale:g}" y="{(top + 0.6) * scale:g}" fill="black">{name}</text>')
+        for (x, y), color in zip(cycle.traces, COLORS):
+            points = ' '.join(px(x0 + a, b) for a, b in zip(x, y))
+            out.append(f'<polyline points="{points}" stroke="{color}"/>')
+        x0 += cycle.width
+
+    out.append('</svg>')
+    return ''.join(out)
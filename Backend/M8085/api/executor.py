@@ -0,0 +1,245 @@
+"""Execution backend that keeps simulation off the asyncio event loop.
+
+Parsing, executing and timing-diagram rendering are CPU bound. Endpoints hand
+them to a pool of workers instead of running them inline, so a slow program
+cannot stall /health or other requests. The pool is either threads (default,
+shares memory with the server) or processes (true parallelism; each worker
+is warmed up with M8085 and pyparsing already imported).
+
+Batches always run on processes, the process pool itself or, with the
+thread backend, a process pool started by the first batch. A batch counts
+as one job.
+
+At most EXECUTOR_QUEUE jobs may be pending or running at once; further
+submissions are rejected with 429 so clients back off instead of piling up.
+
+Configuration (environment):
+    EXECUTOR_BACKEND    "thread" or "process" (default "thread")
+    EXECUTOR_WORKERS    pool size (default: CPU count)
+    EXECUTOR_QUEUE      max in-flight jobs (default: 4 x workers)
+    EXECUTOR_BATCH      max programs per /execute/batch request (default 1024)
+    M8085_TIMING_WARM   "1" to render every timing diagram when the pool starts
+"""
+
+import asyncio
+import base64
+import binascii
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable
+
+from fastapi import HTTPException
+
+from .. import Processor, MachineState, Snapshot, Breakpoints, EXEC_MODE
+from .._profile import PROFILE
+from .._tstates import CLOCK_MHZ, MAX_CYCLES
+from .._delta import Version
+from .._batch import Job, chunks, pool, run_chunk
+
+BACKEND = os.getenv("EXECUTOR_BACKEND", "thread")
+WORKERS = int(os.getenv("EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+QUEUE_DEPTH = int(os.getenv("EXECUTOR_QUEUE", str(WORKERS * 4)))
+BATCH_LIMIT = int(os.getenv("EXECUTOR_BATCH", "1024"))
+TIMING_WARM = os.getenv("M8085_TIMING_WARM", "0") == "1"
+
+def _warm():
+    """Pool initializer: pay the imports once per worker and optionally
+    pre-render the timing diagrams. matplotlib is otherwise only loaded by
+    the first PNG timing request."""
+    import M8085  # noqa: F401
+    if TIMING_WARM:
+        from M8085._timing import TimingDiagram
+        TimingDiagram().warm()
+
+def execute_job(code: str, state: MachineState, profile: bool = False,
+                clock: float = CLOCK_MHZ, max_cycles: int = MAX_CYCLES,
+                mode: str = EXEC_MODE, base: Version | None = None,
+                breakpoints: Breakpoints | None = None) -> tuple[dict, MachineState]:
+    """Run a program, up to the first breakpoint or watchpoint hit if any.
+    Returns the response, a delta against `base` if given, and the
+    (possibly copied) state."""
+    processor = Processor(code, state, profile=profile or PROFILE, clock=clock,
+                          max_cycles=max_cycles, mode=mode, breakpoints=breakpoints)
+    return processor.as_dict(base), state
+
+def image_job(code: str) -> dict:
+    """Assemble a program on a scratch state and encode it as Intel HEX."""
+    from .. import Message, Image
+    state = MachineState()
+    result = Processor(code, state, cache=False).assemble()
+    if not isinstance(result, Message):
+        result = Image.assemble(state.stack)
+    if isinstance(result, Message):
+        return {
+            'success': False,
+            'checkpoint': 'image',
+            'error': result.as_dict()
+        }
+    return {
+        'success': True,
+        'checkpoint': 'image',
+        'hex': result.to_hex(),
+        **result.as_dict()
+    }
+
+def load_job(format: str, data: str, address: int, state: MachineState) -> tuple[dict, MachineState]:
+    """Load an Intel HEX or base64 raw binary image into memory and point
+    PC at its first byte, ready for an image-mode run."""
+    from .. import Message, Image
+    if format == 'hex':
+        image = Image.from_hex(data)
+    else:
+        try:
+            image = Image.from_binary(base64.b64decode(data, validate=True), address)
+        except binascii.Error as e:
+            image = Message('Invalid binary image', format=str(e))
+    if isinstance(image, Message):
+        return {
+            'success': False,
+            'checkpoint': 'load',
+            'error': image.as_dict()
+        }, state
+
+    image.load(state)
+    if image.segments:
+        state.registers['PC'] = image.segments[0][0]
+    return {
+        'success': True,
+        'checkpoint': 'load',
+        **image.as_dict()
+    }, state
+
+def assemble_job(code: str, state: MachineState) -> tuple[dict, MachineState]:
+    """Parse and assemble a program into a fresh listing."""
+    from .. import Parser, Assembler, Message, assembly_cache, digest
+    assembler = Assembler(state)
+    assembler.reset()
+
+    key = digest(code)
+    cached = assembly_cache.get(key)
+    if cached is not None:
+        cached.install(state)
+        return cached.as_dict(state), state
+
+    parser = Parser(code, state)
+    result = parser.parse()
+    if isinstance(result, Message):
+        return {
+            'success' : False,
+            'checkpoint': 'assemble/parse',
+            'details' : result.as_dict()
+        }, state
+
+    result = assembler.pass2()
+    if isinstance(result, Message):
+        return {
+            'success' : False,
+            'checkpoint': 'assemble/pass2',
+            'details' : result.as_dict()
+        }, state
+
+    return assembly_cache.put(key, assembler.get_stack(), parser.lines).as_dict(state), state
+
+def timing_job(instruction: str) -> dict | None:
+    from .. import TimingDiagram
+    return TimingDiagram().as_dict(instruction)
+
+class Saturated(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=429,
+            detail="Simulator is busy, retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+class ExecutionBackend:
+    """Bounded front-end to a thread or process pool."""
+
+    def __init__(self, kind: str = BACKEND, workers: int = WORKERS, depth: int = QUEUE_DEPTH):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor backend: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.depth = depth
+        self.pending = 0
+        self._pool: Executor | None = None
+        self._batch_pool: Executor | None = None
+
+    def start(self):
+        if self._pool is not None:
+            return
+        if self.kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm,
+            )
+            # Spawn every worker now rather than on the first requests.
+            for _ in range(self.workers):
+                self._pool.submit(_warm)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="m8085")
+            if TIMING_WARM: # threads share one diagram cache
+                self._pool.submit(_warm)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._batch_pool is not None:
+            self._batch_pool.shutdown(wait=False, cancel_futures=True)
+            self._batch_pool = None
+
+    async def run(self, fn: Callable, *args):
+        """Run fn(*args) on the pool, or raise 429 if too many jobs are in flight."""
+        if self.pending >= self.depth:
+            raise Saturated()
+        self.start()
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+
+    def batch(self, batch: list[Job], options: dict, ordered: bool = True,
+              base: Snapshot | None = None) -> AsyncIterator[tuple[int, dict]]:
+        """Fan a batch out over worker processes, yielding (index, response)
+        pairs in order, or as chunks finish with ordered=False. Raises 429
+        before anything runs if too many jobs are in flight."""
+        if self.pending >= self.depth:
+            raise Saturated()
+        self.start()
+        if self.kind == "process":
+            executor = self._pool
+        else:
+            if self._batch_pool is None:
+                self._batch_pool = pool(self.workers)
+            executor = self._batch_pool
+        return self.__batch(executor, batch, options, ordered, base)
+
+    async def __batch(self, executor: Executor, batch: list[Job], options: dict, ordered: bool,
+                      base: Snapshot | None):
+        self.pending += 1
+        futures = [asyncio.wrap_future(executor.submit(run_chunk, chunk, options, base))
+                   for chunk in chunks(batch, self.workers)]
+        try:
+            for future in (futures if ordered else asyncio.as_completed(futures)):
+                for item in await future:
+                    yield item
+        finally:
+            for future in futures:
+                future.cancel()
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.kind,
+            "workers": self.workers,
+            "queueDepth": self.depth,
+            "pending": self.pending,
+        }
+
+backend = ExecutionBackend()
@@ -1,80 +1,284 @@
 """REST API endpoints for the 8085 simulator."""
 
-from pathlib import Path
-import yaml
+import json
+from functools import cache
 
-from fastapi import APIRouter, HTTPException
+from typing import Literal
+
+from fastapi import APIRouter, Header, HTTPException, Path, Query, Response, WebSocket
+from fastapi.responses import StreamingResponse
 
 from . import model as tc
-from .. import Processor, TimingDiagram, Stack
+from .session import sessions
+from .stream import serve as serve_stream
+from .executor import backend, execute_job, assemble_job, timing_job, image_job, load_job, BATCH_LIMIT
+from .. import Stack, Memory, Register, Flag, Breakpoints, assembly_cache, result_cache, EXEC_MODE
+from .._utils import decode, load_yaml
+from .._waveform import cycles, etag, etag_matches, waveform, svg
+from .._tstates import CLOCK_MHZ, MAX_CYCLES
+from .._profile import PROFILE
+from .._batch import jobs
 
 router = APIRouter()
 
-@router.post("/execute", response_model=tc.ExecuteSuccessResponse | tc.ExecuteErrorResponse)
-async def execute(request: tc.Request):
+SessionID = Header(default=None, alias="X-Session-ID")
+SNAPSHOT_NAME = r"^[A-Za-z0-9_.-]{1,64}$"
+TIMING_CACHE_CONTROL = "public, max-age=86400"
+
+@router.post("/execute", response_model=tc.ExecuteSuccessResponse | tc.ExecuteErrorResponse,
+             response_model_exclude_unset=True)
+async def execute(request: tc.ExecuteRequest, session_id: str | None = SessionID, profile: bool = False,
+                  clock: float = Query(default=CLOCK_MHZ, gt=0, description="clock in MHz"),
+                  max_cycles: int = Query(default=MAX_CYCLES, ge=0, description="T-state limit, 0 for none"),
+                  mode: Literal["decoded", "image"] = EXEC_MODE,
+                  delta: int | None = Query(default=None, ge=0, description="state version the client holds")):
     """
-    Execute 8085 assembly code using the global simulator state.
+    Execute 8085 assembly code against the caller's session state.
     Returns structured JSON errors for frontend consumption.
+    Both carry cycle totals (instructions, machine cycles, T-states and the
+    simulated time at `clock`).
+    profile=true adds a hot-spot report (per instruction, address, basic
+    block and loop, mapped to source lines), also when execution fails.
+    mode=image runs the program as bytes in memory, fetching and decoding
+    each opcode there; with empty code it runs the image loaded by /load.
+    delta=N (the version of a previous response, 0 for none) numbers the
+    new state as "version" and, when version N is still kept, returns only
+    the changes since it as "delta" instead of "newState".
+    breakpoints (by address, label or source line, with an optional
+    condition) and watch ranges stop the run at the first hit, with
+    checkpoint "execute/break" and what stopped it as "break"; a breakpoint
+    on the cursor's line runs to the cursor.
+    """
+    session = sessions.get(session_id)
+    breakpoints = Breakpoints([point.model_dump() for point in request.breakpoints],
+                              [span.model_dump() for span in request.watch]) or None
+    async with session.lock:
+        base = session.base(delta) if delta is not None else None
+        result, session.state = await backend.run(
+            execute_job, request.code, session.state, profile, clock, max_cycles, mode, base, breakpoints)
+        if delta is not None and result["success"]:
+            result["version"] = session.commit()
+    return result
+
+@router.post("/execute/batch", response_model=tc.BatchResponse, response_model_exclude_unset=True)
+async def execute_batch(request: tc.BatchRequest, session_id: str | None = SessionID,
+                        stream: bool = False, ordered: bool = True, profile: bool = False,
+                        clock: float = Query(default=CLOCK_MHZ, gt=0, description="clock in MHz"),
+                        max_cycles: int = Query(default=MAX_CYCLES, ge=0, description="T-state limit, 0 for none"),
+                        mode: Literal["decoded", "image"] = EXEC_MODE):
+    """
+    Execute many programs, or one program (code) on many initial states, in
+    parallel on worker processes. Does not touch the caller's session; each
+    job starts from its own state, zeroed unless given in states.
+    Returns every /execute response in request order, or with stream=true,
+    one NDJSON line per job ({"index": i, ...response}) as soon as it is
+    done; ordered=false streams finished chunks first.
+    With snapshot, every job starts from that snapshot of the caller's
+    session (states are applied over it) and assembles its own code.
+    """
+    states = [state.model_dump() for state in request.states] if request.states is not None else None
+    batch = jobs(request.code if request.code is not None else request.programs, states)
+    if len(batch) > BATCH_LIMIT:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_LIMIT} programs per batch")
+    base = None
+    if request.snapshot is not None:
+        session = sessions.get(session_id)
+        async with session.lock:
+            base = session.snapshots.get(request.snapshot)
+        if base is None:
+            raise HTTPException(status_code=404, detail=f"Snapshot '{request.snapshot}' not found")
+
+    options = {"profile": profile or PROFILE, "clock": clock, "max_cycles": max_cycles, "mode": mode}
+    results = backend.batch(batch, options, ordered or not stream, base)
+    if stream:
+        async def lines():
+            async for index, result in results:
+                yield json.dumps({"index": index, **result}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return {
+        "success": True,
+        "checkpoint": "execute/batch",
+        "count": len(batch),
+        "results": [result async for _, result in results],
+    }
+
+@router.websocket("/execute/stream")
+async def execute_stream(websocket: WebSocket, session: str | None = None):
     """
-    result = Processor(request.code).as_dict()
+    Execute 8085 assembly code step by step, streaming register, flag and
+    memory changes as frames, with pause/step/continue/stop from the client.
+    Browsers cannot set headers on a WebSocket, so the session comes from
+    ?session= instead of X-Session-ID. See api/stream.py for the protocol.
+    """
+    await serve_stream(websocket, sessions.get(session))
+
+@router.post("/image", response_model=tc.ImageResponse | tc.ImageErrorResponse)
+async def image(request: tc.Request):
+    """
+    Assemble 8085 assembly code into a binary image, returned as Intel HEX.
+    Does not touch the caller's session.
+    """
+    return await backend.run(image_job, request.code)
+
+@router.post("/load", response_model=tc.LoadResponse | tc.ImageErrorResponse)
+async def load(request: tc.LoadRequest, session_id: str | None = SessionID):
+    """
+    Load an Intel HEX or base64 raw binary image into the caller's memory
+    and set PC to its start. Run it with /execute?mode=image and empty code.
+    """
+    session = sessions.get(session_id)
+    async with session.lock:
+        result, session.state = await backend.run(
+            load_job, request.format, request.data, decode(request.address) & 0xFFFF, session.state)
     return result
 
 @router.get("/timing/{instruction}", response_model=tc.TimingResponse)
-async def timing_diagram(instruction: str):
+async def timing_diagram(instruction: str, response: Response,
+                         format: Literal["png", "json", "svg"] = "png",
+                         if_none_match: str | None = Header(default=None)):
     """
     Get timing diagram for a specific 8085 instruction.
     Returns structured timing data for frontend visualization.
+    format=png (default) is a rendered image; json and svg return the raw
+    waveforms, a few KB, built without matplotlib.
+    Diagrams carry an ETag; a matching If-None-Match gets 304 without rendering.
     """
-    timing_diagram = TimingDiagram()
-    timing_data = timing_diagram.as_dict(instruction)
-    if timing_data is None:
+    states = cycles(instruction)
+    if not states or not all(states): # unknown, or a directive (ORG, DB)
         raise HTTPException(status_code=404, detail=f"Timing diagram for instruction '{instruction}' not found")
+
+    headers = {"ETag": etag(states, format), "Cache-Control": TIMING_CACHE_CONTROL}
+    if if_none_match is not None and etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if format == "json":
+        timing_data = {"format": "waveform", "diagram": waveform(states)}
+    elif format == "svg":
+        timing_data = {"format": "svg", "diagram": svg(states)}
+    else:
+        timing_data = await backend.run(timing_job, instruction)
+    timing_data.setdefault("instruction", instruction.upper())
+    response.headers.update(headers)
     return timing_data
 
 @router.post("/assemble", response_model=tc.AssembleSuccessResponse | tc.AssembleErrorResponse)
-async def assemble(request: tc.Request):
+async def assemble(request: tc.Request, session_id: str | None = SessionID):
     """
     Assemble 8085 assembly code into machine code.
     Returns structured JSON with assembly results or errors.
     """
-    from .. import Parser, Assembler, Message
-    Assembler().reset()
-    result = Parser(request.code).parse()
-    if isinstance(result, Message):
-        return {
-            'success' : False,
-            'checkpoint': 'assemble/parse', 
-            'details' : result.as_dict()
-    }
-    else:
-        result = Assembler().pass2()
-        if isinstance(result, Message):
-            return {
-                'success' : False,
-                'checkpoint': 'assemble/pass2', 
-                'details' : result.as_dict()
-        }
-        
-        return Assembler().as_dict()
+    session = sessions.get(session_id)
+    async with session.lock:
+        result, session.state = await backend.run(assemble_job, request.code, session.state)
+    return result
 
 @router.post("/reset", response_model=tc.ResetResponse)
-async def reset():
+async def reset(session_id: str | None = SessionID):
     """
-    Reset all components to default values.
+    Reset all components of the caller's session to default values.
     Returns structured JSON with default processor state.
     """
-    result = Stack()['RST5.5']()
+    session = sessions.get(session_id)
+    async with session.lock:
+        result = Stack(session.state)['RST5.5']()
     return result
 
+@router.post("/snapshot", response_model=tc.SnapshotResponse)
+async def snapshot(session_id: str | None = SessionID,
+                   name: str | None = Query(default=None, pattern=SNAPSHOT_NAME)):
+    """
+    Save the caller's state (memory, registers, flags, program) as a named
+    snapshot, replacing one of the same name. Unchanged memory pages are
+    shared with the previous snapshot.
+    """
+    session = sessions.get(session_id)
+    async with session.lock:
+        name = session.save(name)
+        snapshots = list(session.snapshots)
+        previous = session.snapshots[snapshots[-2]] if len(snapshots) > 1 else None
+        return {
+            "success": True,
+            "checkpoint": "snapshot",
+            "name": name,
+            "bytes": session.snapshots[name].size(previous),
+            "snapshots": snapshots,
+        }
+
+@router.get("/snapshot", response_model=tc.SnapshotListResponse)
+async def snapshots(session_id: str | None = SessionID):
+    """List the caller's snapshots, oldest first."""
+    session = sessions.get(session_id)
+    async with session.lock:
+        return {"snapshots": list(session.snapshots)}
+
+@router.post("/snapshot/{name}/restore", response_model=tc.RestoreResponse)
+async def restore(name: str = Path(pattern=SNAPSHOT_NAME), session_id: str | None = SessionID):
+    """
+    Put the caller's state back to a snapshot. The snapshot is kept and
+    can be restored again.
+    """
+    session = sessions.get(session_id)
+    async with session.lock:
+        saved = session.snapshots.get(name)
+        if saved is None:
+            raise HTTPException(status_code=404, detail=f"Snapshot '{name}' not found")
+        state = session.state
+        state.restore(saved)
+        return {
+            "success": True,
+            "checkpoint": "restore",
+            "name": name,
+            "newState": {
+                "registers": Register(state).get_all(),
+                "flags": Flag(state).get_all(),
+                "memory": Memory(state).get_all()
+            }
+        }
+
+@router.delete("/snapshot/{name}", response_model=tc.SnapshotListResponse)
+async def drop_snapshot(name: str = Path(pattern=SNAPSHOT_NAME), session_id: str | None = SessionID):
+    """Delete a snapshot. Returns the ones left."""
+    session = sessions.get(session_id)
+    async with session.lock:
+        if session.snapshots.pop(name, None) is None:
+            raise HTTPException(status_code=404, detail=f"Snapshot '{name}' not found")
+        return {"snapshots": list(session.snapshots)}
+
+@router.get("/cache", response_model=tc.CacheStatsResponse)
+async def cache_stats():
+    """
+    Get hit/miss statistics for the assembly and execution result caches.
+    With the process executor backend each worker keeps its own caches and
+    these numbers only cover the server process.
+    """
+    return {
+        "backend": backend.kind,
+        "assembly": assembly_cache.stats(),
+        "results": result_cache.stats(),
+    }
+
+@router.delete("/cache", response_model=tc.CacheStatsResponse)
+async def cache_clear():
+    """
+    Drop every cached assembly and execution result.
+    """
+    assembly_cache.clear()
+    result_cache.clear()
+    return await cache_stats()
+
+@cache
+def instruction_docs() -> dict:
+    """docs.yml, loaded on the first documentation request."""
+    return load_yaml("docs.yml")
+
 @router.get("/docs/{instruction}", response_model=tc.DocumentationResponse)
 async def docs(instruction: str):
     """
     Get documentation for a specific 8085 instruction.
     Returns structured JSON with instruction details.
     """
-    file_path = Path(__file__).parent.parent / "docs.yml"
-    with open(file_path, "r") as f:
-        INSTRUCTION_DOCS = yaml.safe_load(f)
+    INSTRUCTION_DOCS = instruction_docs()
 
     normalized_instruction = instruction.upper()
     payload = INSTRUCTION_DOCS.get(normalized_instruction, f"Invalid Instruction {instruction}.")
@@ -1,13 +1,97 @@
 """Pydantic models for API request/response validation."""
 
-from pydantic import BaseModel
-from typing import List, Any, Dict, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Any, Dict, Literal, Optional
+
+from .. import EXEC_MODE
+from .._tstates import CLOCK_MHZ, MAX_CYCLES
 
 # Global models for type checking
 class Request(BaseModel):
     """Request model for execution endpoint."""
     code: str
 
+class BreakpointSpec(BaseModel):
+    """Where to stop: an address ("2005H"), a label, or a source line (the
+    first instruction at or after it); only while condition holds, if given,
+    e.g. "A == 05H && CY == 1"."""
+    address: Optional[str] = Field(default=None, pattern=r"^[0-9A-Fa-f]{1,4}[Hh]$")
+    label: Optional[str] = None
+    line: Optional[int] = Field(default=None, ge=1)
+    condition: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_place(self):
+        if sum(place is not None for place in (self.address, self.label, self.line)) != 1:
+            raise ValueError("give one of address, label or line")
+        return self
+
+class WatchSpec(BaseModel):
+    """Stop after a write changes a byte from start to end (inclusive)."""
+    start: str = Field(pattern=r"^[0-9A-Fa-f]{1,4}[Hh]$")
+    end: Optional[str] = Field(default=None, pattern=r"^[0-9A-Fa-f]{1,4}[Hh]$")
+
+class ExecuteRequest(Request):
+    """Request model for execution: the code, and where to stop early."""
+    breakpoints: List[BreakpointSpec] = []
+    watch: List[WatchSpec] = []
+
+class LoadRequest(BaseModel):
+    """Request model for loading a binary image. data is Intel HEX text, or
+    base64 for raw binary, which is placed at address."""
+    format: Literal["hex", "binary"] = "hex"
+    data: str
+    address: str = Field(default="0000H", pattern=r"^[0-9A-Fa-f]{1,4}[Hh]$")
+
+class InitialState(BaseModel):
+    """Starting registers, flags and memory for a batch job, in the newState
+    layout. Two-digit memory keys are I/O ports; the rest starts at zero."""
+    registers: Dict[str, str] = {}
+    flags: Dict[str, int] = {}
+    memory: Dict[str, str] = {}
+
+class BatchRequest(BaseModel):
+    """Request model for batch execution: one program (code) run on each of
+    states, or many programs, each on a fresh state or on its own state.
+    States start from the caller's named snapshot if one is given."""
+    code: Optional[str] = None
+    programs: Optional[List[str]] = None
+    states: Optional[List[InitialState]] = None
+    snapshot: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_jobs(self):
+        if (self.code is None) == (self.programs is None):
+            raise ValueError("give either code or programs")
+        if self.programs is not None and self.states is not None \
+                and len(self.programs) != len(self.states):
+            raise ValueError("programs and states must be the same length")
+        return self
+
+class StreamRequest(BaseModel):
+    """First message of a streamed execution: the program, how often to
+    send frames, and an optional cap on steps per second (0 for none)."""
+    code: str
+    fps: float = Field(default=30, gt=0, le=120)
+    rate: float = Field(default=0, ge=0)
+    paused: bool = False
+    clock: float = Field(default=CLOCK_MHZ, gt=0)
+    max_cycles: int = Field(default=MAX_CYCLES, ge=0)
+    mode: Literal["decoded", "image"] = EXEC_MODE
+    breakpoints: List[BreakpointSpec] = []
+    watch: List[WatchSpec] = []
+
+class StreamControl(BaseModel):
+    """Control message sent while a stream runs. count is for step and
+    back, index (a step position) for seek, breakpoints and watch replace
+    the current ones, and until runs to `to` (or the next hit)."""
+    action: Literal["pause", "continue", "step", "back", "seek", "stop", "breakpoints", "until"]
+    count: int = Field(default=1, ge=1)
+    index: int = Field(default=0, ge=0)
+    breakpoints: List[BreakpointSpec] = []
+    watch: List[WatchSpec] = []
+    to: Optional[BreakpointSpec] = None
+
 class ErrorDetails(BaseModel):
     """Structured error details for execution runtime or parser errors."""
     instruction: Optional[str] = None
@@ -41,17 +125,68 @@ class DocumentationResponse(BaseModel):
     instruction: str
     documentation: str
 
+class MemoryRun(BaseModel):
+    """Contiguous changed bytes, base64 encoded, starting at address."""
+    address: str
+    data: str
+
+class StateDelta(BaseModel):
+    """Changes from the base version's state: registers and flags that
+    differ, and changed memory and ports as runs of bytes."""
+    base: int
+    registers: Dict[str, str]
+    flags: Dict[str, int]
+    memory: List[MemoryRun]
+    ports: List[MemoryRun]
+
 class ExecuteSuccessResponse(BaseModel):
-    """Response model for successful execution."""
+    """Response model for successful execution: the full newState, or a
+    delta against a base version. Routes send only the fields a response
+    sets (response_model_exclude_unset), so plain runs keep their payload."""
     success: bool
     checkpoint: Optional[str] = None
-    newState: ProcessorState
+    newState: Optional[ProcessorState] = None
+    delta: Optional[StateDelta] = None
+    version: Optional[int] = None
+    cycles: Optional[Dict[str, int | float]] = None
+    profile: Optional[Dict[str, Any]] = None
+    # set when a breakpoint or watchpoint stopped the run (checkpoint "execute/break")
+    break_: Optional[Dict[str, str]] = Field(default=None, alias="break")
 
 class ExecuteErrorResponse(BaseModel):
     """Response model for execution errors."""
     success: bool
     checkpoint: Optional[str] = None
     error: ErrorDetails
+    cycles: Optional[Dict[str, int | float]] = None
+    profile: Optional[Dict[str, Any]] = None
+
+class BatchResponse(BaseModel):
+    """Response model for batch execution, results in request order."""
+    success: bool
+    checkpoint: Optional[str] = None
+    count: int
+    results: List[ExecuteSuccessResponse | ExecuteErrorResponse]
+
+class SnapshotResponse(BaseModel):
+    """Response model for a saved snapshot: its name, the memory it does not
+    share with the previous snapshot, and every snapshot kept."""
+    success: bool
+    checkpoint: Optional[str] = None
+    name: str
+    bytes: int
+    snapshots: List[str]
+
+class SnapshotListResponse(BaseModel):
+    """Response model for the caller's snapshots, oldest first."""
+    snapshots: List[str]
+
+class RestoreResponse(BaseModel):
+    """Response model for a restored snapshot."""
+    success: bool
+    checkpoint: Optional[str] = None
+    name: str
+    newState: ProcessorState
 
 class ResetResponse(BaseModel):
     """Response model for successful CPU reset."""
@@ -61,7 +196,38 @@ class ResetResponse(BaseModel):
     defaultState: ProcessorState
 
 class TimingResponse(BaseModel):
-    """Response model for instruction timing diagram."""
+    """Response model for instruction timing diagram.
+
+    diagram is a PNG data URL (format "base64"), SVG markup (format "svg")
+    or the waveform polylines (format "waveform").
+    """
     instruction: str
     format: str
-    diagram: str
+    diagram: str | Dict[str, Any]
+
+class ImageResponse(BaseModel):
+    """Response model for an assembled binary image."""
+    success: bool
+    checkpoint: Optional[str] = None
+    hex: str
+    segments: List[Dict[str, str | int]]
+    bytes: int
+
+class LoadResponse(BaseModel):
+    """Response model for a loaded binary image."""
+    success: bool
+    checkpoint: Optional[str] = None
+    segments: List[Dict[str, str | int]]
+    bytes: int
+
+class ImageErrorResponse(BaseModel):
+    """Response model for image assembly or loading errors."""
+    success: bool
+    checkpoint: Optional[str] = None
+    error: ErrorDetails
+
+class CacheStatsResponse(BaseModel):
+    """Response model for assembly and result cache statistics."""
+    backend: str
+    assembly: Dict[str, int]
+    results: Dict[str, int | float]
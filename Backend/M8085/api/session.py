@@ -0,0 +1,94 @@
+"""Per-client simulator state for the REST API.
+
+Each client identifies itself with the X-Session-ID header and gets its own
+MachineState, so one server process can serve many users. Requests without
+the header share the default session, which keeps the single-user desktop
+app behaving as before (state persists between executions until reset).
+"""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict, deque
+
+from .. import MachineState, Snapshot
+from .._delta import Version, capture, DELTA_VERSIONS
+
+DEFAULT_SESSION = "default"
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "256"))
+MAX_SNAPSHOTS = int(os.getenv("M8085_SNAPSHOTS", "16"))
+
+class Session:
+    """A MachineState plus the lock that serializes requests against it.
+
+    Jobs may run in another process and hand back a copy of the state, so
+    always go through `session.state` rather than holding on to it.
+    `versions` are the last states sent to a client that asked for deltas,
+    `snapshots` the states it saved by name (at most MAX_SNAPSHOTS, the
+    oldest is dropped first).
+    """
+
+    def __init__(self):
+        self.state = MachineState()
+        self.lock = asyncio.Lock()
+        self.version = 0
+        self.versions: deque[Version] = deque(maxlen=DELTA_VERSIONS)
+        self.snapshots: OrderedDict[str, Snapshot] = OrderedDict()
+        self.__saved = 0
+
+    def save(self, name: str | None = None) -> str:
+        """Snapshot the current state, sharing unchanged pages with the
+        last snapshot taken."""
+        if name is None:
+            self.__saved += 1
+            name = f"s{self.__saved}"
+        parent = next(reversed(self.snapshots.values()), None)
+        self.snapshots.pop(name, None)
+        self.snapshots[name] = self.state.snapshot(parent)
+        while len(self.snapshots) > MAX_SNAPSHOTS:
+            self.snapshots.popitem(last=False)
+        return name
+
+    def base(self, number: int) -> Version | None:
+        """The state sent as `number`, if it is still kept."""
+        for version in self.versions:
+            if version.number == number:
+                return version
+        return None
+
+    def commit(self) -> int:
+        """Keep the current state as a new version for later deltas."""
+        self.version += 1
+        self.versions.append(capture(self.state, self.version))
+        return self.version
+
+class Sessions:
+    """Thread-safe, LRU-bounded registry of sessions."""
+
+    def __init__(self, limit: int = MAX_SESSIONS):
+        self._limit = limit
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str | None = None) -> Session:
+        key = session_id or DEFAULT_SESSION
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = Session()
+                if len(self._sessions) > self._limit:
+                    self.__evict()
+            else:
+                self._sessions.move_to_end(key)
+            return session
+
+    def __evict(self):
+        for key in self._sessions:
+            if key != DEFAULT_SESSION:
+                del self._sessions[key]
+                return
+
+    def __len__(self):
+        return len(self._sessions)
+
+sessions = Sessions()
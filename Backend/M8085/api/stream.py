@@ -0,0 +1,170 @@
+"""Step-by-step execution streamed over a WebSocket.
+
+The client opens /api/execute/stream and sends a StreamRequest. The server
+assembles the program against the session's state, sends {"type": "start"}
+with the full starting state, then steps it with Processor.step() and
+sends {"type": "frame"} updates holding only what changed: at most `fps`
+frames a second, each coalescing every step since the previous one.
+`rate` caps steps per second for animated runs. The end of the run is
+announced with {"type": "done"}, the /execute response without newState.
+Frames and done carry the step `position`.
+
+The client may send {"action": "pause"}, {"action": "continue"},
+{"action": "step", "count": n} (one frame after n steps), {"action":
+"back", "count": n}, {"action": "seek", "index": n} or {"action": "stop"}.
+Going back or seeking pauses, and works after done too; the socket stays
+open until stop or the client leaves. The session stays locked for the
+whole stream.
+
+Breakpoints and watchpoints come with the request or from {"action":
+"breakpoints", "breakpoints": [...], "watch": [...]}, which replaces them.
+A hit pauses the run and its frame carries "break". {"action": "until",
+"to": {"line": n}} runs to the cursor (or an earlier hit) without a
+lasting breakpoint there. Continuing from a breakpoint runs past it.
+
+Steps run on a worker thread of the server process, whichever executor
+backend is configured, since the generator cannot move between processes.
+"""
+
+import asyncio
+from time import perf_counter
+
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from .. import Processor, Breakpoints, Message
+from .._stream import Frame
+from .model import StreamRequest, StreamControl
+from .session import Session
+
+IDLE = object() # no control message waiting
+
+def advance(processor: Processor, seconds: float, limit: int | None) -> Frame:
+    """Step for up to `seconds` or `limit` steps, or to the end of the run."""
+    frame = Frame()
+    deadline = perf_counter() + seconds
+    while processor.finished is None and frame.hit is None and (limit is None or frame.steps < limit):
+        frame.merge(processor.step(256 if limit is None else min(256, limit - frame.steps)))
+        if perf_counter() >= deadline:
+            break
+    return frame
+
+async def serve(websocket: WebSocket, session: Session):
+    await websocket.accept()
+    try:
+        request = StreamRequest.model_validate(await websocket.receive_json())
+    except (ValidationError, ValueError) as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close(code=1003)
+        return
+    except WebSocketDisconnect:
+        return
+
+    controls: asyncio.Queue[StreamControl | None] = asyncio.Queue()
+
+    async def receive():
+        try:
+            while True:
+                try:
+                    controls.put_nowait(StreamControl.model_validate(await websocket.receive_json()))
+                except (ValidationError, ValueError) as e:
+                    await websocket.send_json({"type": "error", "message": str(e)})
+        except WebSocketDisconnect:
+            controls.put_nowait(None)
+
+    receiver = asyncio.create_task(receive())
+    try:
+        async with session.lock:
+            await run(websocket, session, request, controls)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+
+async def run(websocket: WebSocket, session: Session, request: StreamRequest, controls: asyncio.Queue):
+    points = breakpoints(request)
+    processor = Processor(request.code, session.state, clock=request.clock,
+                          max_cycles=request.max_cycles, mode=request.mode, breakpoints=points)
+    await asyncio.to_thread(processor.step, 0) # assembles
+    if processor.finished is not None: # did not assemble, nothing to step through
+        await websocket.send_json({"type": "done", "position": 0, **processor.finished})
+        await websocket.close()
+        return
+    await websocket.send_json({"type": "start", "state": processor.new_state()})
+    interval = 1 / request.fps
+    per_frame = max(1, round(request.rate / request.fps)) if request.rate else None
+    paused, budget, done = request.paused, 0, False
+    until = False # running to a one-off breakpoint
+
+    while True:
+        if processor.finished is not None and not done:
+            await websocket.send_json({"type": "done", "position": processor.position, **processor.finished})
+            paused, budget, done = True, 0, True
+        if until and paused:
+            await asyncio.to_thread(processor.set_breakpoints, points)
+            until = False
+
+        if paused and not budget:
+            control = await controls.get()
+        else:
+            control = IDLE if controls.empty() else controls.get_nowait()
+
+        if control is not IDLE:
+            if control is None: # disconnected
+                return
+            if control.action == "stop":
+                if not done:
+                    await websocket.send_json({"type": "done", "position": processor.position, "success": False,
+                                               "checkpoint": "execute/stopped", "cycles": processor.cycles()})
+                break
+            if control.action in ("back", "seek"):
+                if control.action == "back":
+                    frame = await asyncio.to_thread(processor.back, control.count)
+                else:
+                    frame = await asyncio.to_thread(processor.seek, control.index)
+                paused, budget = True, 0
+                done = done and processor.finished is not None
+                await send(websocket, processor, frame)
+            elif control.action == "breakpoints":
+                update = breakpoints(control)
+                result = await asyncio.to_thread(processor.set_breakpoints, update)
+                if isinstance(result, Message):
+                    await websocket.send_json({"type": "error", "message": str(result)})
+                else:
+                    points = update
+            elif control.action == "until" and not done:
+                update = points
+                if control.to is not None:
+                    update = Breakpoints([*points.points, control.to.model_dump()], points.watch)
+                result = await asyncio.to_thread(processor.set_breakpoints, update)
+                if isinstance(result, Message):
+                    await websocket.send_json({"type": "error", "message": str(result)})
+                else:
+                    paused, budget, until = False, 0, True
+            elif control.action == "pause":
+                paused, budget = True, 0
+            elif control.action == "continue" and not done:
+                paused, budget = False, 0
+            elif control.action == "step" and not done:
+                budget += control.count
+            continue
+
+        started = perf_counter()
+        frame = await asyncio.to_thread(advance, processor, interval, budget if paused else per_frame)
+        if paused:
+            budget = max(0, budget - frame.steps)
+        if frame.hit is not None:
+            paused, budget = True, 0
+        if frame.steps or frame.hit is not None:
+            await send(websocket, processor, frame)
+        if processor.finished is None and not paused:
+            await asyncio.sleep(max(0.0, interval - (perf_counter() - started)))
+
+    await websocket.close()
+
+def breakpoints(request: StreamRequest | StreamControl) -> Breakpoints:
+    return Breakpoints([point.model_dump() for point in request.breakpoints],
+                       [span.model_dump() for span in request.watch])
+
+async def send(websocket: WebSocket, processor: Processor, frame: Frame):
+    await websocket.send_json({**frame.as_dict(), "position": processor.position})
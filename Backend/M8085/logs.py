@@ -1,23 +1,76 @@
-"""Logging configuration for the 8085 simulator."""
+"""Logging and execution tracing for the 8085 simulator.
 
+Log records go through a QueueHandler and are written to LOGFILE by a
+background QueueListener, so callers never block on disk I/O.
+
+Instruction tracing is off by default (set M8085_TRACE=1 to enable). When
+on, executed instructions are kept unformatted in a bounded ring buffer
+and only formatted when the buffer is dumped, e.g. after a runtime error.
+"""
+
+import atexit
 import logging
+import os
+import queue
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
 
 LOGFILE = 'LOGS.log'
+TRACE = os.getenv('M8085_TRACE', '0') == '1'
+TRACE_DEPTH = int(os.getenv('M8085_TRACE_DEPTH', '256'))
+
+_logger = logging.getLogger('M8085')
+_listener: QueueListener | None = None
 
 def setup_logger(file = LOGFILE):
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(message)s",
+    """Attach the queued file handler. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.FileHandler(file, mode='w', delay=True)
+    handler.setFormatter(logging.Formatter(
+        "%(asctime)s [%(levelname)s] %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
-        filename=file,
-        filemode="w"
-    )
+    ))
+    records = queue.SimpleQueue()
+    _logger.addHandler(QueueHandler(records))
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+
+    _listener = QueueListener(records, handler)
+    _listener.start()
+    atexit.register(_listener.stop)
 
 def info(msg):
-    logging.info(msg)
+    _logger.info(msg)
 
 def warn(msg):
-    logging.warning(msg)
+    _logger.warning(msg)
 
 def error(msg):
-    logging.error(msg)
+    _logger.error(msg)
+
+
+class Tracer:
+    """Ring buffer of the last `depth` executed instructions.
+
+    record() is the bound deque.append, so the execute loop pays a single
+    C call per step. Entries are (pc, inst, args) tuples.
+    """
+
+    def __init__(self, depth: int = TRACE_DEPTH):
+        self.entries = deque(maxlen=depth)
+        self.record = self.entries.append
+
+    def lines(self) -> list[str]:
+        return [f"{pc:04X}H {inst} {args}" for pc, inst, args in self.entries]
+
+    def dump(self, reason: str, level: int = logging.ERROR) -> list[str]:
+        """Write the buffered trace to the log and return it."""
+        lines = self.lines()
+        _logger.log(level, "%s Last %d instructions:\n%s", reason, len(lines), "\n".join(lines))
+        return lines
+
+    def clear(self):
+        self.entries.clear()
@@ -4,6 +4,7 @@ import os
 import sys
 import traceback
 import signal
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
@@ -11,16 +12,26 @@ import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
 
 from M8085.api import main as api
+from M8085.api.executor import backend
 
 # Configuration from environment
 BACKEND_PORT = int(os.getenv("BACKEND_PORT", "8085"))
 BACKEND_HOST = os.getenv("BACKEND_HOST", "127.0.0.1")
 IS_TAURI = os.getenv("TAURI_ENV", "0") == "1"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the simulation worker pool before serving, stop it on exit."""
+    backend.start()
+    yield
+    backend.shutdown()
+
+
 app = FastAPI(
     title="8085 Microprocessor Simulator",
     description="Simulator for the 8085 microprocessor.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS configuration - allow connections from various sources
@@ -81,6 +92,7 @@ async def health_check():
         "message": "8085 Microprocessor Simulator Backend is running.",
         "port": BACKEND_PORT,
         "host": BACKEND_HOST,
+        "executor": backend.stats(),
     }
 
 
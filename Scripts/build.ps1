@@ -52,6 +52,9 @@ try {
     exit 1
 }
 
+# Precompile the instruction and docs tables so the binary skips YAML parsing
+python -c "from M8085._utils import compile_tables; compile_tables()"
+
 # Build with Nuitka
 python -m nuitka `
     --standalone `
@@ -62,6 +65,7 @@ python -m nuitka `
     --assume-yes-for-downloads `
     --include-data-files=M8085/commands_property.yml=M8085/commands_property.yml `
     --include-data-files=M8085/docs.yml=M8085/docs.yml `
+    --include-data-files=M8085/__pycache__/*.marshal=M8085/__pycache__/ `
     --output-dir=$OUTPUT_DIR `
     $ENTRY_POINT
 
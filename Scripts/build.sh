@@ -47,6 +47,9 @@ if [[ "$OSTYPE" == "linux-gnu"* ]]; then
     fi
 fi
 
+# Precompile the instruction and docs tables so the binary skips YAML parsing
+python3 -c "from M8085._utils import compile_tables; compile_tables()"
+
 # Build with Nuitka
 python3 -m nuitka \
   --standalone \
@@ -57,6 +60,7 @@ python3 -m nuitka \
   --assume-yes-for-downloads \
   --include-data-files=M8085/commands_property.yml=M8085/commands_property.yml \
   --include-data-files=M8085/docs.yml=M8085/docs.yml \
+  --include-data-files=M8085/__pycache__/*.marshal=M8085/__pycache__/ \
   --output-dir=${OUTPUT_DIR} \
   $ENTRY_POINT
 
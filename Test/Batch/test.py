@@ -0,0 +1,100 @@
+"""Batch execution: jobs, initial states, Processor.batch and /execute/batch.
+
+Run with pytest, or directly: python Test/Batch/test.py
+"""
+
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085 import Processor, MachineState, Message
+from M8085._batch import jobs, chunks, initial_state
+
+ADD = "MVI A,05H\nADD B\nSTA C000H\nHLT"
+STATES = [{'registers': {'B': f'{i:02X}H'}} for i in range(10)]
+
+def sums(results) -> list:
+    return [result['newState']['memory']['C000H'] for _, result in results]
+
+def test_jobs():
+    assert jobs(ADD) == [(ADD, None)]
+    assert jobs(ADD, [1, 2]) == [(ADD, 1), (ADD, 2)]
+    assert jobs([ADD, 'HLT']) == [(ADD, None), ('HLT', None)]
+    assert jobs([ADD, 'HLT'], [1, 2]) == [(ADD, 1), ('HLT', 2)]
+    with pytest.raises(ValueError):
+        jobs([ADD, 'HLT'], [1])
+
+@pytest.mark.parametrize('size, workers', [(1, 4), (10, 1), (10, 4), (100, 3)])
+def test_chunks_cover_the_batch(size, workers):
+    parts = chunks(list(range(size)), workers)
+    assert [index for part in parts for index, _ in part] == list(range(size))
+
+def test_initial_state():
+    state = initial_state({'registers': {'A': '12H', 'SP': 'FFF0H'}, 'flags': {'C': 1},
+                           'memory': {'2000H': '34H', '01H': '56H'}})
+    assert (state.registers['A'], state.registers['SP']) == (0x12, 0xFFF0)
+    assert state.flags['C'] == 1
+    assert (state.memory[0x2000], state.ports[0x01]) == (0x34, 0x56)
+
+@pytest.mark.parametrize('spec', [
+    {'registers': {'Q': '01H'}},
+    {'registers': {'A': '1'}},
+    {'flags': {'X': 1}},
+    {'memory': {'ZZ': '1H'}},
+])
+def test_invalid_initial_state(spec):
+    assert isinstance(initial_state(spec), Message)
+
+def test_initial_state_over_a_base():
+    setup = MachineState()
+    Processor("MVI A,07H\nSTA 2000H\nHLT", setup, cache=False).as_dict()
+    state = initial_state({'memory': {'2001H': '01H'}}, setup.snapshot())
+    assert (state.memory[0x2000], state.memory[0x2001]) == (7, 1)
+    assert state.stack == {} # each job assembles its own program
+
+def test_batch_in_process():
+    assert sums(Processor.batch(ADD, STATES, workers=1)) == [f'{5 + i:02X}H' for i in range(10)]
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_batch_on_an_executor(ordered):
+    with ThreadPoolExecutor(3) as executor:
+        results = list(Processor.batch(ADD, STATES, workers=3, ordered=ordered, executor=executor))
+    if ordered:
+        assert [index for index, _ in results] == list(range(10))
+    assert sorted(sums(results)) == [f'{5 + i:02X}H' for i in range(10)]
+
+def test_batch_on_a_process_pool():
+    results = list(Processor.batch([ADD, 'MVI A,01H\nJMP X', 'HLT'], workers=2))
+    assert [index for index, _ in results] == [0, 1, 2]
+    assert [result['success'] for _, result in results] == [True, False, True]
+
+def test_batch_route():
+    TestClient = pytest.importorskip('fastapi.testclient').TestClient
+    from Server.__main__ import app
+
+    with TestClient(app) as client:
+        response = client.post('/api/execute/batch', json={'code': ADD, 'states': STATES[:5]}).json()
+        assert response['count'] == 5
+        assert [r['newState']['memory']['C000H'] for r in response['results']] == \
+               ['05H', '06H', '07H', '08H', '09H']
+
+        stream = client.post('/api/execute/batch?stream=true&ordered=false',
+                             json={'programs': [ADD, 'MVI A,01H\nJMP X', 'HLT']})
+        assert stream.headers['content-type'].startswith('application/x-ndjson')
+        lines = [json.loads(line) for line in stream.text.splitlines()]
+        assert sorted((line['index'], line['success']) for line in lines) == \
+               [(0, True), (1, False), (2, True)]
+
+        bad = client.post('/api/execute/batch', json={'code': ADD, 'states': [{'memory': {'ZZ': '1H'}}]}).json()
+        assert bad['results'][0]['checkpoint'] == 'execute/state'
+        assert client.post('/api/execute/batch', json={}).status_code == 422
+        assert client.post('/api/execute/batch', json={'programs': [ADD], 'states': []}).status_code == 422
+
+if __name__ == '__main__':
+    print(sums(Processor.batch(ADD, STATES)))
@@ -0,0 +1,255 @@
+"""Benchmark harness for the 8085 simulator.
+
+Local mode parses, assembles and executes every program in Test/Programs
+plus a few synthetic long-running loops, timing each phase separately:
+
+    python Test/Benchmark/bench.py --repeat 20 --json bench.json
+
+HTTP mode drives /api/assemble and /api/execute concurrently against a
+running server (python -m Server in Backend/):
+
+    python Test/Benchmark/bench.py http --url http://127.0.0.1:8085 --concurrency 8
+
+Results are printed as a table and, with --json, written as JSON so runs
+can be compared across commits. Caches are bypassed in local mode so the
+numbers measure the simulator itself; in HTTP mode every request uses a
+new session, and the server's caches apply as they would in production.
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+PROGRAMS = ROOT / 'Test' / 'Programs'
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+# Long-running programs that stress the execute loop rather than the parser.
+SYNTHETIC = {
+    'loop_nested': """
+        MVI B, 40H
+OUTER:  MVI C, FFH
+INNER:  DCR C
+        JNZ INNER
+        DCR B
+        JNZ OUTER
+        HLT
+""",
+    'block_copy': """
+        MVI D, 20H
+AGAIN:  LXI H, 2000H
+        LXI B, 3000H
+        MVI E, FFH
+COPY:   MOV A, M
+        STAX B
+        INX H
+        INX B
+        DCR E
+        JNZ COPY
+        DCR D
+        JNZ AGAIN
+        HLT
+""",
+    'call_return': """
+        MVI B, FFH
+LOOP:   CALL SUBR
+        DCR B
+        JNZ LOOP
+        HLT
+SUBR:   PUSH B
+        ADI 01H
+        POP B
+        RET
+""",
+}
+SYNTHETIC_RUNTIME = 10_000_000
+
+def percentiles(samples:list[float]) -> dict:
+    """Nearest-rank p50/p90/p99 plus min/max/mean, in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    rank = lambda p: ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+    return {
+        'min': ordered[0] * 1e3,
+        'p50': rank(50) * 1e3,
+        'p90': rank(90) * 1e3,
+        'p99': rank(99) * 1e3,
+        'max': ordered[-1] * 1e3,
+        'mean': sum(ordered) / len(ordered) * 1e3,
+    }
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+def programs(names:list[str] | None = None) -> dict[str, tuple[str, int | None]]:
+    """name -> (source, runtime override)."""
+    found = {f.stem: (f.read_text(), None) for f in sorted(PROGRAMS.glob('*.asm'))}
+    found.update({name: (code, SYNTHETIC_RUNTIME) for name, code in SYNTHETIC.items()})
+    if names:
+        found = {name: found[name] for name in names}
+    return found
+
+# Local mode
+
+def bench_program(code:str, runtime:int | None, repeat:int) -> dict:
+    from M8085 import Processor, MachineState, Parser, Assembler, Message, RUNTIME
+
+    parse, assemble, run = [], [], []
+    result = {'status': 'ok', 'steps': 0}
+
+    for _ in range(repeat):
+        state = MachineState()
+        start = time.perf_counter()
+        parsed = Parser(code, state).parse()
+        parse.append(time.perf_counter() - start)
+        if isinstance(parsed, Message):
+            return {'status': f'parse: {parsed.as_dict()["message"]}', 'parse': percentiles(parse)}
+
+        start = time.perf_counter()
+        assembled = Assembler(state).pass2()
+        assemble.append(time.perf_counter() - start)
+        if isinstance(assembled, Message):
+            return {'status': f'assemble: {assembled.as_dict()["message"]}', 'parse': percentiles(parse)}
+
+        processor = Processor(code, MachineState(), runtime=runtime or RUNTIME, cache=False)
+        processor.assemble()
+        start = time.perf_counter()
+        outcome = processor.run()
+        run.append(time.perf_counter() - start)
+        result['steps'] = processor.steps
+        if isinstance(outcome, Message):
+            result['status'] = f'run: {outcome.as_dict()["message"]}'
+
+    # Peak memory of one full execute, measured separately as tracemalloc
+    # slows everything down.
+    tracemalloc.start()
+    Processor(code, MachineState(), runtime=runtime or RUNTIME, cache=False).execute()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = min(run)
+    result.update({
+        'parse': percentiles(parse),
+        'assemble': percentiles(assemble),
+        'run': percentiles(run),
+        'ips': result['steps'] / best if best else None,
+        'peak_bytes': peak,
+    })
+    return result
+
+def bench_local(args) -> dict:
+    results = {}
+    for name, (code, runtime) in programs(args.programs).items():
+        results[name] = bench_program(code, runtime, args.repeat)
+
+    ok = [r for r in results.values() if 'run' in r]
+    parse = [r['parse']['p50'] for r in results.values() if r.get('parse')]
+    summary = {
+        'programs': len(results),
+        'executed': len(ok),
+        'instructions': sum(r['steps'] for r in ok),
+        'ips_median': sorted(r['ips'] for r in ok if r['ips'])[len(ok) // 2] if ok else None,
+        'parse_p50_ms': percentiles([p / 1e3 for p in parse]).get('p50'),
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    return {'mode': 'local', 'repeat': args.repeat, 'summary': summary, 'programs': results}
+
+def print_local(report:dict):
+    print(f"{'program':<16}{'status':<10}{'steps':>10}{'parse p50':>12}{'asm p50':>10}{'run p50':>10}{'inst/s':>12}{'peak KB':>9}")
+    for name, r in report['programs'].items():
+        status = 'ok' if r['status'] == 'ok' else r['status'].split(':')[0]
+        fmt = lambda phase: f"{r[phase]['p50']:.3f}" if r.get(phase) else '-'
+        ips = f"{r['ips']:,.0f}" if r.get('ips') else '-'
+        peak = f"{r['peak_bytes'] / 1024:.0f}" if 'peak_bytes' in r else '-'
+        print(f"{name:<16}{status:<10}{r.get('steps', 0):>10}{fmt('parse'):>12}{fmt('assemble'):>10}{fmt('run'):>10}{ips:>12}{peak:>9}")
+    print(json.dumps(report['summary'], indent=2))
+
+# HTTP mode
+
+def post(url:str, code:str) -> tuple[int, float]:
+    request = urllib.request.Request(
+        url, data=json.dumps({'code': code}).encode(), method='POST',
+        headers={'Content-Type': 'application/json', 'X-Session-ID': uuid.uuid4().hex},
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+def bench_http(args) -> dict:
+    sources = [code for code, _ in programs(args.programs).values()]
+    report = {'mode': 'http', 'url': args.url, 'concurrency': args.concurrency, 'endpoints': {}}
+
+    for endpoint in ('assemble', 'execute'):
+        url = f"{args.url.rstrip('/')}/api/{endpoint}"
+        jobs = [sources[i % len(sources)] for i in range(args.requests)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            results = list(pool.map(lambda code: post(url, code), jobs))
+        elapsed = time.perf_counter() - start
+
+        statuses = {}
+        for status, _ in results:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        report['endpoints'][endpoint] = {
+            'requests': len(results),
+            'seconds': elapsed,
+            'rps': len(results) / elapsed,
+            'status': statuses,
+            'latency': percentiles([latency for _, latency in results]),
+        }
+    return report
+
+def print_http(report:dict):
+    for endpoint, r in report['endpoints'].items():
+        latency = r['latency']
+        print(f"/api/{endpoint:<9} {r['rps']:8.1f} req/s  p50 {latency['p50']:.1f}ms  "
+              f"p90 {latency['p90']:.1f}ms  p99 {latency['p99']:.1f}ms  status {r['status']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', nargs='?', choices=('local', 'http'), default='local')
+    parser.add_argument('--programs', nargs='*', help='program names (file stems or synthetic names)')
+    parser.add_argument('--repeat', type=int, default=10, help='local: runs per program')
+    parser.add_argument('--url', default='http://127.0.0.1:8085', help='http: server base URL')
+    parser.add_argument('--concurrency', type=int, default=8, help='http: parallel clients')
+    parser.add_argument('--requests', type=int, default=200, help='http: requests per endpoint')
+    parser.add_argument('--json', type=Path, help='write the report to this file')
+    args = parser.parse_args()
+
+    report = bench_local(args) if args.mode == 'local' else bench_http(args)
+    report['environment'] = environment()
+    (print_local if args.mode == 'local' else print_http)(report)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=1))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Breakpoints, watchpoints and run-until on Processor.
+
+Run with pytest, or directly: python Test/Breakpoints/test.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085 import Processor, MachineState, Breakpoints, Breakpoint, Watchpoint, assembly_cache
+
+# Stores 5, 9, 12, 14, 15 at 2050H.. and the total at 3000H.
+SOURCE = """MVI B,05H
+MVI A,00H
+LXI H,2050H
+LOOP: ADD B
+MOV M,A
+INX H
+DCR B
+JNZ LOOP
+STA 3000H
+HLT"""
+LOOP = 0x0007
+MODES = ('decoded', 'image')
+
+def processor(breakpoints:Breakpoints, mode:str = 'decoded') -> Processor:
+    return Processor(SOURCE, MachineState(), breakpoints=breakpoints, mode=mode)
+
+def finish(p:Processor) -> list:
+    """Resume until the run ends, collecting the hits on the way."""
+    hits = []
+    result = p.execute()
+    while result != 0:
+        assert p.hit is not None, result
+        hits.append(result)
+        result = p.resume()
+    return hits
+
+@pytest.mark.parametrize('label', ['LOOP', 'loop'])
+def test_label_breakpoint(label):
+    p = processor(Breakpoints([Breakpoint(label=label)]))
+    hit = p.execute()
+    assert (hit.kind, hit.pc) == ('breakpoint', LOOP)
+    assert p.state.registers['B'] == 5 and p.state.registers['A'] == 0
+
+def test_continue_from_a_hit():
+    # Resuming runs the instruction the breakpoint stopped at; the next
+    # iteration stops again, five times in all.
+    p = processor(Breakpoints([Breakpoint(address='0007H')]))
+    hits = finish(p)
+    assert [hit.pc for hit in hits] == [LOOP] * 5
+    assert p.state.memory[0x3000] == 15
+
+@pytest.mark.parametrize('mode', MODES)
+def test_conditional_breakpoint(mode):
+    p = processor(Breakpoints([Breakpoint(label='LOOP', condition='B == 2 && A > 0')]), mode)
+    hit = p.execute()
+    assert hit.pc == LOOP
+    assert (p.state.registers['B'], p.state.registers['A']) == (2, 12)
+    assert p.resume() == 0 # the condition does not hold again
+
+@pytest.mark.parametrize('mode', MODES)
+def test_watch_range(mode):
+    p = processor(Breakpoints(watch=[Watchpoint('2052H', '2053H'), Watchpoint('3000H')]), mode)
+    hits = finish(p)
+    assert [(hit.kind, hit.address, hit.old, hit.value) for hit in hits] == [
+        ('watchpoint', 0x2052, 0, 12),
+        ('watchpoint', 0x2053, 0, 14),
+        ('watchpoint', 0x3000, 0, 15),
+    ]
+    # watched stores stop after they ran, so the run still counts them
+    plain = Processor(SOURCE, MachineState(), mode=mode)
+    plain.execute()
+    assert p.cycles() == plain.cycles()
+
+def test_run_until_line():
+    # A line breakpoint stops at the first instruction at or after it,
+    # as running to the editor's cursor does.
+    p = processor(Breakpoints([Breakpoint(line=9)]))
+    hit = p.execute()
+    assert hit.pc == 0x000E # STA 3000H
+    assert p.state.registers['A'] == 15 and p.state.memory[0x3000] == 0
+    assert p.resume() == 0
+
+def test_clearing_breakpoints_restores_the_program():
+    p = processor(Breakpoints([Breakpoint(label='LOOP')], [Watchpoint('2050H', '2054H')]))
+    p.step(100)
+    assert p.step(100).hit is not None
+    p.set_breakpoints(None)
+    frame = p.step(1000)
+    assert frame.hit is None and p.finished['checkpoint'] == 'execute'
+
+@pytest.mark.parametrize('armed', ['before', 'after'])
+def test_arming_a_cached_assembly(armed):
+    # The second Processor takes its program from the assembly cache, line
+    # map included, whether breakpoints come before or after it assembled.
+    assembly_cache.clear()
+    Processor(SOURCE, MachineState()).execute()
+    breakpoints = Breakpoints([Breakpoint(line=9)], [Watchpoint('2052H')])
+    p = Processor(SOURCE, MachineState(), breakpoints=breakpoints if armed == 'before' else None)
+    p.step(0)
+    if armed == 'after':
+        assert p.set_breakpoints(breakpoints) is None
+    assert assembly_cache.hits == 1
+    hits = [p.step(1000).hit, p.step(1000).hit]
+    assert [(hit.kind, hit.pc) for hit in hits] == [('watchpoint', 0x0008), ('breakpoint', 0x000E)]
+
+@pytest.mark.parametrize('breakpoints', [
+    Breakpoints([Breakpoint(label='NOPE')]),
+    Breakpoints([Breakpoint(address='2001H')]),
+    Breakpoints([Breakpoint(address=0, condition='Q == 1')]),
+    Breakpoints(watch=[Watchpoint('5', '1')]),
+])
+def test_invalid(breakpoints):
+    result = processor(breakpoints).as_dict()
+    assert result['checkpoint'] == 'execute/breakpoints'
+
+if __name__ == '__main__':
+    p = processor(Breakpoints([Breakpoint(label='LOOP', condition='B == 2')]))
+    print(p.execute(), p.state.registers)
@@ -0,0 +1,62 @@
+"""Result cache: a hit must leave the session and the Processor as a run would.
+
+Run with pytest, or directly: python Test/Cache/test.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085 import Processor, MachineState, result_cache
+from M8085._cache import RESULT_CACHE
+
+SOURCE = """MVI B,05H
+MVI A,00H
+LOOP: ADD B
+DCR B
+JNZ LOOP
+STA 3000H
+HLT"""
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+@pytest.mark.skipif('M8085_RESULT_CACHE' in os.environ, reason='default overridden')
+def test_off_by_default():
+    assert RESULT_CACHE is False
+    Processor(SOURCE, MachineState()).as_dict()
+    assert result_cache.stats()['entries'] == 0
+
+@pytest.mark.parametrize('source', [SOURCE, 'MVI A,01H\nSTA 2000H\nHLT'])
+def test_hit_restores_counters(source):
+    first = Processor(source, MachineState(), cache=True)
+    response = first.as_dict()
+    second = Processor(source, MachineState(), cache=True)
+    assert second.as_dict() == response
+    assert result_cache.hits == 1
+    assert second.cycles() == first.cycles() == response['cycles']
+    assert (second.steps, second.tstates, second.machine_cycles) == \
+           (first.steps, first.tstates, first.machine_cycles)
+    assert second.checkpoint == first.checkpoint
+
+def test_hit_restores_state():
+    first, second = MachineState(), MachineState()
+    Processor(SOURCE, first, cache=True).as_dict()
+    Processor(SOURCE, second, cache=True).as_dict()
+    assert result_cache.hits == 1
+    assert second.memory == first.memory and second.memory[0x3000] == 15
+    assert second.registers == first.registers
+
+if __name__ == '__main__':
+    for _ in range(2):
+        p = Processor(SOURCE, MachineState(), cache=True)
+        p.as_dict()
+        print(p.cycles(), result_cache.stats())
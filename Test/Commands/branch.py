@@ -1,13 +1,14 @@
 from M8085._branch import Branch
-from M8085 import Register
+from M8085 import MachineState, Register
 
-branch = Branch()
+state = MachineState()
+branch = Branch(state)
 
 branch_inst = branch.get_inst()
 
-branch_inst['CALL']('2050H')
+branch_inst['CALL'](0x2050)
 
-r = Register()
+r = Register(state)
 
 print(r['PC']) 
-print(r['SP']) 
\ No newline at end of file
+print(r['SP']) 
@@ -1,27 +1,27 @@
-from M8085 import Arithmetic, Register, Data, Memory, Logical, Peripheral
+from M8085 import MachineState, Arithmetic, Register, Data, Memory, Logical, Peripheral
 
-
-arithmetic = Arithmetic()
-data = Data()
-register = Register()
-peripheral = Peripheral()
-logical = Logical()
-memory = Memory()
+state = MachineState()
+arithmetic = Arithmetic(state)
+data = Data(state)
+register = Register(state)
+peripheral = Peripheral(state)
+logical = Logical(state)
+memory = Memory(state)
 
 arithmetic_inst = arithmetic.get_inst()
 
 arithmetic_inst['ADD']('B')
-print(register.read('A'))  # Expected output: 90H
+print(register.read('A'))  # Expected output: 0
 
 
 data_inst = data.get_inst()
-data_inst['MVI'](['B', '15H'])
-print(register.get_all())  # Expected output: 15H
+data_inst['MVI']('B', 0x15)
+print(register.get_all())  # Expected output: B = 15H
 
 logical_inst = logical.get_inst()
 logical_inst['ANA']('B')
-print(register.read('A'))  # Expected output: 10H
+print(register.read('A'))  # Expected output: 0
 
 peripheral_inst = peripheral.get_inst()
-peripheral_inst['IN']('01H')
-print(register.read('A'))  # Expected output: 01H
\ No newline at end of file
+peripheral_inst['IN'](0x01)
+print(register.read('A'))  # Expected output: 1
@@ -0,0 +1,56 @@
+"""T-state, machine-cycle and instruction counts of Processor.cycles().
+
+Run with pytest, or directly: python Test/Cycles/test.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+PROGRAMS = ROOT / 'Test' / 'Programs'
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085 import Processor
+
+MODES = ('decoded', 'image')
+
+def cycles(source:str, mode:str) -> dict:
+    result = Processor(source, mode=mode, cache=False).as_dict()
+    assert result['success'], result
+    return result['cycles']
+
+@pytest.mark.parametrize('mode', MODES)
+def test_directives_are_free(mode):
+    # ORG and DB are not instructions: only HLT is counted and costed.
+    result = cycles((PROGRAMS / 'test_db.asm').read_text(), mode)
+    assert (result['instructions'], result['tStates'], result['machineCycles']) == (0, 5, 1)
+
+@pytest.mark.parametrize('name', ['test_db', 'program3'])
+def test_modes_agree(name):
+    source = (PROGRAMS / f'{name}.asm').read_text()
+    assert cycles(source, 'decoded') == cycles(source, 'image')
+
+@pytest.mark.parametrize('mode', MODES)
+def test_branch_to_next_instruction_is_taken(mode):
+    # JZ and CZ jump, RZ returns: their condition holds, so they cost the
+    # taken T-states even though JZ's target is the next instruction.
+    source = "MVI A, 00H\nORA A\nJZ NEXT\nNEXT: CZ SUB\nHLT\nSUB: RZ"
+    result = cycles(source, mode)
+    assert result['instructions'] == 5
+    assert result['tStates'] == 7 + 4 + 10 + 18 + 12 + 5
+    assert result['machineCycles'] == 2 + 1 + 3 + 5 + 3 + 1
+
+@pytest.mark.parametrize('mode', MODES)
+def test_branch_not_taken(mode):
+    source = "MVI A, 01H\nORA A\nJZ NEXT\nNEXT: CZ SUB\nHLT\nSUB: RZ"
+    result = cycles(source, mode)
+    assert result['instructions'] == 4
+    assert result['tStates'] == 7 + 4 + 7 + 9 + 5
+
+if __name__ == '__main__':
+    for name in ('test_db', 'program3'):
+        source = (PROGRAMS / f'{name}.asm').read_text()
+        for mode in MODES:
+            print(name, mode, cycles(source, mode))
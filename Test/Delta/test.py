@@ -0,0 +1,129 @@
+"""State deltas: diff/apply round trips and execute?delta=N.
+
+Run with pytest, or directly: python Test/Delta/test.py
+"""
+
+import base64
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085 import Processor, MachineState
+from M8085._delta import DELTA_GAP, capture, diff, apply, runs
+
+SMALL = "MVI A,01H\nSTA 2005H\nHLT"
+# Fills 2000H-20FFH and 3000H-30FFH, then writes port 10H.
+TABLES = """LXI H,2000H
+MVI B,00H
+L: MOV M,B
+INX H
+INR B
+JNZ L
+LXI H,3000H
+MVI B,00H
+K: MOV M,B
+INX H
+INR B
+JNZ K
+MVI A,07H
+OUT 10H
+HLT"""
+
+def test_runs():
+    before = bytes(0x400)
+    after = bytearray(before)
+    assert runs(before, after) == []
+    after[0x10] = after[0x10 + DELTA_GAP] = 1 # close enough to share a run
+    after[0x300] = 1
+    assert runs(before, after) == [(0x10, 0x11 + DELTA_GAP), (0x300, 0x301)]
+
+def test_round_trip():
+    rng = random.Random(0)
+    state = MachineState()
+    base = capture(state, 1)
+    for address in rng.sample(range(len(state.memory)), 500):
+        state.memory[address] = rng.getrandbits(8)
+    state.ports[0x10] = 7
+    state.registers.update(A=0x12, SP=0xFFF0)
+    state.flags['Z'] = 1
+
+    delta = diff(base, state)
+    assert delta['base'] == 1
+    assert delta['registers'] == {'A': '12H', 'SP': 'FFF0H'}
+    assert delta['flags'] == {'Z': 1}
+
+    client = MachineState()
+    apply(delta, client)
+    assert client.memory == state.memory and client.ports == state.ports
+    assert client.registers == state.registers and client.flags == state.flags
+
+def test_as_dict_with_a_base():
+    state = MachineState()
+    base = capture(state, 3)
+    result = Processor(SMALL, state, cache=False).as_dict(base)
+    assert 'newState' not in result or result['newState'] is None
+    delta = result['delta']
+    assert delta['base'] == 3 and delta['registers']['A'] == '01H'
+    assert delta['memory'] == [{'address': '2005H', 'data': base64.b64encode(b'\x01').decode()}]
+
+def test_execute_with_delta():
+    TestClient = pytest.importorskip('fastapi.testclient').TestClient
+    from Server.__main__ import app
+    from M8085.api.session import sessions
+
+    headers = {'X-Session-ID': 'delta'}
+    def reset(client):
+        client.post('/api/reset', headers=headers)
+        sessions.get('delta').state.stack.clear()
+
+    with TestClient(app) as client:
+        # delta=0: nothing held yet, so a full newState numbered version 1
+        first = client.post('/api/execute?delta=0', headers=headers, json={'code': TABLES}).json()
+        assert first['version'] == 1 and first['newState'] is not None
+        held = MachineState()
+        for name, value in first['newState']['registers'].items():
+            held.registers[name] = int(value[:-1], 16)
+        for key, value in first['newState']['memory'].items():
+            target = held.memory if len(key) == 5 else held.ports
+            target[int(key[:-1], 16)] = int(value[:-1], 16)
+        held.flags.update(first['newState']['flags'])
+
+        reset(client)
+        second = client.post('/api/execute?delta=1', headers=headers, json={'code': SMALL}).json()
+        assert second['version'] == 2 and 'newState' not in second
+        assert second['delta']['base'] == 1
+        apply(second['delta'], held)
+        state = sessions.get('delta').state
+        assert held.memory == state.memory and held.ports == state.ports
+        assert held.registers == state.registers and held.flags == state.flags
+
+        # a version the session no longer keeps falls back to the full state
+        reset(client)
+        third = client.post('/api/execute?delta=999', headers=headers, json={'code': SMALL}).json()
+        assert 'delta' not in third and third['newState'] is not None
+
+def test_plain_execute_payload():
+    # Fields a response does not set are left out, not sent as null, so
+    # clients that never ask for deltas get the payload they always did.
+    TestClient = pytest.importorskip('fastapi.testclient').TestClient
+    from Server.__main__ import app
+
+    headers = {'X-Session-ID': 'plain'}
+    with TestClient(app) as client:
+        ok = client.post('/api/execute', headers=headers, json={'code': SMALL}).json()
+        assert set(ok) == {'success', 'checkpoint', 'newState', 'cycles'}
+        client.post('/api/reset', headers=headers)
+        error = client.post('/api/execute', headers=headers, json={'code': 'MVI A,01H'}).json()
+        assert set(error) == {'success', 'checkpoint', 'error'}
+        assert error['error']['hint'] is None # error details keep their nulls
+
+if __name__ == '__main__':
+    state = MachineState()
+    base = capture(state, 0)
+    Processor(TABLES, state, cache=False).as_dict()
+    print(diff(base, state)['memory'])
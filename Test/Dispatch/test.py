@@ -0,0 +1,68 @@
+"""Every specialized opcode form, called by mnemonic and by opcode.
+
+The generic handlers for these mnemonics call the dispatch closures; this
+runs each form from the same random machine states through Processor.inst
+and through the opcode table, so a handler that binds the wrong form or
+passes its operands in the wrong order shows up as a mismatch.
+
+Run with pytest, or directly: python Test/Dispatch/test.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085 import Processor, MachineState
+from M8085._dispatch import OPCODES, SPECIALIZED, Dispatch
+from M8085._utils import INSTRUCTION
+
+TRIALS = 100
+FORMS = [
+    (op, form) for op, form in enumerate(OPCODES)
+    if form is not None and form[0] in SPECIALIZED
+]
+
+def randomize(rng:random.Random, states:tuple, immediate:tuple):
+    """Put the same random registers, flags and operand bytes in every state."""
+    registers = {name: rng.getrandbits(8) for name in 'ABCDEHL'}
+    registers['SP'] = rng.getrandbits(16)
+    registers['PC'] = rng.getrandbits(16)
+    flags = {name: rng.getrandbits(1) for name in states[0].flags}
+    # the bytes an instruction can read: at BC, DE, HL, SP and the immediate address
+    pointers = [(registers[h] << 8) | registers[l] for h, l in ('BC', 'DE', 'HL')]
+    pointers += [registers['SP'], *immediate]
+    cells = {(p + i) & 0xFFFF: rng.getrandbits(8) for p in pointers for i in (0, 1)}
+    for state in states:
+        state.registers.update(registers)
+        state.flags.update(flags)
+        state.memory[:] = bytes(len(state.memory))
+        for address, value in cells.items():
+            state.memory[address] = value
+
+@pytest.mark.parametrize('op, form', FORMS, ids=[f'{op:02X}' for op, _ in FORMS])
+def test_generic_handler_runs_its_form(op, form):
+    inst, operands = form
+    length = INSTRUCTION[inst]['byte'] if inst in INSTRUCTION else 1
+    generic_state, fast_state = MachineState(), MachineState()
+    generic = Processor('', generic_state, cache=False).inst[inst]
+    fast = Dispatch(fast_state, Processor('', fast_state, cache=False).inst).handler(inst, operands)
+
+    rng = random.Random(op)
+    for _ in range(TRIALS):
+        immediate = () if length == 1 else (rng.getrandbits(8 * (length - 1)),)
+        randomize(rng, (generic_state, fast_state), immediate)
+        generic(*operands, *immediate)
+        fast(*immediate)
+        assert fast_state.registers == generic_state.registers, (inst, operands, immediate)
+        assert fast_state.flags == generic_state.flags, (inst, operands, immediate)
+        assert fast_state.memory == generic_state.memory, (inst, operands, immediate)
+
+if __name__ == '__main__':
+    for op, form in FORMS:
+        test_generic_handler_runs_its_form(op, form)
+    print(len(FORMS), 'forms match')
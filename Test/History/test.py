@@ -0,0 +1,149 @@
+"""Reverse execution: Processor.back()/seek() and the History undo log.
+
+Run with pytest, or directly: python Test/History/test.py
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085 import Processor, MachineState
+from M8085._history import History, Counters, Undone, CHECKPOINT_INTERVAL
+from M8085._stream import Step
+
+# 2075 steps writing 2000H-21FFH, long enough to pass two checkpoints.
+LOOP = """LXI H,2000H
+MVI D,08H
+OUTER: MVI C,40H
+INNER: MOV M,C
+INX H
+DCR C
+JNZ INNER
+DCR D
+JNZ OUTER
+HLT"""
+STEPS = 2075
+
+def snapshot(p:Processor) -> tuple:
+    state = p.state
+    return (bytes(state.memory), bytes(state.ports), dict(state.registers),
+            dict(state.flags), p.cycles())
+
+@pytest.fixture(scope='module')
+def reference() -> list:
+    """The state and counters after every step of a forward run."""
+    p = Processor(LOOP, MachineState(), cache=False)
+    p.step(0)
+    states = [snapshot(p)]
+    while p.finished is None:
+        if p.step(1).steps:
+            states.append(snapshot(p))
+    assert len(states) == STEPS + 1
+    return states
+
+def test_history_passes_checkpoints():
+    assert STEPS > 2 * CHECKPOINT_INTERVAL, 'M8085_CHECKPOINT set too high for this test'
+    p = Processor(LOOP, MachineState(), cache=False)
+    p.step(STEPS)
+    assert [c.position for c in p.history.checkpoints] == list(range(0, STEPS, CHECKPOINT_INTERVAL))
+
+def test_back(reference):
+    p = Processor(LOOP, MachineState(), cache=False)
+    p.step(STEPS)
+    for count in (1, 3, 250):
+        position = p.position
+        p.back(count)
+        assert p.position == position - count
+        assert snapshot(p) == reference[p.position]
+
+def test_seek(reference):
+    # Far seeks back restore a checkpoint and run forward, near ones undo.
+    p = Processor(LOOP, MachineState(), cache=False)
+    rng = random.Random(0)
+    for index in [STEPS, 0, STEPS, 1999, 1001, 1000, 999] + [rng.randint(0, STEPS) for _ in range(30)]:
+        p.seek(index)
+        assert p.position == index
+        assert snapshot(p) == reference[index], index
+
+def test_back_then_run_to_the_end():
+    plain = Processor(LOOP, MachineState(), cache=False)
+    plain.step(STEPS + 1)
+    p = Processor(LOOP, MachineState(), cache=False)
+    p.step(1500)
+    p.seek(200)
+    p.step(STEPS)
+    assert p.finished == plain.finished
+    assert p.cycles() == plain.cycles()
+
+def test_back_restores_the_db_origin():
+    p = Processor("ORG 2000H\nDB 1,2\nDB 3\nHLT", MachineState(), cache=False)
+    p.step(3)
+    assert bytes(p.state.memory[0x2000:0x2004]) == b'\x01\x02\x03\x00'
+    p.back(1)
+    assert p.state.memory[0x2002] == 0
+    p.step(2)
+    assert bytes(p.state.memory[0x2000:0x2004]) == b'\x01\x02\x03\x00'
+
+def test_seek_restores_the_db_origin():
+    # ORG, then more DB than a checkpoint interval: seeking back into the
+    # data restores a checkpoint, whose snapshot carries the origin.
+    count = 2 * CHECKPOINT_INTERVAL + 5
+    p = Processor("ORG 2000H\n" + "DB 1\n" * count + "HLT", MachineState(), cache=False)
+    p.step(count + 1)
+    assert p.state.origin == 0x2000 + count
+    p.seek(CHECKPOINT_INTERVAL + 1)
+    assert p.state.origin == 0x2000 + CHECKPOINT_INTERVAL
+    p.step(count + 1)
+    assert p.state.origin == 0x2000 + count
+
+def step(registers:dict = {}, flags:dict = {}, memory:dict = {}, ports:dict = {}) -> Step:
+    """A Step carrying only the old values History records."""
+    return Step(0, None, {}, {}, {}, {}, (registers, flags, memory, ports))
+
+def test_history_undo():
+    state = MachineState()
+    history = History()
+    history.record(step({'A': 1}, {'Z': 1}, {0x2000: 5}, {0x10: 7}), Counters(0, 0, 0, 0), origin=0x3000)
+    history.record(step({'A': 2}), Counters(1, 7, 2, 0))
+    state.registers['A'] = 3
+
+    state.origin = 0x3010
+
+    touched = Undone(set(), set(), set(), set())
+    assert history.undo(state, touched) == Counters(1, 7, 2, 0)
+    assert (state.registers['A'], state.origin) == (2, 0x3010)
+
+    assert history.undo(state, touched) == Counters(0, 0, 0, 0)
+    assert (state.registers['A'], state.flags['Z'], state.memory[0x2000], state.ports[0x10]) == (1, 1, 5, 7)
+    assert state.origin == 0x3000
+    assert touched == Undone({'A'}, {'Z'}, {0x2000}, {0x10})
+    assert len(history) == 0 and len(history.entries) == 0 and len(history.counters) == 0
+
+def test_history_truncate_and_nearest():
+    state = MachineState()
+    history = History(interval=2)
+    for n in range(6):
+        if history.due():
+            history.checkpoint(state, Counters(n, 0, 0, 0))
+        history.record(step({'A': n}), Counters(n, 0, 0, 0))
+    assert [c.position for c in history.checkpoints] == [0, 2, 4]
+    assert history.nearest(3).position == 2
+    assert history.nearest(4).position == 4
+
+    history.truncate(3)
+    assert len(history) == 3 and len(history.counters) == 3 * len(Counters._fields)
+    assert [c.position for c in history.checkpoints] == [0, 2]
+    assert history.nearest(5).position == 2
+    history.truncate(10) # past the end: nothing to forget
+    assert len(history) == 3
+
+if __name__ == '__main__':
+    p = Processor(LOOP, MachineState(), cache=False)
+    p.step(STEPS)
+    p.seek(1234)
+    print(p.position, p.cycles(), p.history.size(), 'bytes')
@@ -1,21 +1,21 @@
 from pathlib import Path
 
-from M8085 import Parser
+from M8085 import Parser, MachineState
 
 from M8085._utils import decode, INSTRUCTION
-from M8085._memory import _STACK, Assembler, stack
+from M8085._memory import Assembler
 
 PATH = Path(__file__).parent.parent / 'Programs'
 
 with open(PATH / 'test_db.asm', 'r') as file:
     test = file.read()
     print(test)
-    parser = Parser(test)
+    state = MachineState()
+    parser = Parser(test, state)
 
     print(parser.parse())
 
-    # print(_STACK)
-    pc = Assembler()
+    pc = Assembler(state)
     pc.pass2()
 
-    print(stack())
+    print(pc.get_stack())
@@ -14,12 +14,12 @@ L1: MOV A, M
     ANI 20H   ; 00100000 B 
     RLC 
     RLC 
-    MOV C, A 
+    MOV D, A 
     MOV A, M 
     ANI 5FH    ; 01011111 B 
     ORA B 
-    ORA C 
-    STAX H 
+    ORA D 
+    MOV M, A 
     INX H 
     DCR C 
     JNZ L1 
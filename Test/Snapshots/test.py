@@ -0,0 +1,104 @@
+"""Snapshots: page sharing, restoring in place, and the /api/snapshot routes.
+
+Run with pytest, or directly: python Test/Snapshots/test.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085 import Processor, MachineState, Snapshot
+from M8085._memory import PAGE_SIZE, _BLANK
+
+# Fills 2000H-20FFH with 0, 1, ... FFH.
+TABLE = "LXI H,2000H\nMVI B,00H\nL: MOV M,B\nINX H\nINR B\nJNZ L\nHLT"
+LOOKUP = "LDA 2010H\nMOV B,A\nLDA 2020H\nADD B\nSTA 3000H\nHLT"
+
+def table() -> MachineState:
+    state = MachineState()
+    Processor(TABLE, state, cache=False).as_dict()
+    return state
+
+def test_blank_pages_are_shared():
+    snapshot = MachineState().snapshot()
+    assert all(page is _BLANK for page in snapshot.pages)
+    assert snapshot.size() == 0
+
+def test_unchanged_pages_are_shared_with_the_parent():
+    state = table()
+    parent = state.snapshot()
+    assert parent.size() == PAGE_SIZE # the table
+    state.memory[0x3000] = 1
+    child = state.snapshot(parent)
+    assert child.pages[0x20] is parent.pages[0x20]
+    assert child.pages[0x30] is not _BLANK and child.pages[0x30][0] == 1
+    assert child.size(parent) == PAGE_SIZE
+
+def test_a_page_equal_to_the_parents_is_not_copied():
+    state = table()
+    parent = state.snapshot()
+    state.memory[0x2010] = 0xFF
+    state.memory[0x2010] = 0x10 # written, but back to what the parent holds
+    assert state.snapshot(parent).size(parent) == 0
+
+def test_restore_is_in_place():
+    state = table()
+    saved = state.snapshot()
+    memory, registers = state.memory, state.registers
+    state.registers['PC'] = 0
+    Processor(LOOKUP, state, cache=False).as_dict()
+    assert state.memory[0x3000] == 0x30
+    state.restore(saved)
+    assert state.memory is memory and state.registers is registers
+    assert state.memory[0x3000] == 0 and state.memory[0x20FF] == 0xFF
+    assert state.registers == saved.registers and state.origin == saved.origin
+    assert isinstance(saved, Snapshot) and saved.state().memory == state.memory
+
+def test_origin_is_saved():
+    state = MachineState()
+    Processor("ORG 2000H\nDB 1,2\nHLT", state, cache=False).as_dict()
+    saved = state.snapshot()
+    state.reset()
+    assert state.origin == 0xC000
+    state.restore(saved)
+    assert state.origin == 0x2002
+
+def test_snapshot_routes():
+    TestClient = pytest.importorskip('fastapi.testclient').TestClient
+    from Server.__main__ import app
+
+    headers = {'X-Session-ID': 'snapshots'}
+    with TestClient(app) as client:
+        client.post('/api/execute', headers=headers, json={'code': TABLE})
+        saved = client.post('/api/snapshot?name=table', headers=headers).json()
+        assert (saved['name'], saved['bytes']) == ('table', PAGE_SIZE)
+
+        client.post('/api/reset', headers=headers)
+        assert client.post('/api/snapshot', headers=headers).json()['name'] == 's1'
+        assert client.get('/api/snapshot', headers=headers).json()['snapshots'] == ['table', 's1']
+
+        restored = client.post('/api/snapshot/table/restore', headers=headers).json()
+        assert restored['newState']['memory']['20FFH'] == 'FFH'
+
+        batch = client.post('/api/execute/batch', headers=headers, json={
+            'code': LOOKUP, 'snapshot': 'table',
+            'states': [{'registers': {'PC': '0000H'}},
+                       {'registers': {'PC': '0000H'}, 'memory': {'2010H': '05H'}}],
+        }).json()
+        assert [r['newState']['memory']['3000H'] for r in batch['results']] == ['30H', '25H']
+
+        assert client.post('/api/execute/batch', headers=headers,
+                           json={'code': LOOKUP, 'snapshot': 'nope'}).status_code == 404
+        assert client.post('/api/snapshot/bad name!/restore', headers=headers).status_code == 422
+        assert client.delete('/api/snapshot/table', headers=headers).json()['snapshots'] == ['s1']
+        assert client.delete('/api/snapshot/table', headers=headers).status_code == 404
+
+if __name__ == '__main__':
+    state = table()
+    parent = state.snapshot()
+    state.memory[0x3000] = 1
+    print(parent.size(), state.snapshot(parent).size(parent))
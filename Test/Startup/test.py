@@ -0,0 +1,77 @@
+"""Import-time budget for the backend.
+
+The desktop app starts the server as a sidecar, so everything imported at
+startup is paid on every launch. The simulator package must import quickly
+and must not load the timing-diagram stack (matplotlib, numpy) until a
+diagram is actually requested.
+
+Run with pytest, or directly: python Test/Startup/test.py
+"""
+
+import json
+import marshal
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent.parent / 'Backend'
+BUDGET = float(os.getenv('IMPORT_BUDGET', '1.0')) # seconds, generous for slow CI machines
+HEAVY = ('matplotlib', 'numpy')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(module:str) -> dict:
+    """Import `module` in a fresh interpreter and report time and heavy modules."""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY)],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+def test_package_import_budget():
+    result = measure('M8085')
+    assert result['loaded'] == [], f"M8085 imported {result['loaded']} eagerly"
+    assert result['elapsed'] < BUDGET, f"import M8085 took {result['elapsed']:.3f}s"
+
+def test_server_does_not_load_timing_stack():
+    result = measure('Server.__main__')
+    assert result['loaded'] == [], f"Server imported {result['loaded']} eagerly"
+
+def test_timing_diagram_still_available():
+    output = subprocess.run(
+        [sys.executable, '-c', 'from M8085 import TimingDiagram; print(TimingDiagram.__name__)'],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    ).stdout
+    assert output.strip() == 'TimingDiagram'
+
+def test_concurrent_artifact_writes(tmp_path, monkeypatch):
+    # Threads of one process compiling the same table at once must each
+    # write their own temporary file and leave one whole artifact behind.
+    sys.path.insert(0, str(BACKEND))
+    from concurrent.futures import ThreadPoolExecutor
+    from M8085 import _utils
+    from M8085._utils import PATH, compile_yaml
+
+    warnings = []
+    monkeypatch.setattr(_utils, 'warn', warnings.append)
+
+    text = (PATH / 'commands_property.yml').read_bytes()
+    artifact = tmp_path / 'commands_property.marshal'
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: compile_yaml(text, artifact, (0, 0)), range(32)))
+    assert all(result == results[0] for result in results)
+    assert warnings == []
+    assert [path.name for path in tmp_path.iterdir()] == [artifact.name]
+    with open(artifact, 'rb') as f:
+        assert marshal.load(f)[2] == results[0]
+
+if __name__ == '__main__':
+    for module in ('M8085', 'Server.__main__'):
+        print(module, measure(module))
@@ -0,0 +1,150 @@
+"""Streamed execution: Processor.stream() steps, Frames and /execute/stream.
+
+Run with pytest, or directly: python Test/Stream/test.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+PROGRAMS = ROOT / 'Test' / 'Programs'
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085 import Processor, MachineState
+from M8085._stream import Frame
+
+# Stores 5, 9, 12, 14, 15 at 2050H.. and the total at 3000H.
+SOURCE = """MVI B,05H
+MVI A,00H
+LXI H,2050H
+LOOP: ADD B
+MOV M,A
+INX H
+DCR B
+JNZ LOOP
+STA 3000H
+HLT"""
+STEPS = 3 + 5 * 5 + 2
+
+def stream(source:str) -> tuple[Frame, dict]:
+    """Every step of a run coalesced into one Frame, and the final response."""
+    frame = Frame()
+    steps = Processor(source, MachineState(), cache=False).stream()
+    try:
+        while True:
+            frame.add(next(steps))
+    except StopIteration as end:
+        return frame, end.value
+
+@pytest.mark.parametrize('path', sorted(PROGRAMS.glob('*.asm')), ids=lambda path: path.stem)
+def test_steps_add_up_to_the_run(path):
+    # From a zeroed state the coalesced steps hold everything the run left.
+    source = path.read_text()
+    reference = Processor(source, MachineState(), cache=False).as_dict()
+    frame, final = stream(source)
+    assert (final['success'], final['checkpoint']) == (reference['success'], reference['checkpoint'])
+    if not reference['success']:
+        return
+    assert final['cycles'] == reference['cycles']
+    changes, state = frame.as_dict(), reference['newState']
+    assert all(state['registers'][name] == value for name, value in changes['registers'].items())
+    assert all(state['flags'][name] == value for name, value in changes['flags'].items())
+    assert {key: value for key, value in changes['memory'].items() if value != '00H'} == state['memory']
+
+def test_frame_keeps_the_last_values():
+    p = Processor(SOURCE, MachineState(), cache=False)
+    first, second = p.step(4), p.step(4)
+    merged = Frame()
+    merged.merge(first)
+    merged.merge(second)
+    assert merged.steps == 8 and merged.last is second.last
+    frame = merged.as_dict()
+    # B was written by MVI and again by DCR, L by LXI and INX: last values only
+    assert (frame['registers']['B'], frame['registers']['L']) == ('04H', '51H')
+    assert frame['memory'] == {'2050H': '05H'}
+    assert (frame['pc'], frame['instruction']) == ('000BH', 'JNZ 0007H')
+
+@pytest.fixture
+def client():
+    TestClient = pytest.importorskip('fastapi.testclient').TestClient
+    from Server.__main__ import app
+    with TestClient(app) as client:
+        yield client
+
+def receive_until(ws, kind:str) -> list:
+    messages = [ws.receive_json()]
+    while messages[-1]['type'] != kind:
+        messages.append(ws.receive_json())
+    return messages
+
+def test_stream_to_the_end(client):
+    with client.websocket_connect('/api/execute/stream?session=stream-run') as ws:
+        ws.send_json({'code': SOURCE})
+        messages = receive_until(ws, 'done')
+        assert messages[0]['type'] == 'start'
+        assert sum(m['steps'] for m in messages if m['type'] == 'frame') == STEPS
+        done = messages[-1]
+        assert done['success'] and done['position'] == STEPS
+        assert done['cycles'] == Processor(SOURCE, MachineState(), cache=False).as_dict()['cycles']
+        ws.send_json({'action': 'stop'})
+
+def test_step_back_and_seek(client):
+    with client.websocket_connect('/api/execute/stream?session=stream-seek') as ws:
+        ws.send_json({'code': SOURCE, 'paused': True})
+        assert ws.receive_json()['type'] == 'start'
+        ws.send_json({'action': 'step', 'count': 4})
+        frame = ws.receive_json()
+        assert (frame['position'], frame['registers']['A']) == (4, '05H')
+        ws.send_json({'action': 'back', 'count': 1})
+        frame = ws.receive_json()
+        # the values now in whatever ADD B had overwritten
+        assert (frame['steps'], frame['position']) == (0, 3)
+        assert frame['registers'] == {'A': '00H', 'PC': '0007H'} and frame['flags'] == {'P': 0}
+        ws.send_json({'action': 'seek', 'index': 10})
+        assert ws.receive_json()['position'] == 10
+        ws.send_json({'action': 'stop'})
+        done = ws.receive_json()
+        assert (done['checkpoint'], done['position']) == ('execute/stopped', 10)
+
+def test_until_runs_to_the_cursor_once(client):
+    with client.websocket_connect('/api/execute/stream?session=stream-until') as ws:
+        ws.send_json({'code': SOURCE, 'paused': True})
+        ws.receive_json()
+        ws.send_json({'action': 'until', 'to': {'line': 5}}) # MOV M,A
+        frame = ws.receive_json()
+        while 'break' not in frame:
+            frame = ws.receive_json()
+        assert frame['break'] == {'type': 'breakpoint', 'pc': '0008H'}
+        assert frame['position'] == 4
+        # the cursor is not a lasting breakpoint: continuing runs to the end
+        ws.send_json({'action': 'continue'})
+        messages = receive_until(ws, 'done')
+        assert not any('break' in m for m in messages)
+        assert messages[-1]['success'] and messages[-1]['position'] == STEPS
+
+def test_until_stops_at_an_earlier_breakpoint(client):
+    with client.websocket_connect('/api/execute/stream?session=stream-until-hit') as ws:
+        ws.send_json({'code': SOURCE, 'paused': True, 'breakpoints': [{'label': 'LOOP'}]})
+        ws.receive_json()
+        ws.send_json({'action': 'until', 'to': {'line': 9}})
+        frame = ws.receive_json()
+        while 'break' not in frame:
+            frame = ws.receive_json()
+        assert frame['break']['pc'] == '0007H'
+        ws.send_json({'action': 'stop'})
+        assert ws.receive_json()['checkpoint'] == 'execute/stopped'
+
+def test_stream_errors(client):
+    with client.websocket_connect('/api/execute/stream?session=stream-error') as ws:
+        ws.send_json({'code': 'JMP X\nHLT'})
+        done = ws.receive_json()
+        assert (done['type'], done['success'], done['position']) == ('done', False, 0)
+    with client.websocket_connect('/api/execute/stream?session=stream-bad') as ws:
+        ws.send_json({'fps': 30})
+        assert ws.receive_json()['type'] == 'error'
+
+if __name__ == '__main__':
+    frame, final = stream(SOURCE)
+    print(frame.as_dict(), final['cycles'])
@@ -0,0 +1,42 @@
+"""Timing diagram ETags and the If-None-Match check on /timing.
+
+Run with pytest, or directly: python Test/Timing/test.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / 'Backend'))
+
+from M8085._waveform import cycles, etag, etag_matches
+
+TAG = etag(cycles('MOV'), 'json')
+
+@pytest.mark.parametrize('header, matches', [
+    (TAG, True),
+    (TAG.removeprefix('W/'), True), # weak comparison
+    (f'"other", {TAG}', True),
+    ('*', True),
+    (TAG[:-2] + '"', False), # a prefix of the tag
+    (f'x{TAG}', False), # contains the tag, but is not a list of tags
+    (f'{TAG}x', False),
+    ('', False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, TAG) is matches
+
+def test_not_modified():
+    TestClient = pytest.importorskip('fastapi.testclient').TestClient
+    from Server.__main__ import app
+
+    with TestClient(app) as client:
+        first = client.get('/api/timing/MOV?format=json')
+        assert first.headers['ETag'] == TAG
+        assert client.get('/api/timing/MOV?format=json', headers={'If-None-Match': TAG}).status_code == 304
+        assert client.get('/api/timing/MOV?format=json', headers={'If-None-Match': f'x{TAG}'}).status_code == 200
+
+if __name__ == '__main__':
+    print(TAG, etag_matches(f'"other", {TAG}', TAG))
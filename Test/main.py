@@ -7,7 +7,7 @@
 
 #     print(program1)
 
-from M8085 import Parser, _STACK, Assembler, Processor, Register, Memory, Flag, Message
+from M8085 import Parser, MachineState, Assembler, Processor, Register, Memory, Flag, Message
 program1 = """
 START:  LXI H,8000H    ; Load H-L pair with 2000H
         MVI C, 0AH      ; Initialize counter C with 10
@@ -51,17 +51,19 @@ MVI A, 20H
 STA 2000H
 HLT
 """
-parser = Parser(program2)
+state = MachineState()
+parser = Parser(program2, state)
 parsed_program1 = parser.parse()
 if isinstance(parsed_program1,Message):
     print("Error:",parsed_program1.as_dict())
-pc = Assembler()
+pc = Assembler(state)
 pc.pass2()
-print(_STACK)
+print(pc.get_stack())
 
-process = Processor(program2)
+state = MachineState()
+process = Processor(program2, state)
 
 print(process.execute())
-print(Register().get_all())
-# print(Flag().get_all())
-print(Memory().get_used_addresses())
\ No newline at end of file
+print(Register(state).get_all())
+# print(Flag(state).get_all())
+print(Memory(state).get_used_addresses())
\ No newline at end of file